@@ -0,0 +1,373 @@
+"""
+enrichment_queue.py
+Background LLM cleaning, title repair and summaries for stored articles.
+
+Articles are written to the vector store with their raw extracted text
+as soon as they pass validation. Their IDs are then queued here and a
+single worker thread runs the LLM over them in batches:
+
+- pending items are sorted by length so each pipeline batch pads little
+- results are cached by content hash, so re-scraped pages cost nothing
+- queued items are also kept in the cache DB until processed, so a
+  restart resumes them (restore())
+- title / excerpt are patched on every chunk; when the cleaned text is
+  usable it replaces the part of the body the LLM saw, and the article
+  is re-chunked to the embedding window and all its rows, BM25 postings
+  and MinHash signature are rewritten together
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_ENABLED = os.getenv("LLM_ENRICHMENT", "1") == "1"
+BATCH_SIZE = int(os.getenv("ENRICHMENT_BATCH_SIZE", "8"))
+MAX_WAIT_SECONDS = 2.0      # how long the worker gathers items before a run
+MAX_DRAIN = BATCH_SIZE * 8  # items sorted together per run
+
+# Flan-T5 truncates at 512 tokens; longer input is wasted tokenization
+LLM_INPUT_CHARS = 2000
+MIN_SUMMARY_CHARS = 40
+MIN_CLEAN_WORDS = 40
+
+CACHE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "enrichment_cache.db")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Result cache (content hash -> enrichment)
+# ----------------------------------------------------------------------
+def _get_conn(path: str = None):
+    conn = sqlite3.connect(path or CACHE_DB_PATH)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS enrichments (
+            content_hash TEXT PRIMARY KEY,
+            created_at REAL,
+            result TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pending (
+            article_id TEXT PRIMARY KEY,
+            queued_at REAL,
+            item TEXT
+        )
+    ''')
+    return conn
+
+
+def cache_get(hashes: List[str], path: str = None) -> Dict[str, dict]:
+    if not hashes:
+        return {}
+    conn = _get_conn(path)
+    try:
+        marks = ",".join("?" * len(hashes))
+        rows = conn.execute(
+            f"SELECT content_hash, result FROM enrichments WHERE content_hash IN ({marks})",
+            list(hashes)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {h: json.loads(r) for h, r in rows}
+
+
+def cache_put(entries: Dict[str, dict], path: str = None) -> None:
+    if not entries:
+        return
+    conn = _get_conn(path)
+    try:
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO enrichments (content_hash, created_at, result) VALUES (?, ?, ?)",
+            [(h, now, json.dumps(e)) for h, e in entries.items()]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ----------------------------------------------------------------------
+# LLM work
+# ----------------------------------------------------------------------
+def enrich_texts(texts: List[str], llm=None, cache_path: str = None) -> List[dict]:
+    """
+    Cleans and summarizes a list of article texts.
+
+    Returns one {"title", "content", "summary"} dict per text. Cached
+    results are reused; misses are sorted by length and sent to the
+    pipeline BATCH_SIZE prompts at a time.
+    """
+    from agents.scraper_agent import CLEAN_PROMPT, SUMMARY_PROMPT, parse_clean_output
+
+    hashes = [content_hash(t) for t in texts]
+    cached = cache_get(list(set(hashes)), path=cache_path)
+
+    misses = sorted(
+        {h: t for h, t in zip(hashes, texts) if h not in cached}.items(),
+        key=lambda item: len(item[1])
+    )
+    if misses:
+        if llm is None:
+            from agents.scraper_agent import _get_llm
+            llm = _get_llm()
+
+        fresh = {}
+        for start in range(0, len(misses), BATCH_SIZE):
+            group = misses[start:start + BATCH_SIZE]
+            inputs = [t[:LLM_INPUT_CHARS] for _, t in group]
+            cleaned = llm.batch([CLEAN_PROMPT.format(raw=t) for t in inputs], batch_size=len(group))
+            summaries = llm.batch([SUMMARY_PROMPT.format(text=t) for t in inputs], batch_size=len(group))
+            for (h, _), raw, summary in zip(group, cleaned, summaries):
+                parsed = parse_clean_output(raw or "")
+                fresh[h] = {
+                    "title": parsed["title"],
+                    "content": parsed["content"],
+                    "summary": (summary or "").strip(),
+                }
+        cache_put(fresh, path=cache_path)
+        cached.update(fresh)
+
+    return [cached[h] for h in hashes]
+
+
+def merge_cleaned(raw: str, cleaned: str) -> str:
+    """Cleaned text for the part of the body the LLM saw, raw text after it."""
+    tail = raw[LLM_INPUT_CHARS:]
+    if tail and not raw[LLM_INPUT_CHARS - 1].isspace():
+        # Drop the word cut in half at the input limit
+        cut = tail.find(" ")
+        tail = tail[cut + 1:] if cut >= 0 else ""
+    return (cleaned.strip() + " " + tail.strip()).strip()
+
+
+def apply_enrichment(items: List[dict], enrichments: List[dict], vectordb=None) -> int:
+    """
+    Writes enrichment results back onto the stored chunk rows.
+
+    items: [{"id", "content", "title", "chunk_ids"}] as queued at ingest time.
+    Articles with usable cleaned text are re-chunked and rewritten (rows,
+    BM25 postings, MinHash signature); the rest get a metadata patch.
+    Returns the number of articles updated.
+    """
+    from rag.vectordb import get_vector_db, get_metadatas, update_rows
+    from rag.chunk_index import embed_articles, write_articles
+    from rag.bm25_index import get_bm25_index
+    from agents.minhash_index import get_minhash_index
+
+    vectordb = vectordb or get_vector_db()
+
+    row_ids, row_metas = [], []
+    rewrites = []
+    for item, enrichment in zip(items, enrichments):
+        existing = get_metadatas(vectordb, item["chunk_ids"])
+        if not existing:
+            continue  # article was pruned while queued
+
+        patch = {"enriched": "1"}
+        title = enrichment.get("title", "").strip()
+        if 8 <= len(title) <= 200:
+            patch["title"] = title
+        summary = enrichment.get("summary", "")
+        if len(summary) >= MIN_SUMMARY_CHARS:
+            patch["excerpt"] = summary
+
+        lead_id = item["chunk_ids"][0]
+        cleaned = enrichment.get("content", "")
+        if lead_id in existing and len(cleaned.split()) >= MIN_CLEAN_WORDS:
+            metadata = dict(existing[lead_id])
+            metadata.update(patch)
+            rewrites.append({
+                "id": item["id"],
+                "content": merge_cleaned(item.get("content", ""), cleaned),
+                "metadata": metadata,
+                "old_ids": [cid for cid in item["chunk_ids"] if cid in existing],
+            })
+            continue
+
+        for cid in item["chunk_ids"]:
+            if cid in existing:
+                meta = dict(existing[cid])
+                meta.update(patch)
+                row_ids.append(cid)
+                row_metas.append(meta)
+
+    if row_ids:
+        update_rows(vectordb, row_ids, metadatas=row_metas)
+
+    if rewrites:
+        # Same token-window chunking as ingest; one embedding call for all
+        embed_articles(rewrites)
+        bm25 = get_bm25_index()
+        stale = [cid for a in rewrites for cid in a["old_ids"] if cid not in set(a["chunk_ids"])]
+        if stale:
+            vectordb.delete(ids=stale)
+            bm25.delete(stale)
+        write_articles(rewrites, vectordb=vectordb)  # upserts rows and BM25 postings
+        minhash = get_minhash_index()
+        for article in rewrites:
+            minhash.replace(article["id"], minhash.signature(article["content"]))
+        minhash.save()
+        bm25.save()
+
+    return len({rid.split("::")[0] for rid in row_ids}) + len(rewrites)
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+class EnrichmentQueue:
+    """
+    In-process queue drained by one daemon thread. Queued items are
+    mirrored in the cache DB's `pending` table until processed.
+    """
+
+    def __init__(self, batch_wait: float = MAX_WAIT_SECONDS, path: str = None):
+        self.batch_wait = batch_wait
+        self.path = path
+        self._queue: "queue.Queue[dict]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"queued": 0, "enriched": 0, "failed": 0, "batches": 0}
+
+    def _bump(self, **counts) -> None:
+        with self._stats_lock:
+            for key, n in counts.items():
+                self.stats[key] += n
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="enrichment-worker", daemon=True)
+            self._thread.start()
+            logger.info("🧽 Enrichment worker started")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Pending items (survive restarts)
+    # ------------------------------------------------------------------
+    def _save_pending(self, item: dict) -> None:
+        conn = _get_conn(self.path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO pending (article_id, queued_at, item) VALUES (?, ?, ?)",
+                (item["id"], time.time(), json.dumps(item))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _clear_pending(self, items: List[dict]) -> None:
+        conn = _get_conn(self.path)
+        try:
+            conn.executemany("DELETE FROM pending WHERE article_id = ?", [(i["id"],) for i in items])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def restore(self) -> int:
+        """Re-queues items left pending by a previous process."""
+        conn = _get_conn(self.path)
+        try:
+            rows = conn.execute("SELECT item FROM pending ORDER BY queued_at").fetchall()
+        finally:
+            conn.close()
+        for (item,) in rows:
+            self._queue.put(json.loads(item))
+        if rows:
+            logger.info(f"🧽 Restored {len(rows)} pending enrichment items")
+        return len(rows)
+
+    def enqueue(self, article: dict) -> None:
+        """Queues a stored article ({"id", "content", "metadata", "chunk_ids"})."""
+        item = {
+            "id": article["id"],
+            "content": article["content"],
+            "title": article.get("metadata", {}).get("title", ""),
+            "chunk_ids": list(article["chunk_ids"]),
+        }
+        self._save_pending(item)
+        self._queue.put(item)
+        self._bump(queued=1)
+        self.start()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {**stats, "pending": self.pending()}
+
+    def _drain(self) -> List[dict]:
+        try:
+            items = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.time() + self.batch_wait
+        while len(items) < MAX_DRAIN:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def process(self, items: List[dict], llm=None, vectordb=None) -> int:
+        enrichments = enrich_texts([i["content"] for i in items], llm=llm, cache_path=self.path)
+        updated = apply_enrichment(items, enrichments, vectordb=vectordb)
+        self._clear_pending(items)
+        self._bump(batches=1, enriched=updated)
+        return updated
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            items = self._drain()
+            if not items:
+                continue
+            try:
+                updated = self.process(items)
+                logger.info(f"🧽 Enriched {updated}/{len(items)} articles")
+            except Exception as e:
+                # Not retried: a batch that fails once would fail on every restart
+                self._clear_pending(items)
+                self._bump(failed=len(items))
+                logger.warning(f"⚠️  Enrichment batch failed ({len(items)} articles): {e}")
+
+
+_queue_instance = None
+_queue_lock = threading.Lock()
+
+
+def get_enrichment_queue() -> EnrichmentQueue:
+    global _queue_instance
+    if _queue_instance is None:
+        with _queue_lock:
+            if _queue_instance is None:
+                _queue_instance = EnrichmentQueue()
+                if ENRICHMENT_ENABLED and _queue_instance.restore():
+                    _queue_instance.start()
+    return _queue_instance
@@ -0,0 +1,180 @@
+"""
+ingest_metrics.py
+Per-run ingestion metrics: stage latency histograms, byte counts and
+per-source / per-domain counters.
+
+A RunMetrics object hangs off each collection run (see run_checkpoint,
+which also persists it) and is passed down to the fetch / parse / embed
+/ write steps. report() condenses it into what we need to pick the next
+optimization: where the time went, which hosts are slow, and the
+article throughput of the run.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class Histogram:
+    """Fixed log-spaced latency histogram."""
+
+    def __init__(self, state: dict = None):
+        state = state or {}
+        self.counts = list(state.get("counts") or [0] * (len(BUCKETS_MS) + 1))
+        self.total_ms = float(state.get("total_ms", 0.0))
+        self.max_ms = float(state.get("max_ms", 0.0))
+        self.n = int(state.get("n", 0))
+
+    def observe(self, ms: float) -> None:
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.n += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.n:
+            return 0.0
+        target = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "total_ms": self.total_ms, "max_ms": self.max_ms, "n": self.n}
+
+
+class RunMetrics:
+    def __init__(self, run_id: str, state: dict = None, live: bool = True):
+        state = state or {}
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Histogram] = {
+            name: Histogram(h) for name, h in (state.get("stages") or {}).items()
+        }
+        self.bytes: Dict[str, int] = dict(state.get("bytes") or {})
+        self.sources: Dict[str, Dict[str, float]] = dict(state.get("sources") or {})
+        self.domains: Dict[str, Dict[str, float]] = dict(state.get("domains") or {})
+        # Wall time is summed over (re)starts so resumed runs report correctly
+        self.elapsed = float(state.get("elapsed", 0.0))
+        self._started = time.time() if live else None
+        self._resolved = set()
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages.setdefault(stage, Histogram()).observe(seconds * 1000.0)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def add_bytes(self, stage: str, n: int) -> None:
+        with self._lock:
+            self.bytes[stage] = self.bytes.get(stage, 0) + int(n)
+
+    def count_source(self, source: str, key: str, n: float = 1) -> None:
+        with self._lock:
+            counters = self.sources.setdefault(source, {})
+            counters[key] = counters.get(key, 0) + n
+
+    def observe_fetch(self, domain: str, seconds: float, nbytes: int, ok: bool) -> None:
+        self.observe("fetch", seconds)
+        self.add_bytes("fetch", nbytes)
+        with self._lock:
+            counters = self.domains.setdefault(domain, {"requests": 0, "errors": 0, "bytes": 0, "fetch_ms": 0.0})
+            counters["requests"] += 1
+            counters["errors"] += 0 if ok else 1
+            counters["bytes"] += nbytes
+            counters["fetch_ms"] += seconds * 1000.0
+
+    def needs_dns_timing(self, host: str) -> bool:
+        """True the first time a host is seen in this process for the run."""
+        with self._lock:
+            if host in self._resolved:
+                return False
+            self._resolved.add(host)
+            return True
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {name: h.to_dict() for name, h in self.stages.items()},
+                "bytes": dict(self.bytes),
+                "sources": {k: dict(v) for k, v in self.sources.items()},
+                "domains": {k: dict(v) for k, v in self.domains.items()},
+                "elapsed": self.elapsed + (time.time() - self._started if self._started else 0.0),
+            }
+
+    def report(self, top_hosts: int = 10) -> dict:
+        state = self.to_dict()
+        stages = {name: Histogram(h) for name, h in state["stages"].items()}
+        stage_total = sum(h.total_ms for h in stages.values()) or 1.0
+
+        breakdown = {
+            name: {
+                "count": h.n,
+                "total_s": round(h.total_ms / 1000.0, 3),
+                "share": round(h.total_ms / stage_total, 3),
+                "mean_ms": round(h.total_ms / h.n, 1) if h.n else 0.0,
+                "p50_ms": h.quantile(0.5),
+                "p95_ms": h.quantile(0.95),
+                "max_ms": round(h.max_ms, 1),
+            }
+            for name, h in sorted(stages.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+        }
+
+        hosts = [
+            {
+                "host": host,
+                "requests": int(c["requests"]),
+                "errors": int(c["errors"]),
+                "mean_fetch_ms": round(c["fetch_ms"] / c["requests"], 1) if c["requests"] else 0.0,
+                "total_fetch_s": round(c["fetch_ms"] / 1000.0, 3),
+                "bytes": int(c["bytes"]),
+            }
+            for host, c in state["domains"].items()
+        ]
+        hosts.sort(key=lambda h: h["total_fetch_s"], reverse=True)
+
+        ingested = sum(c.get("ingested", 0) for c in state["sources"].values())
+        elapsed = state["elapsed"]
+        return {
+            "run_id": self.run_id,
+            "elapsed_s": round(elapsed, 2),
+            "articles_ingested": int(ingested),
+            "articles_per_sec": round(ingested / elapsed, 3) if elapsed > 0 else 0.0,
+            "bytes": state["bytes"],
+            "stages": breakdown,
+            "slow_hosts": hosts[:top_hosts],
+            "sources": state["sources"],
+        }
+
+
+@contextmanager
+def stage_timer(metrics: Optional[RunMetrics], stage: str):
+    """Times a block into `metrics`; a no-op when metrics is None."""
+    if metrics is None:
+        yield
+        return
+    with metrics.timer(stage):
+        yield
@@ -0,0 +1,216 @@
+"""
+keyword_tagger.py
+Ingest-time TF-IDF keyword tags backed by corpus document frequencies.
+
+Document frequencies are maintained incrementally as articles are
+stored (and persisted next to the vector store), so IDF reflects the
+whole corpus without re-reading it. Each ingest batch is scored in one
+vectorized pass over its sparse (doc, term, count) triples and the top
+terms are written into the article metadata; nothing is computed at
+request time.
+"""
+
+import os
+import re
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 5
+TAG_SEPARATOR = ","     # Chroma metadata needs strings, not lists
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]+[a-z0-9]")
+
+STOPWORDS = frozenset("""
+about above after again against all also although among and another any are
+around because been before being below between both but can cannot could did
+does doing down during each either even ever every few for from further had
+has have having her here hers herself him himself his how however into its
+itself just last least less like made make many may more most much must near
+neither never new next not now off often once one only other others our ours
+out over own per said same says she should since some still such than that
+the their theirs them themselves then there these they this those though
+through thus too two under until upon very was way were what when where
+whether which while who whom whose why will with within without would year
+years yet you your yours yourself read more click subscribe newsletter
+advertisement share comments photo image copyright reserved rights reuters
+told according week today yesterday tuesday wednesday thursday friday
+saturday sunday monday first time people
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        t for t in _TOKEN_RE.findall(text.lower())
+        if len(t) > 3 and t not in STOPWORDS and not t.isdigit()
+    ]
+
+
+def parse_tags(value) -> List[str]:
+    """Stored tag string (or legacy list) -> list of tags."""
+    if isinstance(value, (list, tuple)):
+        return [str(t) for t in value if t]
+    if not value:
+        return []
+    return [t.strip() for t in str(value).split(TAG_SEPARATOR) if t.strip()]
+
+
+class KeywordTagger:
+    """
+    Incremental document-frequency table plus batch TF-IDF scoring.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._df = np.zeros(0, dtype=np.int64)
+        self.n_docs = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    # ------------------------------------------------------------------
+    # Document frequencies
+    # ------------------------------------------------------------------
+    def _term_ids_locked(self, tokens: Iterable[str], unseen: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """
+        Term ids of the tokens. New tokens join the vocabulary, unless
+        `unseen` is given: then they get ids past the vocabulary in that
+        dict and the table is left untouched (read-only tagging).
+        """
+        ids = []
+        for t in tokens:
+            idx = self._vocab.get(t)
+            if idx is None and unseen is not None:
+                idx = unseen.setdefault(t, len(self._terms) + len(unseen))
+            elif idx is None:
+                idx = len(self._vocab)
+                self._vocab[t] = idx
+                self._terms.append(t)
+            ids.append(idx)
+        if len(self._vocab) > len(self._df):
+            grown = np.zeros(max(len(self._vocab), 2 * len(self._df)), dtype=np.int64)
+            grown[:len(self._df)] = self._df
+            self._df = grown
+        return np.asarray(ids, dtype=np.int64)
+
+    def _sparse_batch_locked(self, texts: List[str], update: bool, unseen: Optional[Dict[str, int]] = None):
+        """Returns (doc_idx, term_idx, counts, doc_lengths) for the batch."""
+        docs, terms, counts, lengths = [], [], [], []
+        for d, text in enumerate(texts):
+            ids = self._term_ids_locked(tokenize(text), None if update else unseen)
+            lengths.append(max(len(ids), 1))
+            if not len(ids):
+                continue
+            uniq, cnt = np.unique(ids, return_counts=True)
+            docs.append(np.full(len(uniq), d, dtype=np.int64))
+            terms.append(uniq)
+            counts.append(cnt)
+            if update:
+                self._df[uniq] += 1
+        if update:
+            self.n_docs += len(texts)
+        if not docs:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, np.asarray(lengths, dtype=np.float64)
+        return (np.concatenate(docs), np.concatenate(terms),
+                np.concatenate(counts), np.asarray(lengths, dtype=np.float64))
+
+    def observe(self, texts: List[str]) -> None:
+        """Adds documents to the DF table without tagging them."""
+        with self._lock:
+            self._sparse_batch_locked(texts, update=True)
+
+    # ------------------------------------------------------------------
+    # Tagging
+    # ------------------------------------------------------------------
+    def tag_batch(self, texts: List[str], top_k: int = TOP_K, update: bool = True) -> List[List[str]]:
+        """
+        Top-k TF-IDF terms per text. With update=True the batch is counted
+        into the document frequencies first (the usual ingest path).
+        """
+        if not texts:
+            return []
+        unseen: Dict[str, int] = {}
+        with self._lock:
+            doc_idx, term_idx, counts, lengths = self._sparse_batch_locked(texts, update, unseen)
+            if not len(doc_idx):
+                return [[] for _ in texts]
+            n = max(self.n_docs, 1)
+            # Terms outside the vocabulary (update=False) have df 0
+            known = term_idx < len(self._terms)
+            df = np.zeros(len(term_idx), dtype=np.int64)
+            df[known] = self._df[term_idx[known]]
+            idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+            terms, n_terms, extra = self._terms, len(self._terms), list(unseen)
+
+        scores = counts / lengths[doc_idx] * idf
+        # Group by document, best score first (term id breaks ties stably)
+        order = np.lexsort((term_idx, -scores, doc_idx))
+        doc_sorted = doc_idx[order]
+        starts = np.searchsorted(doc_sorted, np.arange(len(texts)), side="left")
+        ends = np.searchsorted(doc_sorted, np.arange(len(texts)), side="right")
+
+        tags = []
+        for lo, hi in zip(starts, ends):
+            top = order[lo:min(hi, lo + top_k)]
+            tags.append([terms[t] if t < n_terms else extra[t - n_terms] for t in term_idx[top]])
+        return tags
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vocab.clear()
+            self._terms = []
+            self._df = np.zeros(0, dtype=np.int64)
+            self.n_docs = 0
+
+    def __len__(self) -> int:
+        return len(self._vocab)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            terms = np.array(self._terms, dtype=str)
+            df = self._df[:len(self._vocab)].copy()
+            n_docs = self.n_docs
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, terms=terms, df=df, n_docs=np.int64(n_docs))
+        os.replace(tmp, self.path)
+
+    def load(self) -> None:
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            terms, df, n_docs = data["terms"], data["df"], int(data["n_docs"])
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load keyword DF table {self.path}: {e}")
+            return
+        with self._lock:
+            self._terms = [str(t) for t in terms]
+            self._vocab = {t: i for i, t in enumerate(self._terms)}
+            self._df = df.astype(np.int64)
+            self.n_docs = n_docs
+
+
+_tagger = None
+_tagger_lock = threading.Lock()
+
+
+def get_keyword_tagger() -> KeywordTagger:
+    """Process-wide tagger persisted alongside the vector store."""
+    global _tagger
+    if _tagger is None:
+        with _tagger_lock:
+            if _tagger is None:
+                from rag.vectordb import CHROMA_DIR
+                _tagger = KeywordTagger(path=os.path.join(CHROMA_DIR, "keyword_df.npz"))
+    return _tagger
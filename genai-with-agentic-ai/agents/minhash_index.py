@@ -0,0 +1,209 @@
+"""
+minhash_index.py
+MinHash signatures + LSH banding for near-duplicate article detection.
+
+Runs before any embedding work: a syndicated wire story that is already
+in the corpus is caught from its word shingles alone. Signatures are
+persisted next to the vector store and pruned together with articles.
+"""
+
+import os
+import re
+import threading
+import time
+import zlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 32              # 32 bands x 4 rows -> candidate threshold ~0.42
+SHINGLE_SIZE = 3        # word 3-grams
+JACCARD_THRESHOLD = 0.7
+
+# Multiply-shift hashing: ((a*x + b) mod 2^64) >> 32 with odd a. uint64
+# arithmetic wraps for free, so each permutation is one multiply-add and
+# a shift instead of a modulo; outputs fit in uint32.
+_SHIFT = np.uint64(32)
+_SEED = 1
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        words = words + [""] * (SHINGLE_SIZE - len(words))
+    shingles = {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+class MinHashIndex:
+    """
+    In-memory LSH index of MinHash signatures keyed by article ID.
+    """
+
+    def __init__(self, path: Optional[str] = None, num_perm: int = NUM_PERM,
+                 bands: int = BANDS, threshold: float = JACCARD_THRESHOLD):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        rng = np.random.RandomState(_SEED)
+        self._a = rng.randint(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._timestamps: Dict[str, float] = {}
+        self._buckets: List[Dict[bytes, set]] = [dict() for _ in range(bands)]
+
+        if path and os.path.exists(path):
+            self.load()
+
+    # ------------------------------------------------------------------
+    # Signatures
+    # ------------------------------------------------------------------
+    def signature(self, text: str) -> np.ndarray:
+        hashes = _shingle_hashes(text)
+        phv = (np.outer(self._a, hashes) + self._b[:, None]) >> _SHIFT
+        return phv.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray):
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    # ------------------------------------------------------------------
+    # Query / update
+    # ------------------------------------------------------------------
+    def query(self, sig: np.ndarray) -> Tuple[Optional[str], float]:
+        """
+        Returns (article_id, estimated Jaccard) of the closest indexed
+        article sharing an LSH band, or (None, 0.0).
+        """
+        with self._lock:
+            candidates = set()
+            for band, key in self._band_keys(sig):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best_id, best = None, 0.0
+            for cid in candidates:
+                score = float(np.mean(self._signatures[cid] == sig))
+                if score > best:
+                    best_id, best = cid, score
+            return best_id, best
+
+    def is_near_duplicate(self, text: str) -> Tuple[bool, Optional[str], float]:
+        sig = self.signature(text)
+        match, score = self.query(sig)
+        return score >= self.threshold, match, score
+
+    def add(self, article_id: str, sig: np.ndarray, timestamp: float) -> None:
+        with self._lock:
+            if article_id in self._signatures:
+                self._remove_locked(article_id)
+            self._signatures[article_id] = sig
+            self._timestamps[article_id] = float(timestamp)
+            for band, key in self._band_keys(sig):
+                self._buckets[band].setdefault(key, set()).add(article_id)
+
+    def replace(self, article_id: str, sig: np.ndarray) -> None:
+        """New signature for an article whose text changed; keeps its index time."""
+        with self._lock:
+            timestamp = self._timestamps.get(article_id, time.time())
+        self.add(article_id, sig, timestamp)
+
+    def _remove_locked(self, article_id: str) -> None:
+        sig = self._signatures.pop(article_id, None)
+        self._timestamps.pop(article_id, None)
+        if sig is None:
+            return
+        for band, key in self._band_keys(sig):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(article_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def remove(self, article_ids) -> int:
+        with self._lock:
+            removed = 0
+            for article_id in article_ids:
+                if article_id in self._signatures:
+                    self._remove_locked(article_id)
+                    removed += 1
+            return removed
+
+    def expire(self, older_than: float) -> int:
+        """Drops signatures of articles indexed before `older_than` (epoch seconds)."""
+        with self._lock:
+            stale = [a for a, ts in self._timestamps.items() if ts < older_than]
+        return self.remove(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._signatures.clear()
+            self._timestamps.clear()
+            self._buckets = [dict() for _ in range(self.bands)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            ids = list(self._signatures.keys())
+            sigs = (np.stack([self._signatures[i] for i in ids])
+                    if ids else np.zeros((0, self.num_perm), dtype=np.uint32))
+            ts = np.array([self._timestamps[i] for i in ids], dtype=np.float64)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, ids=np.array(ids, dtype=str), signatures=sigs, timestamps=ts)
+        os.replace(tmp, self.path)
+
+    def load(self) -> None:
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            ids, sigs, ts = data["ids"], data["signatures"], data["timestamps"]
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load MinHash index {self.path}: {e}")
+            return
+        if sigs.ndim != 2 or sigs.shape[1] != self.num_perm:
+            logger.warning("⚠️  MinHash index shape mismatch, starting empty")
+            return
+        self.clear()
+        for article_id, sig, t in zip(ids, sigs, ts):
+            self.add(str(article_id), sig.astype(np.uint32), float(t))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_minhash_index() -> MinHashIndex:
+    """Process-wide index persisted alongside the vector store."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from rag.vectordb import CHROMA_DIR
+                _index = MinHashIndex(path=os.path.join(CHROMA_DIR, "minhash_index.npz"))
+    return _index
@@ -0,0 +1,390 @@
+"""
+run_checkpoint.py
+SQLite checkpoints for news collection runs.
+
+Every auto_collect_news call is a run with an ID. As it goes, the run
+records which article URLs reached a final state (ingested, rejected,
+error) and which sources had their batch stored. If the process dies
+mid-refresh (a --reload or a deploy), the next collection picks the
+interrupted run back up and skips all completed work. Runs can be
+listed, inspected and cancelled through /scraper/runs.
+"""
+
+import sqlite3
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from agents.ingest_metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "collection_runs.db")
+
+# Interrupted runs older than this are not resumed (the next scheduled
+# refresh would fetch newer articles anyway)
+RESUME_MAX_AGE_HOURS = 6
+
+FINAL_URL_STATUSES = ("ingested", "rejected", "error")
+
+# Params that define what a run collects. The others (clear_old) only
+# gate one-off steps, so a restart that passes different ones (the
+# startup run after a periodic one died) still resumes the run.
+SCOPE_PARAMS = ("quick_mode",)
+
+# Runs executing in this process, by ID
+_active: Dict[str, "CollectionRun"] = {}
+_active_lock = threading.Lock()
+_last_run_id: Optional[str] = None
+
+
+def _get_conn():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db():
+    conn = _get_conn()
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            started_at REAL,
+            updated_at REAL,
+            finished_at REAL,
+            status TEXT,
+            params TEXT,
+            steps TEXT,
+            stats TEXT,
+            resumed INTEGER DEFAULT 0
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS run_sources (
+            run_id TEXT,
+            category TEXT,
+            source_url TEXT,
+            ingested INTEGER,
+            finished_at REAL,
+            PRIMARY KEY (run_id, category, source_url)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS run_urls (
+            run_id TEXT,
+            url TEXT,
+            status TEXT,
+            reason TEXT,
+            updated_at REAL,
+            PRIMARY KEY (run_id, url)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS run_metrics (
+            run_id TEXT PRIMARY KEY,
+            updated_at REAL,
+            metrics TEXT
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+
+class RunCancelled(Exception):
+    pass
+
+
+class CollectionRun:
+    """
+    Checkpoint handle threaded through one collection run.
+
+    Completed sources/URLs are mirrored in memory so the skip checks in
+    the scraping loop never touch the database.
+    """
+
+    def __init__(self, run_id: str, params: dict, steps: List[str] = None,
+                 sources: Dict[Tuple[str, str], int] = None, urls: set = None,
+                 resumed: bool = False, metrics: dict = None):
+        self.run_id = run_id
+        self.metrics = RunMetrics(run_id, metrics)
+        self.params = params
+        self.resumed = resumed
+        self._steps = set(steps or [])
+        self._sources = dict(sources or {})
+        self._urls = set(urls or ())
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # -- steps (one-off actions such as clearing the store) ------------
+    def step_done(self, name: str) -> bool:
+        return name in self._steps
+
+    def mark_step(self, name: str) -> None:
+        with self._lock:
+            self._steps.add(name)
+            steps = sorted(self._steps)
+        conn = _get_conn()
+        conn.execute("UPDATE runs SET steps = ?, updated_at = ? WHERE run_id = ?",
+                     (json.dumps(steps), time.time(), self.run_id))
+        conn.commit()
+        conn.close()
+
+    # -- sources --------------------------------------------------------
+    def source_done(self, category: str, source_url: str) -> bool:
+        return (category, source_url) in self._sources
+
+    def ingested_for(self, category: str) -> int:
+        """Articles ingested by already-completed sources of a category."""
+        return sum(n for (cat, _), n in self._sources.items() if cat == category)
+
+    def mark_sources(self, category: str, counts: Dict[str, int]) -> None:
+        now = time.time()
+        with self._lock:
+            for url, n in counts.items():
+                self._sources[(category, url)] = n
+        conn = _get_conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO run_sources (run_id, category, source_url, ingested, finished_at) VALUES (?, ?, ?, ?, ?)",
+            [(self.run_id, category, url, n, now) for url, n in counts.items()]
+        )
+        conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, self.run_id))
+        conn.commit()
+        conn.close()
+        self.save_metrics()
+
+    def save_metrics(self) -> None:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO run_metrics (run_id, updated_at, metrics) VALUES (?, ?, ?)",
+            (self.run_id, time.time(), json.dumps(self.metrics.to_dict()))
+        )
+        conn.commit()
+        conn.close()
+
+    # -- article URLs ---------------------------------------------------
+    def url_done(self, url: str) -> bool:
+        return url in self._urls
+
+    def mark_urls(self, results: List[dict]) -> None:
+        """Records article results ({"url", "status", "reason"}) in a final state."""
+        rows = [
+            (self.run_id, r["url"], r["status"], str(r.get("reason") or "")[:200], time.time())
+            for r in results if r.get("url") and r.get("status") in FINAL_URL_STATUSES
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._urls.update(r[1] for r in rows)
+        conn = _get_conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO run_urls (run_id, url, status, reason, updated_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.commit()
+        conn.close()
+
+    # -- cancellation ---------------------------------------------------
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise RunCancelled(self.run_id)
+
+    def release(self) -> None:
+        """Stops tracking the run in this process without finishing it."""
+        with _active_lock:
+            _active.pop(self.run_id, None)
+
+    def finish(self, status: str, stats: dict = None) -> None:
+        self.save_metrics()
+        now = time.time()
+        conn = _get_conn()
+        conn.execute(
+            "UPDATE runs SET status = ?, finished_at = ?, updated_at = ?, stats = ? WHERE run_id = ?",
+            (status, now, now, json.dumps(stats or {}), self.run_id)
+        )
+        conn.commit()
+        conn.close()
+        self.release()
+        logger.info(f"🏁 Collection run {self.run_id} {status}")
+
+
+def _load_run(conn, row) -> CollectionRun:
+    run_id = row["run_id"]
+    sources = {
+        (r["category"], r["source_url"]): r["ingested"]
+        for r in conn.execute("SELECT category, source_url, ingested FROM run_sources WHERE run_id = ?", (run_id,))
+    }
+    urls = {r["url"] for r in conn.execute("SELECT url FROM run_urls WHERE run_id = ?", (run_id,))}
+    metrics = conn.execute("SELECT metrics FROM run_metrics WHERE run_id = ?", (run_id,)).fetchone()
+    return CollectionRun(
+        run_id, json.loads(row["params"] or "{}"), json.loads(row["steps"] or "[]"),
+        sources, urls, resumed=True,
+        metrics=json.loads(metrics["metrics"]) if metrics else None
+    )
+
+
+def run_scope(params: dict) -> dict:
+    return {key: params.get(key) for key in SCOPE_PARAMS}
+
+
+def start_run(params: dict, run_id: Optional[str] = None, resume: bool = True) -> CollectionRun:
+    """
+    Starts a run, or resumes one:
+    - `run_id` given: that run continues from its checkpoint
+    - otherwise the newest interrupted run with the same scope (see
+      SCOPE_PARAMS; status "running" but not executing in this process)
+      is resumed, keeping its own params
+    Other stale "running" rows are marked "interrupted".
+    """
+    global _last_run_id
+    init_db()
+    now = time.time()
+    conn = _get_conn()
+    try:
+        with _active_lock:
+            active = set(_active)
+        run = None
+        if run_id:
+            if run_id in active:
+                raise ValueError(f"Run {run_id} is already executing")
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is not None:
+                run = _load_run(conn, row)
+        elif resume:
+            rows = conn.execute(
+                "SELECT * FROM runs WHERE status = 'running' ORDER BY started_at DESC"
+            ).fetchall()
+            for row in rows:
+                if row["run_id"] in active:
+                    continue
+                fresh = now - row["updated_at"] <= RESUME_MAX_AGE_HOURS * 3600
+                if run is None and fresh and run_scope(json.loads(row["params"] or "{}")) == run_scope(params):
+                    run = _load_run(conn, row)
+                else:
+                    conn.execute("UPDATE runs SET status = 'interrupted' WHERE run_id = ?", (row["run_id"],))
+
+        if run is not None:
+            conn.execute(
+                "UPDATE runs SET status = 'running', updated_at = ?, finished_at = NULL, resumed = resumed + 1 WHERE run_id = ?",
+                (now, run.run_id)
+            )
+            logger.info(f"⏯️  Resuming collection run {run.run_id} "
+                        f"({len(run._sources)} sources, {len(run._urls)} articles already done)")
+        else:
+            run = CollectionRun(run_id or uuid.uuid4().hex[:12], params)
+            conn.execute(
+                "INSERT INTO runs (run_id, started_at, updated_at, status, params, steps, stats) VALUES (?, ?, ?, 'running', ?, '[]', '{}')",
+                (run.run_id, now, now, json.dumps(params))
+            )
+            logger.info(f"▶️  Starting collection run {run.run_id}")
+        conn.commit()
+    finally:
+        conn.close()
+
+    with _active_lock:
+        _active[run.run_id] = run
+    _last_run_id = run.run_id
+    return run
+
+
+def get_last_run_id() -> Optional[str]:
+    return _last_run_id
+
+
+def _row_to_dict(row) -> dict:
+    return {
+        "run_id": row["run_id"],
+        "status": row["status"],
+        "started_at": row["started_at"],
+        "updated_at": row["updated_at"],
+        "finished_at": row["finished_at"],
+        "params": json.loads(row["params"] or "{}"),
+        "steps": json.loads(row["steps"] or "[]"),
+        "stats": json.loads(row["stats"] or "{}"),
+        "resumed": row["resumed"],
+    }
+
+
+def list_runs(limit: int = 20) -> List[dict]:
+    init_db()
+    conn = _get_conn()
+    rows = conn.execute("SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return [_row_to_dict(r) for r in rows]
+
+
+def get_run(run_id: str) -> Optional[dict]:
+    init_db()
+    conn = _get_conn()
+    try:
+        row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = _row_to_dict(row)
+        run["sources"] = [
+            dict(r) for r in conn.execute(
+                "SELECT category, source_url, ingested, finished_at FROM run_sources WHERE run_id = ? ORDER BY finished_at",
+                (run_id,)
+            )
+        ]
+        run["urls"] = {
+            r["status"]: r["n"] for r in conn.execute(
+                "SELECT status, COUNT(*) AS n FROM run_urls WHERE run_id = ? GROUP BY status", (run_id,)
+            )
+        }
+    finally:
+        conn.close()
+    run["active"] = run_id in _active
+    return run
+
+
+def get_run_report(run_id: str) -> Optional[dict]:
+    """Performance report of a run (live for executing runs)."""
+    with _active_lock:
+        run = _active.get(run_id)
+    if run is not None:
+        return run.metrics.report()
+    init_db()
+    conn = _get_conn()
+    row = conn.execute("SELECT metrics FROM run_metrics WHERE run_id = ?", (run_id,)).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    return RunMetrics(run_id, json.loads(row["metrics"]), live=False).report()
+
+
+def cancel_run(run_id: str) -> bool:
+    """
+    Cancels a run: an executing run stops at its next checkpoint, an
+    interrupted one is marked cancelled so it is never resumed.
+    """
+    init_db()
+    with _active_lock:
+        run = _active.get(run_id)
+    if run is not None:
+        run.cancel()
+        return True
+    conn = _get_conn()
+    cur = conn.execute(
+        "UPDATE runs SET status = 'cancelled', updated_at = ? WHERE run_id = ? AND status IN ('running', 'interrupted')",
+        (time.time(), run_id)
+    )
+    conn.commit()
+    conn.close()
+    return cur.rowcount > 0
+
+
+if __name__ == "__main__":
+    init_db()
+    print("Collection run DB initialized at", DB_PATH)
@@ -240,6 +240,9 @@ from typing import List, Dict
 import feedparser
 from urllib.parse import urljoin, urlparse
 import logging
+import socket
+import time
+import math
 
 # use local LLM (no API token required)
 from langchain_core.prompts import PromptTemplate
@@ -248,21 +251,76 @@ from rag.llm import LocalLLM
 logger = logging.getLogger(__name__)
 
 
+_llm = None
+
+CLEAN_PROMPT = PromptTemplate(
+    input_variables=["raw"],
+    template=(
+        "You are a helpful text-cleaner. Input is raw extracted news HTML text "
+        "that may contain nav, ads, captions, timestamps, and broken sentences.\n\n"
+        "Produce a clean output with two fields:\n\n"
+        "TITLE: <a concise title or empty if none>\n\n"
+        "CONTENT: <cleaned article content, full sentences, no ads, "
+        "no 'read more' fragments>\n\n"
+        "Only output the TITLE and CONTENT blocks.\n\n"
+        "RAW:\n{raw}\n\nCLEAN OUTPUT:"
+    ),
+)
+
+SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template=(
+        "Summarize this news article in two sentences.\n\n"
+        "ARTICLE:\n{text}\n\nSUMMARY:"
+    ),
+)
+
+
 def _get_llm():
     """
     Returns a local HuggingFace LLM.
     Model is downloaded and cached locally (no API token needed).
+    Built once per process; the pipeline itself is cached in rag.llm.
     """
-    return LocalLLM(model_name="google/flan-t5-base", max_length=512)
+    global _llm
+    if _llm is None:
+        _llm = LocalLLM(model_name="google/flan-t5-base", max_length=512)
+    return _llm
 
 
-def fetch_url(url: str, timeout: int = 10) -> str:
+def fetch_url(url: str, timeout: int = 10, metrics=None) -> str:
+    """
+    GET a page. With run metrics, the first lookup of each host is timed
+    as the dns stage and every request is recorded per domain.
+    """
     headers = {
         "User-Agent": "Mozilla/5.0 (compatible; GenAI-Scraper/1.0; +https://example.com/bot)"
     }
-    resp = requests.get(url, headers=headers, timeout=timeout)
-    resp.raise_for_status()
-    return resp.text
+    if metrics is None:
+        resp = requests.get(url, headers=headers, timeout=timeout)
+        resp.raise_for_status()
+        return resp.text
+
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    if host and metrics.needs_dns_timing(host):
+        start = time.perf_counter()
+        try:
+            socket.getaddrinfo(host, parsed.port or (443 if parsed.scheme == "https" else 80))
+        except OSError:
+            pass
+        metrics.observe("dns", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    nbytes, ok = 0, False
+    try:
+        resp = requests.get(url, headers=headers, timeout=timeout)
+        nbytes = len(resp.content)
+        resp.raise_for_status()
+        ok = True
+        return resp.text
+    finally:
+        metrics.observe_fetch(host, time.perf_counter() - start, nbytes, ok)
 
 
 def parse_rss_feed(feed_url: str, limit: int = 10) -> List[str]:
@@ -285,13 +343,13 @@ def parse_rss_feed(feed_url: str, limit: int = 10) -> List[str]:
         return []
 
 
-def discover_article_links(homepage_url: str, limit: int = 10) -> List[str]:
+def discover_article_links(homepage_url: str, limit: int = 10, metrics=None) -> List[str]:
     """
     Discover article links from a homepage.
     Returns list of article URLs.
     """
     try:
-        html = fetch_url(homepage_url)
+        html = fetch_url(homepage_url, metrics=metrics)
         soup = BeautifulSoup(html, "html.parser")
 
         article_urls = set()
@@ -447,6 +505,23 @@ def extract_main_text_from_html(html: str) -> str:
     return body.get_text(separator="\n", strip=True) if body else ""
 
 
+PUBLISHED_META = ("article:published_time", "og:published_time", "datePublished", "pubdate", "date")
+
+
+def extract_published_ts(soup) -> float:
+    """Publish time from the page's meta/<time> tags (epoch seconds), NaN if absent."""
+    from rag.metadata_index import to_timestamp
+    for name in PUBLISHED_META:
+        tag = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name}) \
+            or soup.find("meta", attrs={"itemprop": name})
+        if tag and tag.get("content"):
+            ts = to_timestamp(tag["content"].strip())
+            if not math.isnan(ts):
+                return ts
+    tag = soup.find("time", attrs={"datetime": True})
+    return to_timestamp(tag["datetime"].strip()) if tag else float("nan")
+
+
 def _call_llm(llm, prompt_text: str) -> str:
     try:
         return llm.invoke(prompt_text)
@@ -460,26 +535,7 @@ def _call_llm(llm, prompt_text: str) -> str:
                 return ""
 
 
-def clean_text_with_llm(raw_text: str) -> Dict[str, str]:
-    llm = _get_llm()
-
-    prompt = PromptTemplate(
-        input_variables=["raw"],
-        template=(
-            "You are a helpful text-cleaner. Input is raw extracted news HTML text "
-            "that may contain nav, ads, captions, timestamps, and broken sentences.\n\n"
-            "Produce a clean output with two fields:\n\n"
-            "TITLE: <a concise title or empty if none>\n\n"
-            "CONTENT: <cleaned article content, full sentences, no ads, "
-            "no 'read more' fragments>\n\n"
-            "Only output the TITLE and CONTENT blocks.\n\n"
-            "RAW:\n{raw}\n\nCLEAN OUTPUT:"
-        ),
-    )
-
-    prompt_text = prompt.format(raw=raw_text)
-    raw_resp = _call_llm(llm, prompt_text) or ""
-
+def parse_clean_output(raw_resp: str) -> Dict[str, str]:
     title = ""
     content = raw_resp.strip()
 
@@ -494,3 +550,9 @@ def clean_text_with_llm(raw_text: str) -> Dict[str, str]:
 
     return {"title": title, "content": content}
 
+
+def clean_text_with_llm(raw_text: str) -> Dict[str, str]:
+    llm = _get_llm()
+    prompt_text = CLEAN_PROMPT.format(raw=raw_text)
+    raw_resp = _call_llm(llm, prompt_text) or ""
+    return parse_clean_output(raw_resp)
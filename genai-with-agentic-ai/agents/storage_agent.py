@@ -1,98 +1,121 @@
 """
 storage_agent.py
-Checks length, duplicate via embeddings + vectordb, and LLM quick check.
+Cascaded article validation, cheapest stage first:
+
+1. heuristics        - length and spam/structure checks
+2. hash_dedupe       - MinHash/LSH near-duplicate lookup (no embedding)
+3. embedding_dedupe  - cosine against the batch and the index, using the
+                       same vector that is later persisted
+4. llm_check         - optional LLM verdict, only for borderline similarity
+
+Per-stage rejection counts are kept in-process (get_validation_stats).
 """
 
 from rag.embedder import get_embedding_model
-from rag.vectordb import get_vector_db
+from rag.vectordb import LEAD_ROWS, get_vector_db, top1_by_vectors
 from langchain_core.prompts import PromptTemplate
 from rag.llm import LocalLLM
+from collections import Counter
 import math
+import os
+import threading
 import numpy as np
 
 MIN_WORDS = 60
 DUPLICATE_SIMILARITY_THRESHOLD = 0.85  # cosine threshold
 
+# Similarity band below the threshold where an LLM may break the tie
+BORDERLINE_SIMILARITY = 0.75
+
+# Stage 4 costs a generation per borderline article; off unless asked for
+LLM_CHECK_ENABLED = os.getenv("VALIDATION_LLM_CHECK", "0") == "1"
+
+VALIDATION_STAGES = ("heuristics", "hash_dedupe", "embedding_dedupe", "llm_check")
+
+_llm = None
+_stats = Counter()
+_stats_lock = threading.Lock()
+
 def _get_llm():
-    return LocalLLM(model_name="google/flan-t5-base", max_length=256)
+    global _llm
+    if _llm is None:
+        _llm = LocalLLM(model_name="google/flan-t5-base", max_length=256)
+    return _llm
+
+def _record(key: str, n: int = 1):
+    with _stats_lock:
+        _stats[key] += n
+
+def get_validation_stats() -> dict:
+    """Counts since process start: checked/approved and rejections per stage."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    return {
+        "checked": snapshot.get("checked", 0),
+        "approved": snapshot.get("approved", 0),
+        "rejected": {stage: snapshot.get(f"rejected:{stage}", 0) for stage in VALIDATION_STAGES},
+        "llm_calls": snapshot.get("llm_calls", 0),
+    }
+
+def reset_validation_stats():
+    with _stats_lock:
+        _stats.clear()
 
 def is_long_enough(text: str) -> bool:
     words = text.split()
     return len(words) >= MIN_WORDS
 
-def _cosine(a, b):
-    a = np.array(a, dtype=float)
-    b = np.array(b, dtype=float)
-    if a.size == 0 or b.size == 0:
-        return 0.0
-    denom = (np.linalg.norm(a) * np.linalg.norm(b))
-    return float(np.dot(a, b) / denom) if denom != 0 else 0.0
+def _normalize_rows(vectors) -> np.ndarray:
+    X = np.asarray(vectors, dtype=np.float32)
+    if X.ndim == 1:
+        X = X[None, :]
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
 
-def is_duplicate(text: str) -> (bool, float):
-    embedding_model = get_embedding_model()
-    vectordb = get_vector_db()
+def semantic_dedupe_batch(vectors, index_sims=None,
+                          threshold: float = DUPLICATE_SIMILARITY_THRESHOLD) -> dict:
+    """
+    Batch-level semantic dedupe over embeddings that were already computed.
 
-    try:
-        emb = embedding_model.embed_documents([text])[0]
-    except Exception:
-        # fallback: some embedding wrappers provide embed_query
-        try:
-            emb = embedding_model.embed_query(text)
-        except Exception:
-            return (False, 0.0)
+    vectors: (n, d) article vectors of one collection batch
+    index_sims: (n,) top-1 similarity of each vector against the existing
+                index (see rag.vectordb.top1_by_vectors), or None
 
-    try:
-        # try high-level search_by_vector API
-        results = None
-        try:
-            results = vectordb.similarity_search_by_vector(emb, k=1)
-        except Exception:
-            # fallback: some chroma wrappers expose _collection.query or similar
-            try:
-                # low-level query; may return dicts
-                results = vectordb._collection.query(  # type: ignore[attr-defined]
-                    query_embeddings=[emb],
-                    n_results=1,
-                    include=["metadatas", "distances", "documents"],
-                )
-                # results format differs; compute sim from distances if available
-            except Exception:
-                results = None
-
-        if results:
-            # Try to extract similarity score conservatively
-            # If high-level returned Document objects:
-            if isinstance(results, list) and len(results) > 0:
-                neighbor = results[0]
-                score = getattr(neighbor, "score", None) or getattr(neighbor, "distance", None)
-                if score is not None:
-                    # convert distance -> similarity if needed (many return distance)
-                    sim = float(score)
-                    # if distance style (bigger=bad), ensure threshold logic handles it; we conservatively treat high numbers as low sim
-                    if sim > 1.5:  # heuristic distance >1 usually means low similarity
-                        sim = 0.0
-                else:
-                    sim = 0.0
-            elif isinstance(results, dict):
-                # low-level chroma-like response
-                try:
-                    distances = results.get("distances", [[]])[0]
-                    if distances:
-                        # convert to similarity via 1 / (1 + dist) heuristic (conservative)
-                        sim = 1.0 / (1.0 + float(distances[0]))
-                    else:
-                        sim = 0.0
-                except Exception:
-                    sim = 0.0
-            else:
-                sim = 0.0
-        else:
-            sim = 0.0
+    The intra-batch similarity matrix is one matrix product. Articles are
+    kept in batch order: an article is dropped when it matches the index
+    or an earlier article that was itself kept.
 
-    except Exception:
-        sim = 0.0
+    Returns {"keep": bool (n,), "duplicate_of": int (n,) batch index or -1,
+             "scores": float (n,) best similarity found}
+    """
+    X = _normalize_rows(vectors)
+    n = X.shape[0]
+    keep = np.ones(n, dtype=bool)
+    duplicate_of = np.full(n, -1, dtype=np.int64)
+    scores = np.zeros(n, dtype=np.float32)
+    if n == 0:
+        return {"keep": keep, "duplicate_of": duplicate_of, "scores": scores}
+
+    if index_sims is not None:
+        index_sims = np.asarray(index_sims, dtype=np.float32)
+        scores = np.maximum(scores, index_sims)
+        keep &= index_sims < threshold
+
+    sims = X @ X.T
+    # only compare against earlier articles
+    sims[np.tril_indices(n)] = -1.0
+    for i in range(n):
+        if not keep[i]:
+            continue
+        hits = np.nonzero(sims[i] >= threshold)[0]
+        hits = hits[keep[hits]]
+        if hits.size:
+            keep[hits] = False
+            duplicate_of[hits] = i
+            scores[hits] = np.maximum(scores[hits], sims[i, hits])
 
-    return (sim >= DUPLICATE_SIMILARITY_THRESHOLD, sim)
+    return {"keep": keep, "duplicate_of": duplicate_of, "scores": scores}
 
 def llm_validate_relevance(text: str) -> dict:
     """
@@ -130,16 +153,132 @@ def llm_validate_relevance(text: str) -> dict:
     out["comment"] = f"Valid article with {len(sentences)} sentences"
     return out
 
-def validate_article(text: str) -> dict:
-    length_ok = is_long_enough(text)
-    dup, dup_score = is_duplicate(text)
-    llm_check = llm_validate_relevance(text)
-    final = "approve" if (length_ok and (not dup) and llm_check.get("relevant", False) and llm_check.get("safe", True)) else "reject"
+def llm_confirms_duplicate(text: str, other: str) -> bool:
+    """
+    Stage 4: asks the LLM whether two texts report the same story.
+    """
+    _record("llm_calls")
+    prompt = PromptTemplate(
+        input_variables=["a", "b"],
+        template=(
+            "Do these two news texts report the same story? Answer yes or no.\n\n"
+            "A: {a}\n\nB: {b}\n\nAnswer:"
+        ),
+    )
+    try:
+        answer = _get_llm().invoke(prompt.format(a=text[:600], b=other[:600]))
+    except Exception:
+        return False
+    return answer.strip().lower().startswith("yes")
 
-    return {
+def _decision(stage=None, reason=None, **extra) -> dict:
+    out = {"passed": stage is None, "stage": stage, "reason": reason}
+    out.update(extra)
+    return out
+
+def precheck_article(text: str, minhash=None) -> dict:
+    """
+    Stages 1-2, run before any embedding work.
+
+    Returns a decision dict; on success it carries the MinHash
+    "signature" so the caller can index it after the write.
+    """
+    _record("checked")
+
+    if not is_long_enough(text):
+        _record("rejected:heuristics")
+        return _decision("heuristics", "too_short")
+
+    relevance = llm_validate_relevance(text)
+    if not relevance.get("relevant", False) or not relevance.get("safe", True):
+        _record("rejected:heuristics")
+        return _decision("heuristics", relevance.get("comment"))
+
+    if minhash is None:
+        from agents.minhash_index import get_minhash_index
+        minhash = get_minhash_index()
+    signature = minhash.signature(text)
+    match, score = minhash.query(signature)
+    if score >= minhash.threshold:
+        _record("rejected:hash_dedupe")
+        return _decision("hash_dedupe", "near_duplicate",
+                         duplicate_of=match, dup_score=score)
+
+    return _decision(signature=signature)
+
+def check_embedding_batch(texts, vectors, vectordb=None) -> list:
+    """
+    Stages 3-4 for a batch whose vectors were already computed for the
+    write. Returns one decision dict per article, in order.
+    """
+    n = len(texts)
+    if n == 0:
+        return []
+
+    # Leads against leads: a later chunk quoting the same wire copy is not a duplicate
+    index_sims, index_metas = top1_by_vectors(vectordb or get_vector_db(), vectors, where=LEAD_ROWS)
+    dedupe = semantic_dedupe_batch(vectors, index_sims)
+
+    decisions = []
+    for i in range(n):
+        score = float(dedupe["scores"][i])
+        j = int(dedupe["duplicate_of"][i])
+        # duplicate_of: stored article ID; batch_index: earlier article of this batch
+        if j >= 0:
+            match = {"duplicate_of": None, "batch_index": j}
+            other_text = texts[j]
+        else:
+            meta = index_metas[i] or {}
+            match = {"duplicate_of": meta.get("parent_id") or meta.get("id"), "batch_index": None}
+            other_text = f"{meta.get('title', '')}. {meta.get('excerpt', '')}"
+
+        if not dedupe["keep"][i]:
+            _record("rejected:embedding_dedupe")
+            decisions.append(_decision("embedding_dedupe", "semantic_duplicate",
+                                       dup_score=score, **match))
+            continue
+
+        best = max(score, float(index_sims[i]))
+        if LLM_CHECK_ENABLED and best >= BORDERLINE_SIMILARITY and llm_confirms_duplicate(texts[i], other_text):
+            _record("rejected:llm_check")
+            decisions.append(_decision("llm_check", "llm_duplicate",
+                                       dup_score=best, **match))
+            continue
+
+        _record("approved")
+        decisions.append(_decision(dup_score=best))
+
+    return decisions
+
+def validate_article(text: str, embedding=None, vectordb=None) -> dict:
+    """
+    Full cascade for one article. Stops at the first failing stage and
+    only embeds the text if the cheap stages pass and no embedding was
+    supplied.
+    """
+    pre = precheck_article(text)
+    length_ok = pre["stage"] != "heuristics" or pre["reason"] != "too_short"
+    out = {
         "length_ok": length_ok,
-        "is_duplicate": dup,
-        "dup_score": dup_score,
-        "llm_check": llm_check,
-        "final_decision": final
+        "is_duplicate": False,
+        "dup_score": 0.0,
+        "stage": pre["stage"],
+        "reason": pre["reason"],
+        "final_decision": "reject",
     }
+    if not pre["passed"]:
+        out["is_duplicate"] = pre["stage"] == "hash_dedupe"
+        out["dup_score"] = pre.get("dup_score", 0.0)
+        return out
+
+    if embedding is None:
+        embedding = get_embedding_model().embed_query(text)
+    decision = check_embedding_batch([text], [embedding], vectordb=vectordb)[0]
+    out.update({
+        "is_duplicate": not decision["passed"],
+        "dup_score": decision.get("dup_score", 0.0),
+        "stage": decision["stage"],
+        "reason": decision["reason"],
+        "final_decision": "approve" if decision["passed"] else "reject",
+    })
+    return out
@@ -0,0 +1,319 @@
+"""
+story_clusters.py
+Online story clustering and trending scores, maintained at ingest.
+
+Every stored article's lead-chunk vector is matched against the story
+centroids (one matrix product per batch); it joins the closest story
+above STORY_SIMILARITY or starts a new one. A story trends when it is
+picked up by more distinct sources in the recent window than in the one
+before it, so one outlet republishing itself does not count.
+
+Events are stamped with the article's publish time, not the ingest
+time, so a backfilled or late-scraped article lands in the window it was
+published in. Scores are recomputed after each ingest batch, when the
+isTrending flags on stored rows are synced too; trending() only reads
+the list computed then, so the endpoint and the flags always agree.
+"""
+
+import os
+import json
+import threading
+import logging
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORY_SIMILARITY = 0.6      # cosine to a story centroid to join it
+WINDOW_HOURS = 6.0          # velocity window (recent vs. previous)
+RETENTION_HOURS = 72.0      # stories idle for longer are dropped
+TRENDING_SIZE = 10
+MAX_ARTICLES_PER_STORY = 5  # snapshots kept for the trending list
+
+
+def source_domain(url: str) -> str:
+    netloc = urlparse(url or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def trending_score(events, now: float, window_hours: float = WINDOW_HOURS) -> float:
+    """
+    Score from distinct-source growth: sources seen in the last window,
+    boosted by how much that beats the window before. Single-source
+    stories score zero.
+    """
+    w = window_hours * 3600.0
+    recent = {d for ts, d in events if ts >= now - w}
+    previous = {d for ts, d in events if now - 2 * w <= ts < now - w}
+    if len(recent) < 2:
+        return 0.0
+    growth = max(len(recent) - len(previous), 0) / max(len(previous), 1)
+    return len(recent) * (1.0 + growth)
+
+
+def article_snapshot(article_id: str, metadata: dict, content: str) -> dict:
+    """API-shaped article for the trending list (no full body)."""
+    from agents.keyword_tagger import parse_tags
+    excerpt = metadata.get("excerpt") or content[:300]
+    return {
+        "id": article_id,
+        "_id": article_id,
+        "title": metadata.get("title", ""),
+        "excerpt": excerpt,
+        "content": excerpt,
+        "imageUrl": metadata.get("imageUrl", f"https://picsum.photos/seed/{article_id}/800/600"),
+        "author": metadata.get("author", "AI News Agent"),
+        "publishDate": metadata.get("publishDate"),
+        "readTime": max(1, len(content.split()) // 200),
+        "category": metadata.get("category", "General"),
+        "tags": parse_tags(metadata.get("tags")),
+        "source": metadata.get("source", ""),
+        "isFeatured": 0,
+    }
+
+
+def sync_trending_flags(vectordb, before, after) -> None:
+    """Sets isTrending on the stored rows of articles entering/leaving the list."""
+    from rag.vectordb import get_article_rows, update_rows
+    changes = {a: "1" for a in set(after) - set(before)}
+    changes.update({a: "0" for a in set(before) - set(after)})
+    if not changes:
+        return
+    ids, metas = get_article_rows(vectordb, list(changes))
+    for meta in metas:
+        meta["isTrending"] = changes.get(meta.get("parent_id") or meta.get("id"), meta.get("isTrending", "0"))
+    if ids:
+        update_rows(vectordb, ids, metadatas=metas)
+
+
+class StoryClusterer:
+    """
+    Story centroids (running sums of normalized vectors) plus, per story,
+    the (timestamp, source domain) timeline and recent article snapshots.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = STORY_SIMILARITY):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._sums = np.zeros((0, 0), dtype=np.float32)
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self._stories: List[dict] = []       # row i of _sums <-> _stories[i]
+        self._next_id = 0
+        self._trending: List[dict] = []
+        self._mtime = None
+        if path and os.path.exists(path + ".npz"):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._stories)
+
+    # ------------------------------------------------------------------
+    # Assignment
+    # ------------------------------------------------------------------
+    def _new_story_locked(self, vector: np.ndarray, now: float) -> int:
+        if self._sums.shape[0] == 0:
+            self._sums = vector[None, :].copy()
+        else:
+            self._sums = np.vstack([self._sums, vector[None, :]])
+        self._stories.append({
+            "id": self._next_id,
+            "created": now,
+            "last_seen": now,
+            "count": 0,
+            "events": [],
+            "articles": [],
+        })
+        self._next_id += 1
+        return len(self._stories) - 1
+
+    def _refresh_centroids_locked(self) -> None:
+        norms = np.linalg.norm(self._sums, axis=1, keepdims=True)
+        self._centroids = self._sums / np.maximum(norms, 1e-12)
+
+    def assign_batch(self, vectors, articles: List[dict], now: float,
+                     timestamps: Optional[List[float]] = None) -> List[int]:
+        """
+        Adds a batch of stored articles. `articles` are the API-shaped
+        snapshots (need "id" and "source"); `timestamps` are their publish
+        times (epoch seconds, capped at `now`; `now` when missing).
+        Returns the story ID per article.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if timestamps is None:
+            timestamps = [None] * len(articles)
+        with self._lock:
+            existing = len(self._stories)
+            # One product against the pre-batch centroids ...
+            sims = vectors @ self._centroids.T if existing else np.zeros((len(vectors), 0), dtype=np.float32)
+            story_ids = []
+            for i, (vec, article, ts) in enumerate(zip(vectors, articles, timestamps)):
+                ts = now if ts is None else min(float(ts), now)
+                best, best_sim = -1, -1.0
+                if existing:
+                    best = int(sims[i].argmax())
+                    best_sim = float(sims[i, best])
+                # ... plus the few stories opened earlier in this batch
+                if len(self._stories) > existing:
+                    fresh = self._sums[existing:]
+                    fresh = fresh / np.maximum(np.linalg.norm(fresh, axis=1, keepdims=True), 1e-12)
+                    fresh_sims = fresh @ vec
+                    j = int(fresh_sims.argmax())
+                    if fresh_sims[j] > best_sim:
+                        best, best_sim = existing + j, float(fresh_sims[j])
+
+                if best < 0 or best_sim < self.threshold:
+                    best = self._new_story_locked(vec, ts)
+                else:
+                    self._sums[best] += vec
+
+                story = self._stories[best]
+                story["count"] += 1
+                story["last_seen"] = max(story["last_seen"], ts)
+                story["events"].append((ts, source_domain(article.get("source", ""))))
+                story["articles"] = (story["articles"] + [article])[-MAX_ARTICLES_PER_STORY:]
+                story_ids.append(story["id"])
+
+            self._refresh_centroids_locked()
+            self._rescore_locked(now)
+            return story_ids
+
+    # ------------------------------------------------------------------
+    # Trending
+    # ------------------------------------------------------------------
+    def _rescore_locked(self, now: float) -> None:
+        # Drop stories idle past retention, then score only those whose
+        # velocity windows are still open
+        keep = [i for i, s in enumerate(self._stories) if now - s["last_seen"] <= RETENTION_HOURS * 3600]
+        if len(keep) != len(self._stories):
+            self._stories = [self._stories[i] for i in keep]
+            self._sums = self._sums[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+            self._refresh_centroids_locked()
+
+        horizon = now - 2 * WINDOW_HOURS * 3600
+        scored = []
+        for story in self._stories:
+            story["events"] = [e for e in story["events"] if e[0] >= horizon]
+            if not story["articles"] or story["last_seen"] < horizon:
+                continue
+            score = trending_score(story["events"], now)
+            if score > 0:
+                scored.append((score, story))
+        scored.sort(key=lambda pair: (pair[0], pair[1]["last_seen"]), reverse=True)
+
+        trending = []
+        for score, story in scored[:TRENDING_SIZE]:
+            article = dict(story["articles"][-1])
+            article.update({
+                "isTrending": 1,
+                "trendingScore": round(score, 3),
+                "storyId": story["id"],
+                "storySize": story["count"],
+                "storySources": len({d for _, d in story["events"]}),
+            })
+            trending.append(article)
+        self._trending = trending
+
+    def trending(self, limit: int = TRENDING_SIZE) -> List[dict]:
+        """
+        Trending list precomputed at ingest (reloaded if another process
+        saved a newer one).
+        """
+        if self.path:
+            try:
+                mtime = os.path.getmtime(self.path + ".json")
+                if self._mtime is None or mtime > self._mtime:
+                    self.load()
+            except OSError:
+                pass
+        with self._lock:
+            return self._trending[:limit]
+
+    def trending_ids(self) -> List[str]:
+        return [a["id"] for a in self._trending]
+
+    def forget_articles(self, article_ids=None) -> None:
+        """
+        Drops article snapshots (the articles were deleted; all of them
+        unless article_ids is given) but keeps the centroids and source
+        timelines, so velocity carries over refreshes.
+        """
+        with self._lock:
+            if article_ids is None:
+                for story in self._stories:
+                    story["articles"] = []
+                self._trending = []
+                return
+            gone = set(article_ids)
+            for story in self._stories:
+                story["articles"] = [a for a in story["articles"] if a["id"] not in gone]
+            self._trending = [a for a in self._trending if a["id"] not in gone]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sums = np.zeros((0, 0), dtype=np.float32)
+            self._centroids = np.zeros((0, 0), dtype=np.float32)
+            self._stories = []
+            self._trending = []
+    
+    # ------------------------------------------------------------------
+    # Persistence (<path>.npz for centroids, <path>.json for the rest)
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            sums = self._sums.copy()
+            state = {
+                "next_id": self._next_id,
+                "stories": self._stories,
+                "trending": self._trending,
+            }
+            payload = json.dumps(state)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        np.savez(self.path + ".tmp.npz", sums=sums)
+        os.replace(self.path + ".tmp.npz", self.path + ".npz")
+        with open(self.path + ".json.tmp", "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+        self._mtime = os.path.getmtime(self.path + ".json")
+
+    def load(self) -> None:
+        try:
+            sums = np.load(self.path + ".npz", allow_pickle=False)["sums"]
+            with open(self.path + ".json", "r", encoding="utf-8") as f:
+                state = json.load(f)
+            mtime = os.path.getmtime(self.path + ".json")
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load story clusters {self.path}: {e}")
+            return
+        if len(sums) != len(state.get("stories", [])):
+            logger.warning("⚠️  Story cluster files out of sync, starting empty")
+            return
+        with self._lock:
+            self._sums = sums.astype(np.float32)
+            self._stories = state["stories"]
+            for story in self._stories:
+                story["events"] = [tuple(e) for e in story["events"]]
+            self._next_id = state.get("next_id", len(self._stories))
+            self._trending = state.get("trending", [])
+            if len(self._sums):
+                self._refresh_centroids_locked()
+            self._mtime = mtime
+
+
+_clusterer = None
+_clusterer_lock = threading.Lock()
+
+
+def get_story_clusterer() -> StoryClusterer:
+    """Process-wide story clusters persisted alongside the vector store."""
+    global _clusterer
+    if _clusterer is None:
+        with _clusterer_lock:
+            if _clusterer is None:
+                from rag.vectordb import CHROMA_DIR
+                _clusterer = StoryClusterer(path=os.path.join(CHROMA_DIR, "story_clusters"))
+    return _clusterer
@@ -8,96 +8,238 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.scraper_agent import fetch_url, extract_main_text_from_html, clean_text_with_llm
-from agents.storage_agent import validate_article
-from rag.vectordb import get_vector_db
-from rag.embedder import get_embedding_model
-from langchain_core.documents import Document
+from agents.scraper_agent import fetch_url, extract_main_text_from_html, extract_published_ts, clean_text_with_llm
+from agents.storage_agent import precheck_article, check_embedding_batch
+from rag.vectordb import get_vector_db, reset_vector_db
+from rag.chunk_index import index_articles, embed_articles, write_articles
+from agents.minhash_index import get_minhash_index
+from rag.bm25_index import get_bm25_index
+from agents.enrichment_queue import ENRICHMENT_ENABLED, get_enrichment_queue
+from agents.keyword_tagger import get_keyword_tagger, TAG_SEPARATOR
+from rag.category_classifier import get_category_classifier, assign_categories
+from agents.story_clusters import get_story_clusterer, article_snapshot, sync_trending_flags, source_domain
+from agents.run_checkpoint import start_run, CollectionRun, RunCancelled
+from agents.ingest_metrics import RunMetrics, stage_timer
+from typing import Optional
+from typing import List
+import numpy as np
 import uuid
+import time
 from cache.build_news_cache import build_news_cache
 from datetime import datetime
 
-def ingest_url(url: str, category: str = "General") -> dict:
+# Articles are chunked to the embedding window, so the whole body is
+# indexed; this only guards against pathological pages.
+MAX_CONTENT_CHARS = 20000
+
+def prepare_article(url: str, category: str = "General", metrics: Optional[RunMetrics] = None):
+    """
+    Fetch, extract and gate one article without embedding it.
+
+    Returns (result, article). article is None when the URL was rejected;
+    otherwise it is ready for store_articles.
+    """
     result = {"url": url, "status": "error", "reason": None, "metadata": {}}
 
     try:
         # 1) Fetch HTML
-        html = fetch_url(url)
+        html = fetch_url(url, metrics=metrics)
 
-        # 2) Extract main text heuristically
-        raw_text = extract_main_text_from_html(html)
-        if not raw_text or len(raw_text) < 200:
-            result["status"] = "error"
-            result["reason"] = "no_text_extracted"
-            return result
-
-        # 3) Extract title from HTML (simple extraction)
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, "html.parser")
-        title_tag = soup.find("title") or soup.find("h1")
-        title = title_tag.get_text(strip=True) if title_tag else url.split("/")[-1]
+        with stage_timer(metrics, "parse"):
+            # 2) Extract main text heuristically
+            raw_text = extract_main_text_from_html(html)
+            if not raw_text or len(raw_text) < 200:
+                result["status"] = "error"
+                result["reason"] = "no_text_extracted"
+                return result, None
+
+            # 3) Extract title from HTML (simple extraction)
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(html, "html.parser")
+            title_tag = soup.find("title") or soup.find("h1")
+            title = title_tag.get_text(strip=True) if title_tag else url.split("/")[-1]
+
+            # Page publish time when declared (story velocity is measured
+            # in publish time); otherwise the time it was scraped
+            now = time.time()
+            published = extract_published_ts(soup)
+            published = now if np.isnan(published) else min(published, now)
         
-        # Use raw text as content (skip slow LLM cleaning for now)
-        content = raw_text.strip()[:5000]  # Limit to first 5000 chars for performance
+        # Store raw text right away; LLM cleaning, title repair and the
+        # summary run later on the enrichment queue
+        content = raw_text.strip()[:MAX_CONTENT_CHARS]
         
         if len(content) < 200:
             result["status"] = "error"
             result["reason"] = "content_too_short"
-            return result
-
-        # Skip validation for speed (can re-enable later)
-        # validation = validate_article(content)
-        # if validation["final_decision"] != "approve":
-        #     result["status"] = "rejected"
-        #     result["reason"] = validation["final_decision"]
-        #     return result
-
-        # 5) Persist to vector DB with rich metadata
-        vectordb = get_vector_db()
-        embedding_model = get_embedding_model()
+            return result, None
+
+        # 4) Cheap validation stages (heuristics + MinHash dedupe) before
+        #    any embedding work; embedding stages run in store_articles
+        with stage_timer(metrics, "validate"):
+            precheck = precheck_article(content)
+        if not precheck["passed"]:
+            result["status"] = "rejected"
+            result["reason"] = precheck["reason"]
+            result["metadata"]["stage"] = precheck["stage"]
+            if precheck.get("duplicate_of"):
+                result["metadata"]["duplicate_of"] = precheck["duplicate_of"]
+                result["metadata"]["similarity"] = round(precheck["dup_score"], 3)
+            return result, None
+        signature = precheck["signature"]
 
         # Generate article ID and prepare metadata
         article_id = str(uuid.uuid4())
         excerpt = content[:300] + "..." if len(content) > 300 else content
         
-        # Extract potential tags from content (simple keyword extraction)
-        import re
-        words = re.findall(r'\b[A-Z][a-z]+\b', content[:500])
-        tags_list = list(set(words[:5])) if words else [category.lower()]
-        tags_str = ",".join(tags_list)  # ChromaDB needs string, not list
-        
         # Build Document with rich metadata for UI display
         metadata = {
             "id": article_id,
             "source": url,
+            "sourceDomain": source_domain(url),
             "title": title or "Untitled Article",
             "excerpt": excerpt,
             "category": category,
             "author": "AI News Agent",
-            "publishDate": datetime.now().isoformat(),
-            "tags": tags_str,  # Store as comma-separated string
+            "publishDate": datetime.fromtimestamp(published).isoformat(),
+            "publishTs": int(published),  # numeric, so range filters work in Chroma too
+            "tags": category.lower(),  # TF-IDF tags are set in store_articles
             "imageUrl": f"https://picsum.photos/seed/{article_id}/800/600",
             "isFeatured": str(0),  # Convert to string for ChromaDB
             "isTrending": str(0)   # Convert to string for ChromaDB
         }
-        
-        doc = Document(page_content=content, metadata=metadata)
 
-        # Try different add APIs depending on installed wrapper
-        add_succeeded = False
+        result["status"] = "prepared"
+        result["metadata"]["title"] = title
+        result["metadata"]["length"] = len(content.split())
+        article = {
+            "id": article_id,
+            "content": content,
+            "metadata": metadata,
+            "signature": signature,
+            "result": result,
+        }
+        return result, article
+
+    except Exception as e:
+        result["status"] = "error"
+        result["reason"] = str(e)
+        return result, None
+
+
+def store_articles(articles: List[dict], vectordb=None, metrics: Optional[RunMetrics] = None) -> List[dict]:
+    """
+    Embed, dedupe and persist a batch of prepared articles.
+
+    Chunk embeddings are computed once for the whole batch; the lead
+    chunk vector of each article is reused by the embedding stages of
+    the validator (within the batch and against the index, one
+    vectorized pass each) and the same vectors are written to the
+    store. Returns the per-article results in input order.
+    """
+    if not articles:
+        return []
+
+    vectordb = vectordb or get_vector_db()
+    results = [a["result"] for a in articles]
+
+    # 5) Chunk + embed the whole batch in one model call
+    try:
+        with stage_timer(metrics, "embed"):
+            embed_articles(articles)
+        if metrics is not None:
+            metrics.add_bytes("embed", sum(len(t.encode("utf-8")) for a in articles for t in a["chunk_texts"]))
+    except Exception as ex:
+        for r in results:
+            r["status"] = "error"
+            r["reason"] = f"embedding_failed: {ex}"
+        return results
+
+    # 6) Embedding (+ optional LLM) validation on the lead-chunk vectors
+    #    we already have; the same vectors are written below
+    lead = np.stack([a["vectors"][0] for a in articles])
+    with stage_timer(metrics, "validate"):
+        decisions = check_embedding_batch([a["content"] for a in articles], lead, vectordb=vectordb)
+
+    accepted = []
+    for article, decision in zip(articles, decisions):
+        r = article["result"]
+        if decision["passed"]:
+            accepted.append(article)
+            continue
+        r["status"] = "rejected"
+        r["reason"] = decision["reason"]
+        r["metadata"]["stage"] = decision["stage"]
+        r["metadata"]["similarity"] = round(float(decision["dup_score"]), 3)
+        if decision.get("batch_index") is not None:
+            r["metadata"]["duplicate_of"] = articles[decision["batch_index"]]["id"]
+        elif decision.get("duplicate_of"):
+            r["metadata"]["duplicate_of"] = decision["duplicate_of"]
+
+    # 7) Assign (generic feeds) or verify categories against the embedding
+    #    centroids, then refresh the centroids with the feed labels
+    if accepted:
+        classifier = get_category_classifier()
+        accepted_lead = np.stack([a["vectors"][0] for a in accepted])
+        feed_labels = [a["metadata"].get("category", "") for a in accepted]
+        routing = assign_categories(classifier, accepted_lead, feed_labels)
+        for article, route in zip(accepted, routing):
+            patch = {
+                "category": route["category"],
+                "categoryConfidence": str(route["confidence"]),
+            }
+            if route.get("predicted"):
+                patch["predictedCategory"] = route["predicted"]
+            article["metadata"].update(patch)
+            for meta in article["chunk_metadatas"]:
+                meta.update(patch)
+        classifier.update(accepted_lead, feed_labels)
+        classifier.save()
+
+    # 8) TF-IDF keyword tags for the accepted batch (one vectorized pass;
+    #    the batch is counted into the corpus document frequencies)
+    if accepted:
+        tagger = get_keyword_tagger()
+        tag_lists = tagger.tag_batch(
+            [f"{a['metadata'].get('title', '')} {a['content']}" for a in accepted]
+        )
+        for article, tags in zip(accepted, tag_lists):
+            if not tags:
+                continue
+            tags_str = TAG_SEPARATOR.join(tags)  # ChromaDB needs string, not list
+            article["metadata"]["tags"] = tags_str
+            for meta in article["chunk_metadatas"]:
+                meta["tags"] = tags_str
+        tagger.save()
+
+    # 9) Online story clustering; trending is rescored for this batch
+    now = time.time()
+    trending_before = []
+    if accepted:
+        clusterer = get_story_clusterer()
+        trending_before = clusterer.trending_ids()
+        story_ids = clusterer.assign_batch(
+            np.stack([a["vectors"][0] for a in accepted]),
+            [article_snapshot(a["id"], a["metadata"], a["content"]) for a in accepted],
+            now,
+            timestamps=[a["metadata"].get("publishTs") for a in accepted],
+        )
+        for article, story_id in zip(accepted, story_ids):
+            article["metadata"]["storyId"] = story_id
+            article["result"]["metadata"]["story_id"] = story_id
+            for meta in article["chunk_metadatas"]:
+                meta["storyId"] = story_id
+        clusterer.save()
+
+    # 10) Persist to vector DB with rich metadata
+    with stage_timer(metrics, "write"):
         try:
-            # Preferred: add_documents (many wrappers implement this)
-            vectordb.add_documents([doc])
-            add_succeeded = True
-        except Exception:
-            try:
-                # Fallback: add_texts + metadatas
-                vectordb.add_texts([content], metadatas=[doc.metadata])
-                add_succeeded = True
-            except Exception as ex:
-                result["status"] = "error"
-                result["reason"] = f"vectordb_add_failed: {ex}"
-                return result
+            write_articles(accepted, vectordb=vectordb)
+        except Exception as ex:
+            for article in accepted:
+                article["result"]["status"] = "error"
+                article["result"]["reason"] = f"vectordb_add_failed: {ex}"
+            return results
 
         # Persist DB if supported
         try:
@@ -106,15 +248,34 @@ def ingest_url(url: str, category: str = "General") -> dict:
             # some wrappers persist automatically
             pass
 
-        result["status"] = "ingested"
-        result["metadata"]["title"] = title
-        result["metadata"]["length"] = len(content.split())
-        return result
+    if accepted:
+        try:
+            sync_trending_flags(vectordb, trending_before, get_story_clusterer().trending_ids())
+        except Exception as ex:
+            logger.warning(f"⚠️  Could not update trending flags: {ex}")
 
-    except Exception as e:
-        result["status"] = "error"
-        result["reason"] = str(e)
+    minhash = get_minhash_index()
+    for article in accepted:
+        minhash.add(article["id"], article["signature"], now)
+        article["result"]["status"] = "ingested"
+        article["result"]["metadata"]["chunks"] = len(article["chunk_ids"])
+    minhash.save()
+    get_bm25_index().save()
+
+    # 11) Hand stored articles to the background LLM enrichment worker
+    if ENRICHMENT_ENABLED:
+        enrichment = get_enrichment_queue()
+        for article in accepted:
+            enrichment.enqueue(article)
+
+    return results
+
+
+def ingest_url(url: str, category: str = "General") -> dict:
+    result, article = prepare_article(url, category)
+    if article is None:
         return result
+    return store_articles([article])[0]
 """
 Automated News Collection Service
 This service automatically collects news from various sources on startup
@@ -404,10 +565,12 @@ Industry observers note this festival's approach could establish new standards f
     return sample_articles
 
 
-async def collect_from_source(source: dict, category: str, max_articles: int = 5) -> int:
+async def prepare_from_source(source: dict, category: str, max_articles: int = 5,
+                              run: Optional[CollectionRun] = None) -> List[dict]:
     """
-    Collect news from a single source (RSS or homepage discovery).
-    Returns the number of successfully collected articles.
+    Fetch and gate articles from a single source (RSS or homepage discovery)
+    without embedding them. Returns prepared articles for store_articles.
+    Article URLs the run already finished are skipped.
     """
     from agents.scraper_agent import parse_rss_feed, discover_article_links
     
@@ -418,29 +581,42 @@ async def collect_from_source(source: dict, category: str, max_articles: int = 5
         logger.info(f"📰 Processing {source_type.upper()} source: {url} ({category})")
         
         # Get article URLs based on source type
+        metrics = run.metrics if run is not None else None
         article_urls = []
-        if source_type == "rss":
-            article_urls = await asyncio.to_thread(parse_rss_feed, url, max_articles)
-        else:  # discover
-            article_urls = await asyncio.to_thread(discover_article_links, url, max_articles)
+        with stage_timer(metrics, "discover"):
+            if source_type == "rss":
+                article_urls = await asyncio.to_thread(parse_rss_feed, url, max_articles)
+            else:  # discover
+                article_urls = await asyncio.to_thread(discover_article_links, url, max_articles, metrics)
         
         if not article_urls:
             logger.warning(f"⚠️  No articles found from {url}")
-            return 0
+            return []
         
-        # Collect from each article URL
-        successful = 0
+        # Prepare each article URL (fetch + extract + MinHash gate)
+        prepared = []
         for article_url in article_urls:
+            if run is not None:
+                run.check_cancelled()
+                if run.url_done(article_url):
+                    continue
             try:
-                result = await asyncio.to_thread(ingest_url, article_url, category)
+                result, article = await asyncio.to_thread(prepare_article, article_url, category, metrics)
+                if metrics is not None:
+                    metrics.count_source(url, "prepared" if article is not None else result.get("status", "error"))
                 
-                if result.get("status") == "ingested":
-                    successful += 1
-                    logger.info(f"✅ Article collected: {article_url[:80]}...")
+                if article is not None:
+                    article["feed"] = url
+                    prepared.append(article)
                     
                     # Don't overwhelm the system
-                    if successful >= max_articles:
+                    if len(prepared) >= max_articles:
                         break
+                else:
+                    if result.get("status") == "rejected":
+                        logger.info(f"♻️  Rejected ({result.get('reason')}): {article_url[:80]}")
+                    if run is not None:
+                        run.mark_urls([result])
                         
                 await asyncio.sleep(0.5)  # Be respectful to servers
                 
@@ -448,41 +624,123 @@ async def collect_from_source(source: dict, category: str, max_articles: int = 5
                 logger.warning(f"⚠️  Failed article: {str(e)[:50]}")
                 continue
         
-        if successful > 0:
-            logger.info(f"✅ {successful} articles from {url}")
-        
-        return successful
+        return prepared
         
+    except RunCancelled:
+        raise
     except Exception as e:
         logger.error(f"❌ Error processing source {url}: {str(e)}")
+        return []
+
+
+async def store_batch(articles: List[dict], label: str, run: Optional[CollectionRun] = None) -> int:
+    """
+    Store one batch of prepared articles; returns how many were ingested.
+    """
+    if not articles:
         return 0
 
+    metrics = run.metrics if run is not None else None
+    results = await asyncio.to_thread(store_articles, articles, None, metrics)
+    if run is not None:
+        run.mark_urls(results)
+        for article, result in zip(articles, results):
+            if article.get("feed"):
+                key = "ingested" if result.get("status") == "ingested" else "dropped"
+                metrics.count_source(article["feed"], key)
+    successful = 0
+    for article, result in zip(articles, results):
+        if result.get("status") == "ingested":
+            successful += 1
+            logger.info(f"✅ Article collected: {result['url'][:80]}...")
+
+    dropped = len(articles) - successful
+    if dropped:
+        logger.info(f"♻️  {dropped} duplicate/failed articles dropped from {label}")
+    return successful
+
+
+async def collect_from_source(source: dict, category: str, max_articles: int = 5,
+                              run: Optional[CollectionRun] = None) -> int:
+    """
+    Collect news from a single source (RSS or homepage discovery).
+    Returns the number of successfully collected articles.
+    """
+    prepared = await prepare_from_source(source, category, max_articles, run=run)
+    successful = await store_batch(prepared, source.get("url"), run=run)
+    if run is not None:
+        run.mark_sources(category, {source.get("url"): successful})
+    if successful > 0:
+        logger.info(f"✅ {successful} articles from {source.get('url')}")
+    return successful
+
 
-async def collect_news_for_category(category: str, sources: List[dict], limit: int = 7) -> int:
+async def collect_news_for_category(category: str, sources: List[dict], limit: int = 7,
+                                    run: Optional[CollectionRun] = None) -> int:
     """
     Collect news for a specific category from multiple sources.
     Returns the number of successfully collected articles.
     Target: ~20 articles per category (7 sources × 3 articles = 21)
+
+    Articles from all sources of the category are stored as one batch,
+    so the same story arriving through several feeds is deduped in a
+    single vectorized pass. With a run, sources whose batch was already
+    stored are skipped and counted from the checkpoint.
     """
     logger.info(f"🔍 Collecting {category} news...")
-    total_articles = 0
+    batch = []
+    pending = []
     
     for source in sources[:limit]:  # Limit number of sources
-        count = await collect_from_source(source, category, max_articles=3)
-        total_articles += count
+        if run is not None:
+            run.check_cancelled()
+            if run.source_done(category, source.get("url")):
+                continue
+        batch.extend(await prepare_from_source(source, category, max_articles=3, run=run))
+        pending.append(source.get("url"))
         await asyncio.sleep(1)  # Be respectful to source servers
     
-    return total_articles
+    successful = await store_batch(batch, category, run=run)
+    if run is None:
+        return successful
+
+    counts = {url: 0 for url in pending}
+    for article in batch:
+        if article["result"].get("status") == "ingested":
+            counts[article["feed"]] = counts.get(article["feed"], 0) + 1
+    run.mark_sources(category, counts)
+    return run.ingested_for(category)
 
 
 def clear_old_articles():
     """
     Clear old articles from VectorDB to make room for fresh news.
     This ensures the database stays fresh and doesn't grow indefinitely.
+
+    With the segmented backend only expired daily segments are dropped
+    (and ageing ones archived); the rest of the history is kept.
     """
     try:
-        logger.info("🗑️  Clearing old articles from VectorDB...")
         vectordb = get_vector_db()
+        if hasattr(vectordb, "roll"):
+            expire_old_segments(vectordb)
+            return
+
+        logger.info("🗑️  Clearing old articles from VectorDB...")
+
+        # Near-duplicate signatures expire together with the articles
+        minhash = get_minhash_index()
+        minhash.clear()
+        minhash.save()
+        bm25 = get_bm25_index()
+        bm25.clear()
+        bm25.save()
+        # Keyword document frequencies and category centroids are corpus
+        # statistics and are kept across refreshes; story clusters keep
+        # their source timelines so trending velocity carries over
+        clusterer = get_story_clusterer()
+        clusterer.forget_articles()
+        clusterer.save()
         
         # Delete the entire collection and recreate it
         try:
@@ -497,11 +755,36 @@ def clear_old_articles():
                 shutil.rmtree(vector_store_path)
                 os.makedirs(vector_store_path)
                 logger.info("✅ VectorDB reset by removing storage directory")
+        finally:
+            # The shared handle points at the deleted collection
+            reset_vector_db()
     except Exception as e:
         logger.error(f"❌ Error clearing VectorDB: {str(e)}")
 
 
-async def auto_collect_news(quick_mode: bool = False, clear_old: bool = False) -> Dict[str, int]:
+def expire_old_segments(vectordb) -> int:
+    """
+    Rolls the segmented store and removes the dropped articles from the
+    side indexes. Returns the number of chunk rows dropped.
+    """
+    dropped = vectordb.roll()
+    if dropped:
+        article_ids = {chunk_id.split("::")[0] for chunk_id in dropped}
+        minhash = get_minhash_index()
+        minhash.remove(article_ids)
+        minhash.save()
+        bm25 = get_bm25_index()
+        bm25.delete(dropped)
+        bm25.save()
+        clusterer = get_story_clusterer()
+        clusterer.forget_articles(article_ids)
+        clusterer.save()
+    logger.info(f"✅ Expired {len(dropped)} rows from old segments")
+    return len(dropped)
+
+
+async def auto_collect_news(quick_mode: bool = False, clear_old: bool = False,
+                            run_id: Optional[str] = None) -> Dict[str, int]:
     """
     Automatically collect news from all categories using AI agents.
     
@@ -515,13 +798,19 @@ async def auto_collect_news(quick_mode: bool = False, clear_old: bool = False) -
         quick_mode: If True, collect from fewer sources (1 per category)
                    If False, collect from more sources (3 per category)
         clear_old: If True, clear old articles before collecting new ones
+        run_id: Resume this run; by default an interrupted run of the
+                same scope (quick_mode) is resumed from its checkpoint
     
     Returns:
         Dictionary with collection statistics per category
     """
-    # Clear old articles if requested
-    if clear_old:
+    run = start_run({"quick_mode": quick_mode, "clear_old": clear_old}, run_id=run_id)
+
+    # Clear old articles if requested (fresh runs only: a resumed run
+    # would wipe the articles it already stored)
+    if clear_old and not run.resumed and not run.step_done("clear_old"):
         clear_old_articles()
+        run.mark_step("clear_old")
     
     logger.info("🚀 Starting AI-powered news collection...")
     logger.info("🤖 Agent Pipeline: Manager → Scraper → Validator → VectorDB")
@@ -530,20 +819,27 @@ async def auto_collect_news(quick_mode: bool = False, clear_old: bool = False) -
     stats = {}
     limit = 3 if quick_mode else 7  # Number of sources per category (7 sources × 3 articles = ~21 per category)
     
-    # Collect from all categories concurrently
-    tasks = []
-    for category, sources in NEWS_SOURCES.items():
-        task = collect_news_for_category(category, sources, limit)
-        tasks.append((category, task))
-    
-    # Wait for all collections to complete
-    for category, task in tasks:
-        count = await task
-        stats[category] = count
-        if count > 0:
-            logger.info(f"✅ {category}: {count} articles collected successfully")
-        else:
-            logger.warning(f"⚠️  {category}: No articles collected (sources may be blocking)")
+    # Collect category by category, checkpointing as batches are stored
+    try:
+        for category, sources in NEWS_SOURCES.items():
+            count = await collect_news_for_category(category, sources, limit, run=run)
+            stats[category] = count
+            if count > 0:
+                logger.info(f"✅ {category}: {count} articles collected successfully")
+            else:
+                logger.warning(f"⚠️  {category}: No articles collected (sources may be blocking)")
+    except RunCancelled:
+        logger.warning(f"🛑 Collection run {run.run_id} cancelled")
+        run.finish("cancelled", stats)
+        return stats
+    except asyncio.CancelledError:
+        # Shutdown / reload: the run stays "running" so the next start resumes it
+        run.save_metrics()
+        run.release()
+        raise
+    except Exception:
+        run.finish("failed", stats)
+        raise
     
     total = sum(stats.values())
     if total > 0:
@@ -553,6 +849,7 @@ async def auto_collect_news(quick_mode: bool = False, clear_old: bool = False) -
     else:
         logger.error("❌ No articles collected - all sources failed or were rejected")
     
+    run.finish("completed", stats)
     return stats
 
 
@@ -562,7 +859,6 @@ def populate_with_samples():
     This ensures the UI always has content to display.
     """
     from rag.vectordb import get_vector_db
-    from langchain_core.documents import Document
     
     logger.info("📝 Populating with sample articles...")
     
@@ -575,9 +871,10 @@ def populate_with_samples():
             # Convert tags list to string for storage
             tags_str = ",".join(article["tags"]) if isinstance(article["tags"], list) else article["tags"]
             
-            doc = Document(
-                page_content=article["content"],
-                metadata={
+            documents.append({
+                "id": article["id"],
+                "content": article["content"],
+                "metadata": {
                     "id": article["id"],
                     "title": article["title"],
                     "source": article["source"],
@@ -590,17 +887,30 @@ def populate_with_samples():
                     "tags": tags_str,
                     "excerpt": article["excerpt"],
                 }
-            )
-            documents.append(doc)
+            })
         
-        # Add all documents to vectordb
-        try:
-            vectordb.add_documents(documents)
-        except Exception:
-            # Fallback method
-            texts = [doc.page_content for doc in documents]
-            metadatas = [doc.metadata for doc in documents]
-            vectordb.add_texts(texts, metadatas=metadatas)
+        # Chunk, embed and add all articles in one batch
+        vectors = index_articles(documents, vectordb=vectordb)
+
+        minhash = get_minhash_index()
+        now = time.time()
+        for article in documents:
+            minhash.add(article["id"], minhash.signature(article["content"]), now)
+        minhash.save()
+        get_bm25_index().save()
+
+        # Sample articles carry hand-written tags; they still count
+        # towards the corpus document frequencies
+        tagger = get_keyword_tagger()
+        tagger.observe([f"{a['metadata']['title']} {a['content']}" for a in documents])
+        tagger.save()
+
+        classifier = get_category_classifier()
+        classifier.update(
+            np.stack([vectors[a["id"]][0] for a in documents]),
+            [a["metadata"]["category"] for a in documents]
+        )
+        classifier.save()
         
         # Persist
         try:
@@ -4,7 +4,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from rag.rag_chain import get_rag_chain
-from rag.vectordb import get_vector_db
+from rag.vectordb import get_vector_db, has_matches
+from rag.mmr import mmr_search_articles
+from rag.embedder import get_embedding_model
+from rag.category_classifier import get_category_classifier
 from rag.llm import HuggingFaceAPILLM
 from typing import List, Optional
 import re
@@ -60,6 +63,21 @@ class ChatResponse(BaseModel):
 # Store conversation history (in production, use Redis or a database)
 conversation_memory = {}
 
+# Category keywords, matched on word boundaries (plural allowed) so that
+# "app" does not fire on "happen" or "ai" on "said"
+CATEGORY_KEYWORDS = {
+    'technology': ['tech', 'technology', 'ai', 'artificial intelligence', 'software', 'computer', 'app', 'digital'],
+    'health': ['health', 'medical', 'disease', 'medicine', 'healthcare', 'doctor', 'hospital', 'wellness'],
+    'business': ['business', 'economy', 'finance', 'market', 'stock', 'company', 'corporate'],
+    'sports': ['sport', 'athlete', 'game', 'football', 'basketball', 'tennis', 'olympic'],
+    'science': ['science', 'research', 'study', 'discovery', 'experiment', 'scientific'],
+    'entertainment': ['entertainment', 'movie', 'music', 'celebrity', 'film', 'concert', 'tv show']
+}
+_CATEGORY_PATTERNS = {
+    category: re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')s?\b')
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+
 def detect_query_type(message: str) -> tuple[str, str]:
     """
     Detect if the query is asking for:
@@ -70,19 +88,10 @@ def detect_query_type(message: str) -> tuple[str, str]:
     """
     message_lower = message.lower()
     
-    # Category detection
-    categories = {
-        'technology': ['tech', 'technology', 'ai', 'artificial intelligence', 'software', 'computer', 'app', 'digital'],
-        'health': ['health', 'medical', 'disease', 'medicine', 'healthcare', 'doctor', 'hospital', 'wellness'],
-        'business': ['business', 'economy', 'finance', 'market', 'stock', 'company', 'corporate'],
-        'sports': ['sport', 'athlete', 'game', 'football', 'basketball', 'tennis', 'olympic'],
-        'science': ['science', 'research', 'study', 'discovery', 'experiment', 'scientific'],
-        'entertainment': ['entertainment', 'movie', 'music', 'celebrity', 'film', 'concert', 'show']
-    }
-    
+    # Category detection (explicit keywords only; see route_query_category)
     detected_category = None
-    for category, keywords in categories.items():
-        if any(keyword in message_lower for keyword in keywords):
+    for category, pattern in _CATEGORY_PATTERNS.items():
+        if pattern.search(message_lower):
             detected_category = category.capitalize()
             break
     
@@ -120,6 +129,44 @@ def detect_query_type(message: str) -> tuple[str, str]:
     return query_type, detected_category
 
 
+def route_query_category(message: str, query_vector) -> Optional[str]:
+    """
+    Category filter for a query: explicit keywords first, otherwise the
+    embedding-centroid classifier (no extra model call).
+    """
+    _, category = detect_query_type(message)
+    if category:
+        return category
+    try:
+        return get_category_classifier().route(query_vector)
+    except Exception as e:
+        logger.warning(f"Category routing failed: {e}")
+        return None
+
+
+# Navigation/scraped HTML junk seen at the top of bad scrapes
+JUNK_INDICATORS = ["Latest AI Amazon Apps Biotech", "Subscribe", "Sign in", "Click here"]
+
+
+def _excerpt(content: str) -> str:
+    """First 2-3 sentences of an article, capped at 280 chars."""
+    sentences = [s.strip() + '.' for s in content.split('.') if len(s.strip()) > 30]
+    if sentences:
+        return ' '.join(sentences[:2])[:280]
+    return content[:280]
+
+
+def _usable_article(doc) -> bool:
+    """Whether a hit has a real title and enough clean text to show."""
+    title = doc.metadata.get("title", "").strip()
+    content = doc.page_content.strip()
+    if len(title) < 10 or len(content) < 100:
+        return False
+    if any(indicator in content[:150] for indicator in JUNK_INDICATORS):
+        return False
+    return len(_excerpt(content)) > 80
+
+
 @router.post("/message")
 def chat_message(chat: ChatMessage) -> ChatResponse:
     """
@@ -136,27 +183,27 @@ def chat_message(chat: ChatMessage) -> ChatResponse:
         # Get conversation history
         history = conversation_memory.get(conv_id, [])
         
-        # Detect category from query
-        _, detected_category = detect_query_type(chat.message)
+        # Embed the query once; the same vector routes and searches
+        query_vector = get_embedding_model().embed_query(chat.message)
+        detected_category = route_query_category(chat.message, query_vector)
         
         print(f"🔍 Category: {detected_category}")
         
         # Search for relevant news articles (always get 5 for display)
         search_k = 5
         
-        # Build filter for category if detected
+        # Build filter for category if detected; a category with no stored
+        # rows falls back to an unfiltered search (checked on the metadata
+        # index, so there is only ever one kNN query)
         filter_dict = None
-        if detected_category:
+        if detected_category and has_matches(vectordb, {"category": detected_category}):
             filter_dict = {"category": detected_category}
         
-        # Perform search
-        if filter_dict:
-            docs = vectordb.similarity_search(chat.message, k=search_k, filter=filter_dict)
-            # If no results with filter, try without filter
-            if not docs:
-                docs = vectordb.similarity_search(chat.message, k=search_k)
-        else:
-            docs = vectordb.similarity_search(chat.message, k=search_k)
+        # Hybrid search over a wider pool, then MMR picks distinct, readable
+        # articles (near-duplicates and per-source overflow never selected)
+        hits = mmr_search_articles(chat.message, query_vector, k=search_k, filter=filter_dict,
+                                   vectordb=vectordb, keep=_usable_article)
+        docs = [doc for doc, _ in hits]
         
         if not docs:
             answer = "I don't have any information about that topic in my current news database. Could you ask about Technology, Business, Science, Health, Sports, or Entertainment news?"
@@ -165,74 +212,29 @@ def chat_message(chat: ChatMessage) -> ChatResponse:
             # Build answer from retrieved documents
             articles_info = []
             sources = []
-            seen_titles = set()
-            seen_content = set()
-            
-            max_articles = 5  # Always show top 5 articles
             
             for doc in docs:
                 title = doc.metadata.get("title", "").strip()
                 content = doc.page_content.strip()
+                excerpt = _excerpt(content)
+                article_id = doc.metadata.get("id", "")
+                category = doc.metadata.get("category", "")
                 
-                # Skip if no meaningful title
-                if not title or len(title) < 10:
-                    continue
-                
-                # Skip duplicates by title (exact match)
-                if title in seen_titles:
-                    continue
-                
-                # Skip duplicates by content (first 150 chars as fingerprint)
-                content_fingerprint = content[:150].lower().replace(' ', '')
-                if content_fingerprint in seen_content:
-                    continue
-                
-                # Filter out navigation/scraped HTML junk
-                junk_indicators = [
-                    "Latest AI Amazon Apps Biotech",
-                    "Subscribe",
-                    "Sign in",
-                    "Click here",
-                    len(content) < 100,  # Too short
-                ]
-                
-                if any(indicator if isinstance(indicator, bool) else indicator in content[:150] 
-                       for indicator in junk_indicators):
-                    continue
-                
-                # Extract clean excerpt (first 2-3 sentences)
-                sentences = [s.strip() + '.' for s in content.split('.') if len(s.strip()) > 30]
-                if sentences:
-                    excerpt = ' '.join(sentences[:2])[:280]
-                else:
-                    excerpt = content[:280]
-                
-                # Only add if we have meaningful, unique content
-                if len(excerpt) > 80:
-                    seen_titles.add(title)
-                    seen_content.add(content_fingerprint)
-                    
-                    article_id = doc.metadata.get("id", "")
-                    category = doc.metadata.get("category", "")
-                    
-                    article_text = f"📰 **{title}**"
-                    if category:
-                        article_text += f" _{category}_"
-                    article_text += f"\n\n{excerpt}"
-                    if not excerpt.endswith('.'):
-                        article_text += "..."
-                    
-                    articles_info.append({
-                        'formatted': article_text,
-                        'title': title,
-                        'content': content,
-                        'category': category
-                    })
-                    # Store article ID instead of external source URL
-                    sources.append(f"/article/{article_id}" if article_id else "Unknown")
+                article_text = f"📰 **{title}**"
+                if category:
+                    article_text += f" _{category}_"
+                article_text += f"\n\n{excerpt}"
+                if not excerpt.endswith('.'):
+                    article_text += "..."
                 
-                if len(articles_info) >= max_articles:
-                    break
+                articles_info.append({
+                    'formatted': article_text,
+                    'title': title,
+                    'content': content,
+                    'category': category
+                })
+                # Store article ID instead of external source URL
+                sources.append(f"/article/{article_id}" if article_id else "Unknown")
             
             # Generate answer - ALWAYS use Analytical Mode with LLM reasoning
             if not articles_info:
@@ -254,10 +254,16 @@ from typing import List, Optional
 from datetime import datetime
 import json
 import uuid
+import time
 import os
 
-# VectorDB ONLY for semantic search
-from rag.vectordb import get_vector_db
+# VectorDB + BM25 for search (hybrid chunk index, one hit per article)
+from rag.bm25_index import hybrid_search_articles
+from rag.embedder import get_embedding_model
+from rag.vectordb import get_vector_db, has_matches
+from rag.category_classifier import get_category_classifier
+from agents.keyword_tagger import parse_tags
+from agents.story_clusters import get_story_clusterer
 
 router = APIRouter(prefix="/news", tags=["News"])
 
@@ -318,11 +324,16 @@ def get_featured_article():
 
 
 # --------------------------------------------------
-# TRENDING ARTICLES (FAST — JSON ONLY)
+# TRENDING ARTICLES (FAST — PRECOMPUTED AT INGEST)
 # --------------------------------------------------
 @router.get("/trending")
 def get_trending_articles(limit: int = Query(3, ge=1, le=10)):
     try:
+        trending = get_story_clusterer().trending(limit)
+        if trending:
+            return trending
+
+        # No multi-source stories yet: fall back to the cache flags
         data = read_cache()
         articles = data.get("articles", [])
 
@@ -337,13 +348,31 @@ def get_trending_articles(limit: int = Query(3, ge=1, le=10)):
 # SEMANTIC SEARCH (VECTOR DB — CORRECT USAGE)
 # --------------------------------------------------
 @router.get("/search")
-def search_articles(q: str = Query(..., min_length=1)):
+def search_articles(
+    q: str = Query(..., min_length=1),
+    hours: Optional[int] = Query(None, ge=1, le=24 * 365)
+):
     try:
-        vectordb = get_vector_db()
-        docs = vectordb.similarity_search(q, k=20)
+        # One query embedding: the same vector routes and searches
+        k = 20
+        query_vector = get_embedding_model().embed_query(q)
+        category = get_category_classifier().route(query_vector)
+
+        # "Last N hours": a publishTs range, which the segmented backend
+        # answers from the day segments it touches
+        since = {"publishTs": {"$gte": int(time.time()) - hours * 3600}} if hours else None
+
+        # A confidently routed query is searched within its category; a
+        # category with no stored rows falls back to the unfiltered search
+        where = since
+        if category:
+            routed = {"$and": [since, {"category": category}]} if since else {"category": category}
+            if has_matches(get_vector_db(), routed):
+                where = routed
+        hits = hybrid_search_articles(q, query_vector, k=k, filter=where)
 
         articles = []
-        for doc in docs:
+        for doc, score in hits:
             metadata = doc.metadata
             content = doc.page_content
 
@@ -366,8 +395,9 @@ def search_articles(q: str = Query(..., min_length=1)):
                 ),
                 "readTime": estimate_read_time(content),
                 "category": metadata.get("category", "General"),
-                "tags": metadata.get("tags", []),
-                "source": metadata.get("source", "")
+                "tags": parse_tags(metadata.get("tags")),
+                "source": metadata.get("source", ""),
+                "relevance": round(score, 3)
             }
             articles.append(article)
 
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Query
 from app.rag.vectordb import get_vector_db
 from app.rag.rag_chain import get_rag_chain
+from agents.keyword_tagger import parse_tags
+from rag.chunk_index import SEARCH_OVERSAMPLE
 from typing import List, Optional
 import uuid
 from datetime import datetime
@@ -20,9 +22,9 @@ def fetch_news(
     try:
         vectordb = get_vector_db()
         
-        # Get all documents from the collection
+        # Get all articles from the collection (lead chunk = one row per article)
         collection = vectordb._collection
-        results = collection.get(include=["metadatas", "documents"])
+        results = collection.get(where={"chunk_index": 0}, include=["metadatas", "documents"])
         
         # Extract documents and metadatas
         all_docs = results.get("documents", [])
@@ -38,13 +40,6 @@ def fetch_news(
             title = metadata.get("title", doc_content[:100] + "...")
             excerpt = doc_content[:300] + "..." if len(doc_content) > 300 else doc_content
             
-            # Handle tags - convert from string if needed
-            tags_data = metadata.get("tags", [])
-            if isinstance(tags_data, str):
-                tags = tags_data.split(",") if tags_data else []
-            else:
-                tags = tags_data if tags_data else []
-            
             article = {
                 "id": article_id,
                 "_id": article_id,
@@ -56,7 +51,7 @@ def fetch_news(
                 "publishDate": metadata.get("publishDate", datetime.now().isoformat()),
                 "readTime": estimate_read_time(doc_content),
                 "category": metadata.get("category", "General"),
-                "tags": tags,
+                "tags": parse_tags(metadata.get("tags")),
                 "source": metadata.get("source", "https://news.example.com"),
                 "isFeatured": metadata.get("isFeatured", 0),
                 "isTrending": metadata.get("isTrending", 0)
@@ -81,7 +76,7 @@ def get_featured_article():
     try:
         vectordb = get_vector_db()
         collection = vectordb._collection
-        results = collection.get(include=["metadatas", "documents"], limit=1)
+        results = collection.get(where={"chunk_index": 0}, include=["metadatas", "documents"], limit=1)
         
         docs = results.get("documents", [])
         metadatas = results.get("metadatas", [])
@@ -106,7 +101,7 @@ def get_featured_article():
             "publishDate": metadata.get("publishDate", datetime.now().isoformat()),
             "readTime": estimate_read_time(content),
             "category": metadata.get("category", "General"),
-            "tags": metadata.get("tags", []),
+            "tags": parse_tags(metadata.get("tags")),
             "source": metadata.get("source", ""),
             "isFeatured": 1,
             "isTrending": 0
@@ -126,7 +121,7 @@ def get_trending_articles(limit: int = Query(3, ge=1, le=10)):
     try:
         vectordb = get_vector_db()
         collection = vectordb._collection
-        results = collection.get(include=["metadatas", "documents"], limit=limit)
+        results = collection.get(where={"chunk_index": 0}, include=["metadatas", "documents"], limit=limit)
         
         docs = results.get("documents", [])
         metadatas = results.get("metadatas", [])
@@ -147,7 +142,7 @@ def get_trending_articles(limit: int = Query(3, ge=1, le=10)):
                 "publishDate": metadata.get("publishDate", datetime.now().isoformat()),
                 "readTime": estimate_read_time(content),
                 "category": metadata.get("category", "General"),
-                "tags": metadata.get("tags", []),
+                "tags": parse_tags(metadata.get("tags")),
                 "source": metadata.get("source", ""),
                 "isFeatured": 0,
                 "isTrending": 1
@@ -167,10 +162,19 @@ def search_articles(q: str = Query(..., min_length=1)):
     """
     try:
         vectordb = get_vector_db()
-        docs = vectordb.similarity_search(q, k=20)
+        # Chunk hits, folded to one result per article
+        k = 20
+        docs = vectordb.similarity_search(q, k=k * SEARCH_OVERSAMPLE)
         
         articles = []
+        seen = set()
         for doc in docs:
+            parent = doc.metadata.get("parent_id") or doc.metadata.get("id")
+            if parent in seen:
+                continue
+            seen.add(parent)
+            if len(articles) >= k:
+                break
             metadata = doc.metadata
             content = doc.page_content
             
@@ -188,7 +192,7 @@ def search_articles(q: str = Query(..., min_length=1)):
                 "publishDate": metadata.get("publishDate", datetime.now().isoformat()),
                 "readTime": estimate_read_time(content),
                 "category": infer_category(content, title),
-                "tags": extract_tags(content),
+                "tags": parse_tags(metadata.get("tags")),
                 "source": metadata.get("source", "")
             }
             articles.append(article)
@@ -226,22 +230,3 @@ def infer_category(content: str, title: str) -> str:
     else:
         return "General"
 
-
-def extract_tags(content: str) -> List[str]:
-    """Extract relevant tags from content"""
-    # Simple keyword extraction - can be enhanced with NLP
-    common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by"}
-    
-    words = content.lower().split()
-    word_freq = {}
-    
-    for word in words:
-        word = word.strip(".,!?;:")
-        if len(word) > 4 and word not in common_words:
-            word_freq[word] = word_freq.get(word, 0) + 1
-    
-    # Get top 5 words
-    sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-    tags = [word for word, _ in sorted_words[:5]]
-    
-    return tags if tags else ["news", "latest"]
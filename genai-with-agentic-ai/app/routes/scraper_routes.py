@@ -4,6 +4,10 @@ sys.path.insert(0, '/workspaces/ML-Powered-AI-News-Platform/genai-with-agentic-a
 from scraper.fetcher import scrape_single
 from scraper.cleaner import run_cron_job
 from agents.supervisor_agent import auto_collect_news, populate_with_samples
+from agents.storage_agent import get_validation_stats
+from agents.enrichment_queue import get_enrichment_queue
+from agents.run_checkpoint import list_runs, get_run, get_run_report, cancel_run, get_last_run_id
+from typing import Optional
 import asyncio
 
 router = APIRouter(prefix="/scraper", tags=["Scraper"])
@@ -17,22 +21,24 @@ def cron_run():
     return run_cron_job()
 
 @router.post("/collect-news")
-async def collect_news_now(quick_mode: bool = True, clear_old: bool = False):
+async def collect_news_now(quick_mode: bool = True, clear_old: bool = False, run_id: Optional[str] = None):
     """
     Manually trigger news collection from all sources.
     
     Args:
         quick_mode: If True, collect fewer articles (faster)
         clear_old: If True, clear old articles before collecting new ones
+        run_id: Resume a specific interrupted run from its checkpoint
     """
     try:
-        stats = await auto_collect_news(quick_mode=quick_mode, clear_old=clear_old)
+        stats = await auto_collect_news(quick_mode=quick_mode, clear_old=clear_old, run_id=run_id)
         total = sum(stats.values())
         return {
             "status": "success",
             "message": f"Collected {total} articles",
             "details": stats,
-            "cleared_old": clear_old
+            "cleared_old": clear_old,
+            "run_id": get_last_run_id()
         }
     except Exception as e:
         return {
@@ -52,7 +58,8 @@ async def refresh_all_news():
         return {
             "status": "success",
             "message": f"Database refreshed with {total} fresh articles",
-            "details": stats
+            "details": stats,
+            "run_id": get_last_run_id()
         }
     except Exception as e:
         return {
@@ -78,3 +85,60 @@ def populate_sample_articles():
             "status": "error",
             "message": str(e)
         }
+
+@router.get("/validation-stats")
+def validation_stats():
+    """
+    Per-stage rejection counts of the ingest validator since startup.
+    """
+    return get_validation_stats()
+
+
+@router.get("/enrichment-stats")
+def enrichment_stats():
+    """
+    Background LLM enrichment counters and current queue depth.
+    """
+    return get_enrichment_queue().get_stats()
+
+
+@router.get("/runs")
+def collection_runs(limit: int = Query(20, ge=1, le=200)):
+    """
+    Recent collection runs, newest first.
+    """
+    return list_runs(limit)
+
+
+@router.get("/runs/{run_id}")
+def collection_run(run_id: str):
+    """
+    One run with its completed sources and per-status article counts.
+    """
+    run = get_run(run_id)
+    if run is None:
+        return {"status": "error", "message": f"Run {run_id} not found"}
+    return run
+
+
+@router.get("/runs/{run_id}/report")
+def collection_run_report(run_id: str):
+    """
+    Performance report of a run: stage time breakdown (p50/p95 per
+    stage), slowest hosts, bytes and articles/sec.
+    """
+    report = get_run_report(run_id)
+    if report is None:
+        return {"status": "error", "message": f"No metrics for run {run_id}"}
+    return report
+
+
+@router.post("/runs/{run_id}/cancel")
+def cancel_collection_run(run_id: str):
+    """
+    Cancel a run. An executing run stops at its next checkpoint; an
+    interrupted run is marked cancelled and will not be resumed.
+    """
+    if cancel_run(run_id):
+        return {"status": "success", "message": f"Run {run_id} cancelled"}
+    return {"status": "error", "message": f"Run {run_id} is not running"}
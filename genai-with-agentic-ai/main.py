@@ -94,6 +94,7 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import asyncio
 import logging
 import sys
@@ -141,6 +142,8 @@ from agents.supervisor_agent import (
     initialize_news_collection,
     periodic_news_collection
 )
+from rag.model_lifecycle import get_model_lifecycle
+from agents.enrichment_queue import ENRICHMENT_ENABLED, get_enrichment_queue
 
 # -----------------------------
 # CORE PIPELINE (NO CONFUSION)
@@ -170,6 +173,13 @@ async def collect_news_and_build_cache():
 async def startup_event():
     logger.info("🚀 GenAI News Service starting...")
 
+    # Load + warm up models in the background; /ready reports when done
+    get_model_lifecycle().start()
+
+    # Resume LLM enrichment left pending by the previous process
+    if ENRICHMENT_ENABLED:
+        get_enrichment_queue()
+
     # First run immediately
     asyncio.create_task(collect_news_and_build_cache())
 
@@ -188,3 +198,12 @@ def home():
         "status": "GenAI Service Running",
         "features": ["Scraper", "VectorDB", "JSON Cache", "Fast UI"]
     }
+
+
+# -----------------------------
+# READINESS CHECK
+# -----------------------------
+@app.get("/ready")
+def ready():
+    status = get_model_lifecycle().status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
@@ -0,0 +1,151 @@
+"""
+autotune.py
+-----------
+Per-host tuning of embedding threads and batch size.
+
+CPU throughput of the embedder depends on the intra-op thread count and
+on how many texts go into one forward pass, and the best pair differs by
+node shape. `python rag/autotune.py` embeds a sample of the stored
+chunks under every (threads, batch size) combination, keeps the fastest
+and saves it under this host's key in embedding_tuning.json;
+rag/embedder.py reads that entry when it loads the model.
+
+The host key combines CPU count, architecture, CPU model and backend
+(no hostname), so one tuning file is shared by every node of the same
+shape: replicas and rescheduled containers reuse the entry instead of
+falling back to defaults.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import logging
+import platform
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TUNING_PATH = os.getenv("EMBEDDING_TUNING_PATH", os.path.join(PROJECT_ROOT, "embedding_tuning.json"))
+
+DEFAULT_SAMPLES = 512
+BATCH_OPTIONS = (8, 16, 32, 64, 128)
+
+
+def cpu_model() -> str:
+    """CPU model name (/proc/cpuinfo on Linux), "" when unknown."""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.lower().startswith("model name"):
+                    return " ".join(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return platform.processor() or ""
+
+
+def host_key(backend: str) -> str:
+    return f"{os.cpu_count()}cpu|{platform.machine()}|{cpu_model()}|{backend}"
+
+
+def thread_options(cpus: Optional[int] = None) -> List[int]:
+    cpus = cpus or os.cpu_count() or 1
+    options, n = [], 1
+    while n < cpus:
+        options.append(n)
+        n *= 2
+    return options + [cpus]
+
+
+def _load_file(path: str = None) -> dict:
+    try:
+        with open(path or TUNING_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_host_tuning(backend: str, path: str = None) -> dict:
+    """Saved {"threads", "batch_size", ...} for this host, or {}."""
+    return _load_file(path).get(host_key(backend), {})
+
+
+def save_host_tuning(backend: str, tuning: dict, path: str = None) -> None:
+    path = path or TUNING_PATH
+    data = _load_file(path)
+    data[host_key(backend)] = tuning
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+def sample_texts(n: int = DEFAULT_SAMPLES) -> List[str]:
+    """Stored chunk texts (the real length mix), else synthetic ones."""
+    try:
+        from rag.vectordb import get_vector_db
+        rows = get_vector_db()._collection.get(limit=n, include=["documents"])
+        texts = [t for t in rows.get("documents") or [] if t]
+        if len(texts) >= min(n, 64):
+            return texts
+    except Exception as e:
+        logger.warning(f"⚠️  Could not sample the corpus, using synthetic texts: {e}")
+    words = "markets election policy team season research climate court company launch".split()
+    return [" ".join(words[(i + j) % len(words)] for j in range(8 + (i * 37) % 220)) for i in range(n)]
+
+
+def _throughput(model, texts: List[str]) -> float:
+    model.embed_documents(texts[:16])   # warm this configuration
+    start = time.perf_counter()
+    model.embed_documents(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def benchmark(texts: List[str], backend: str, threads: List[int] = None,
+              batch_sizes=BATCH_OPTIONS) -> List[Dict]:
+    """texts/sec for every (threads, batch size) pair."""
+    from rag.embedder import build_embedding_backend
+    from rag.length_buckets import LengthBucketedEmbeddings
+
+    results = []
+    base = None
+    for t in threads or thread_options():
+        if backend == "onnx":
+            # ONNX fixes its thread pool per session
+            base = build_embedding_backend(backend, threads=t)
+        else:
+            import torch
+            base = base or build_embedding_backend(backend)
+            torch.set_num_threads(t)
+        for b in batch_sizes:
+            if backend == "onnx":
+                base.batch_size = b
+            else:
+                base.encode_kwargs["batch_size"] = b
+            rate = _throughput(LengthBucketedEmbeddings(base, bucket_size=b), texts)
+            results.append({"threads": t, "batch_size": b, "texts_per_sec": round(rate, 1)})
+            logger.info(f"⏱️  threads={t:<3d} batch={b:<4d} {rate:8.1f} texts/s")
+    return results
+
+
+def autotune(backend: str = None, samples: int = DEFAULT_SAMPLES, path: str = None) -> dict:
+    from rag.embedder import EMBEDDING_BACKEND
+    backend = backend or EMBEDDING_BACKEND
+    results = benchmark(sample_texts(samples), backend)
+    best = max(results, key=lambda r: r["texts_per_sec"])
+    tuning = {**best, "tuned_at": time.time(), "samples": samples, "results": results}
+    save_host_tuning(backend, tuning, path)
+    logger.info(f"✅ {host_key(backend)}: threads={best['threads']} batch={best['batch_size']} "
+                f"({best['texts_per_sec']} texts/s)")
+    return tuning
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SAMPLES
+    autotune(samples=samples)
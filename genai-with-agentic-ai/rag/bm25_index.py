@@ -0,0 +1,361 @@
+"""
+bm25_index.py
+-------------
+Incremental BM25 inverted index over the stored chunks, and hybrid
+(lexical + dense) article search.
+
+MiniLM similarity is weak on exact names: tickers, player names, bill
+numbers. Every chunk written through rag.chunk_index.write_articles is
+also tokenized into this index. Postings are compact per-term arrays
+(int32 doc numbers, uint16 term counts) appended in place. Rewritten or
+deleted chunks are tombstoned; save() drops them once they pass a quarter
+of the index. Each doc's term numbers are kept in one flat forward array
+so a tombstone also decrements its terms' document frequencies: IDF is
+computed over live docs only.
+
+hybrid_search_articles() fuses the dense kNN ranking with the BM25
+ranking by reciprocal-rank fusion (sum of 1 / (RRF_K + rank)) and returns
+each article's cosine similarity, not its RRF value. On large
+corpora (HYBRID_PRUNE_MIN_DOCS chunks and up) the dense side skips the
+full kNN: only the top lexical candidates are re-scored against the
+query vector, unless BM25 finds nothing.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import re
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+K1 = 1.2
+B = 0.75
+RRF_K = 60
+COMPACT_DEAD_FRACTION = 0.25
+HYBRID_PRUNE_MIN_DOCS = int(os.getenv("HYBRID_PRUNE_MIN_DOCS", "50000"))
+PRUNE_CANDIDATES = 200   # lexical candidates re-scored densely when pruning
+
+# Keep digits and short tokens: tickers, bill numbers and scores matter here
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his in is it its of on
+or she that the their they this to was were will with
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def rrf_fuse(rankings: List[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Reciprocal-rank fusion of several ranked id lists, best first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    Chunk id -> doc number, per-term postings and per-doc lengths.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset_locked()
+        if path and os.path.exists(path):
+            self.load()
+
+    def _reset_locked(self) -> None:
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._post_docs: List[array] = []
+        self._post_tfs: List[array] = []
+        self._ids: List[str] = []
+        self._doc_of: Dict[str, int] = {}
+        self._doc_len = array("I")
+        self._alive = bytearray()
+        self._total_len = 0
+        # Live document frequency per term; doc d's terms are
+        # _fwd[_fwd_off[d]:_fwd_off[d + 1]]
+        self._df = array("I")
+        self._fwd = array("i")
+        self._fwd_off = array("q", [0])
+
+    def _derive_locked(self) -> None:
+        """Rebuilds the forward array and live dfs from the postings."""
+        n_docs = len(self._ids)
+        lengths = np.fromiter((len(p) for p in self._post_docs), dtype=np.int64, count=len(self._post_docs))
+        docs = np.frombuffer(b"".join(p.tobytes() for p in self._post_docs), dtype=np.int32)
+        terms = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+        order = np.argsort(docs, kind="stable")
+        counts = np.bincount(docs, minlength=n_docs)
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8)
+        df = np.bincount(terms, weights=alive[docs], minlength=len(lengths))
+        self._fwd = array("i", terms[order].tobytes())
+        self._fwd_off = array("q", np.concatenate([[0], np.cumsum(counts)]).astype(np.int64).tobytes())
+        self._df = array("I", df.astype(np.uint32).tobytes())
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        """Indexes chunks; an id that is already indexed is replaced."""
+        with self._lock:
+            for chunk_id, text in zip(ids, texts):
+                old = self._doc_of.get(chunk_id)
+                if old is not None:
+                    self._drop_locked(old)
+                tokens = tokenize(text)
+                doc = len(self._ids)
+                self._ids.append(chunk_id)
+                self._doc_of[chunk_id] = doc
+                self._doc_len.append(len(tokens))
+                self._alive.append(1)
+                self._total_len += len(tokens)
+                counts: Dict[str, int] = {}
+                for t in tokens:
+                    counts[t] = counts.get(t, 0) + 1
+                for t, c in counts.items():
+                    term = self._vocab.get(t)
+                    if term is None:
+                        term = len(self._terms)
+                        self._vocab[t] = term
+                        self._terms.append(t)
+                        self._post_docs.append(array("i"))
+                        self._post_tfs.append(array("H"))
+                        self._df.append(0)
+                    self._post_docs[term].append(doc)
+                    self._post_tfs[term].append(min(c, 65535))
+                    self._df[term] += 1
+                    self._fwd.append(term)
+                self._fwd_off.append(len(self._fwd))
+
+    def _drop_locked(self, doc: int) -> None:
+        self._alive[doc] = 0
+        self._total_len -= self._doc_len[doc]
+        self._doc_of.pop(self._ids[doc], None)
+        for term in self._fwd[self._fwd_off[doc]:self._fwd_off[doc + 1]]:
+            self._df[term] -= 1
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                doc = self._doc_of.get(chunk_id)
+                if doc is not None:
+                    self._drop_locked(doc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset_locked()
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def compact(self) -> None:
+        """Drops tombstoned docs from the postings and renumbers the rest."""
+        with self._lock:
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+            remap = np.full(len(alive), -1, dtype=np.int64)
+            remap[alive] = np.arange(int(alive.sum()))
+            ids = [chunk_id for chunk_id, keep in zip(self._ids, alive) if keep]
+            doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)[alive].copy()
+
+            terms, post_docs, post_tfs = [], [], []
+            for term, docs, tfs in zip(self._terms, self._post_docs, self._post_tfs):
+                d = np.frombuffer(docs, dtype=np.int32)
+                keep = alive[d]
+                if not keep.any():
+                    continue
+                terms.append(term)
+                post_docs.append(array("i", remap[d[keep]].astype(np.int32).tobytes()))
+                post_tfs.append(array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()))
+                del d, keep
+
+            self._terms = terms
+            self._vocab = {t: i for i, t in enumerate(terms)}
+            self._post_docs, self._post_tfs = post_docs, post_tfs
+            self._ids = ids
+            self._doc_of = {chunk_id: i for i, chunk_id in enumerate(ids)}
+            self._doc_len = array("I", doc_len.tobytes())
+            self._alive = bytearray(b"\x01" * len(ids))
+            self._total_len = int(doc_len.sum())
+            self._derive_locked()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, BM25 score) for a free-text query."""
+        with self._lock:
+            n_docs = len(self._ids)
+            live = len(self._doc_of)
+            terms = [self._vocab[t] for t in set(tokenize(query)) if t in self._vocab]
+            terms = [term for term in terms if self._df[term]]
+            if not terms or not live:
+                return []
+            avgdl = max(self._total_len / live, 1.0)
+            doc_len = np.frombuffer(self._doc_len, dtype=np.uint32)
+            scores = np.zeros(n_docs, dtype=np.float32)
+            for term in terms:
+                docs = np.frombuffer(self._post_docs[term], dtype=np.int32)
+                tfs = np.frombuffer(self._post_tfs[term], dtype=np.uint16).astype(np.float32)
+                df = self._df[term]
+                idf = np.log(1.0 + (live - df + 0.5) / (df + 0.5))
+                norm = K1 * (1.0 - B + B * doc_len[docs] / avgdl)
+                scores[docs] += idf * tfs * (K1 + 1.0) / (tfs + norm)
+                del docs, tfs
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8)
+            scores[alive == 0] = 0.0
+            del doc_len
+            ids = self._ids
+
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(ids[d], float(scores[d])) for d in hits]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        if not self.path:
+            return
+        if len(self._ids) and 1.0 - len(self._doc_of) / len(self._ids) > COMPACT_DEAD_FRACTION:
+            self.compact()
+        with self._lock:
+            lengths = np.fromiter((len(p) for p in self._post_docs), dtype=np.int64, count=len(self._post_docs))
+            offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            docs = np.frombuffer(b"".join(p.tobytes() for p in self._post_docs), dtype=np.int32)
+            tfs = np.frombuffer(b"".join(p.tobytes() for p in self._post_tfs), dtype=np.uint16)
+            payload = {
+                "terms": np.array(self._terms, dtype=str),
+                "offsets": offsets,
+                "docs": docs,
+                "tfs": tfs,
+                "ids": np.array(self._ids, dtype=str),
+                "doc_len": np.frombuffer(self._doc_len, dtype=np.uint32).copy(),
+                "alive": np.frombuffer(bytes(self._alive), dtype=np.uint8).copy(),
+            }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, **payload)
+        os.replace(tmp, self.path)
+
+    def load(self) -> None:
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            terms, offsets = data["terms"], data["offsets"]
+            docs, tfs = data["docs"].astype(np.int32), data["tfs"].astype(np.uint16)
+            ids, doc_len, alive = data["ids"], data["doc_len"].astype(np.uint32), data["alive"].astype(np.uint8)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load BM25 index {self.path}: {e}")
+            return
+        with self._lock:
+            self._terms = [str(t) for t in terms]
+            self._vocab = {t: i for i, t in enumerate(self._terms)}
+            self._post_docs = [array("i", docs[lo:hi].tobytes()) for lo, hi in zip(offsets[:-1], offsets[1:])]
+            self._post_tfs = [array("H", tfs[lo:hi].tobytes()) for lo, hi in zip(offsets[:-1], offsets[1:])]
+            self._ids = [str(i) for i in ids]
+            self._alive = bytearray(alive.tobytes())
+            self._doc_of = {chunk_id: d for d, chunk_id in enumerate(self._ids) if self._alive[d]}
+            self._doc_len = array("I", doc_len.tobytes())
+            self._total_len = int(doc_len[alive.astype(bool)].sum())
+            self._derive_locked()
+
+
+_bm25 = None
+_bm25_lock = threading.Lock()
+
+
+def get_bm25_index() -> BM25Index:
+    """Process-wide BM25 index persisted alongside the vector store."""
+    global _bm25
+    if _bm25 is None:
+        with _bm25_lock:
+            if _bm25 is None:
+                from rag.vectordb import CHROMA_DIR
+                _bm25 = BM25Index(path=os.path.join(CHROMA_DIR, "bm25_index.npz"))
+    return _bm25
+
+
+# ----------------------------------------------------------------------
+# Hybrid search
+# ----------------------------------------------------------------------
+def hybrid_search_articles(query: str, query_vector, k: int = 5, filter: Optional[dict] = None,
+                           vectordb=None, prune: Optional[bool] = None) -> List[Tuple[object, float]]:
+    """
+    Dense + BM25 chunk rankings fused by RRF, folded into k articles.
+    Returns (Document, cosine similarity) pairs in fused order, best
+    first; the similarity is that of the article's representative chunk.
+    """
+    from langchain_core.documents import Document
+    from rag.chunk_index import SEARCH_OVERSAMPLE
+    from rag.numpy_store import matches_where
+    from rag.vectordb import fetch_rows, get_vector_db, search_by_vector
+
+    vectordb = vectordb or get_vector_db()
+    bm25 = get_bm25_index()
+    depth = k * SEARCH_OVERSAMPLE
+    if prune is None:
+        prune = len(bm25) >= HYBRID_PRUNE_MIN_DOCS
+
+    lexical = [chunk_id for chunk_id, _ in bm25.search(query, PRUNE_CANDIDATES if prune else depth)]
+    docs: Dict[str, Document] = {}
+    cosine: Dict[str, float] = {}
+    q = np.asarray(query_vector, dtype=np.float32)
+    q = q / (np.linalg.norm(q) + 1e-12)
+
+    if prune and lexical:
+        # Dense ranking over the lexical candidates only
+        rows = fetch_rows(vectordb, lexical, ["documents", "metadatas", "embeddings"])
+        lexical = [c for c in lexical if c in rows and matches_where(rows[c]["metadatas"] or {}, filter)]
+        if lexical:
+            vectors = np.asarray([rows[c]["embeddings"] for c in lexical], dtype=np.float32)
+            sims = vectors @ q / (np.linalg.norm(vectors, axis=1) + 1e-12)
+            dense = [lexical[i] for i in np.argsort(-sims, kind="stable")[:depth]]
+            for c, sim in zip(lexical, sims):
+                docs[c] = Document(page_content=rows[c]["documents"], metadata=rows[c]["metadatas"] or {}, id=c)
+                cosine[c] = float(sim)
+            lexical = lexical[:depth]
+        else:
+            dense = []
+    else:
+        dense = []
+        for doc, sim in search_by_vector(vectordb, query_vector, k=depth, filter=filter):
+            chunk_id = doc.id or f"{doc.metadata.get('parent_id')}::{doc.metadata.get('chunk_index', 0)}"
+            docs[chunk_id] = doc
+            cosine[chunk_id] = float(sim)
+            dense.append(chunk_id)
+        missing = [c for c in lexical if c not in docs]
+        rows = fetch_rows(vectordb, missing, ["documents", "metadatas", "embeddings"]) if missing else {}
+        for c, row in rows.items():
+            if matches_where(row["metadatas"] or {}, filter):
+                docs[c] = Document(page_content=row["documents"], metadata=row["metadatas"] or {}, id=c)
+                v = np.asarray(row["embeddings"], dtype=np.float32)
+                cosine[c] = float(v @ q / (np.linalg.norm(v) + 1e-12))
+        lexical = [c for c in lexical if c in docs]
+
+    # Fused order, one representative chunk per article (its best-fused
+    # chunk). RRF values only encode rank (~1/60), so the score reported
+    # is the chunk's cosine similarity.
+    hits, seen = [], set()
+    for c, _ in rrf_fuse([dense, lexical]):
+        if c not in docs:
+            continue
+        parent = docs[c].metadata.get("parent_id") or docs[c].metadata.get("id") or c
+        if parent not in seen:
+            seen.add(parent)
+            hits.append((docs[c], cosine[c]))
+    return hits[:k]
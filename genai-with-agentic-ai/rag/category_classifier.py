@@ -0,0 +1,256 @@
+"""
+category_classifier.py
+----------------------
+Nearest-centroid category classifier over the MiniLM embeddings.
+
+Each category keeps a running sum and count of the lead-chunk vectors
+of its articles, so centroids are refreshed incrementally on ingest
+without re-reading the corpus. Classification is one (n, d) x (d, C)
+product against the normalized centroids, which makes it free for any
+caller that already holds an embedding (ingest validation, chat and
+search queries).
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Feed labels that carry no topical signal; articles with these are
+# assigned a category instead of training the centroids
+GENERIC_CATEGORIES = {"", "General"}
+
+# Query routing thresholds, picked with tune_thresholds on held-out
+# labelled leads (run this module as a script to re-tune on the store).
+# Below them a query is left unrouted and searched across categories.
+MIN_SIMILARITY = 0.4    # cosine to the best centroid
+MIN_MARGIN = 0.08       # best minus runner-up
+VERIFY_MARGIN = 0.05    # margin needed to flag a feed label as doubtful
+
+
+class CentroidClassifier:
+    """
+    Per-category running sums of normalized vectors.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        if path and os.path.exists(path):
+            self.load()
+
+    @property
+    def labels(self) -> List[str]:
+        return sorted(self._sums)
+
+    def __len__(self) -> int:
+        return sum(self._counts.values())
+
+    def update(self, vectors, labels: List[str]) -> int:
+        """Adds labelled vectors; generic labels are skipped. Returns count used."""
+        vectors = np.asarray(vectors, dtype=np.float64)
+        used = 0
+        with self._lock:
+            for vec, label in zip(vectors, labels):
+                if not label or label in GENERIC_CATEGORIES:
+                    continue
+                if label not in self._sums:
+                    self._sums[label] = np.zeros(vectors.shape[1], dtype=np.float64)
+                    self._counts[label] = 0
+                self._sums[label] += vec
+                self._counts[label] += 1
+                used += 1
+            if used:
+                self._matrix = None
+        return used
+
+    def _centroids(self) -> Tuple[List[str], np.ndarray]:
+        with self._lock:
+            if self._matrix is None:
+                labels = sorted(self._sums)
+                if labels:
+                    m = np.stack([self._sums[l] for l in labels]).astype(np.float32)
+                    m /= np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+                else:
+                    m = np.zeros((0, 0), dtype=np.float32)
+                self._matrix = (labels, m)
+            return self._matrix
+
+    def predict(self, vectors) -> Tuple[List[Optional[str]], np.ndarray, np.ndarray]:
+        """
+        Returns (labels, similarity, margin) for each row of `vectors`.
+        Labels are None when no centroids exist yet.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        labels, m = self._centroids()
+        n = len(vectors)
+        if not labels:
+            return [None] * n, np.zeros(n, dtype=np.float32), np.zeros(n, dtype=np.float32)
+
+        sims = vectors @ m.T
+        best = sims.argmax(axis=1)
+        top = sims[np.arange(n), best]
+        if len(labels) > 1:
+            runner_up = np.partition(sims, -2, axis=1)[:, -2]
+        else:
+            runner_up = np.zeros(n, dtype=np.float32)
+        return [labels[i] for i in best], top, top - runner_up
+
+    def route(self, vector) -> Optional[str]:
+        """Category for a query vector, or None when the match is not confident."""
+        labels, sims, margins = self.predict(vector)
+        if labels[0] is None or sims[0] < MIN_SIMILARITY or margins[0] < MIN_MARGIN:
+            return None
+        return labels[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sums.clear()
+            self._counts.clear()
+            self._matrix = None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            labels = sorted(self._sums)
+            sums = (np.stack([self._sums[l] for l in labels])
+                    if labels else np.zeros((0, 0), dtype=np.float64))
+            counts = np.array([self._counts[l] for l in labels], dtype=np.int64)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, labels=np.array(labels, dtype=str), sums=sums, counts=counts)
+        os.replace(tmp, self.path)
+
+    def load(self) -> None:
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            labels, sums, counts = data["labels"], data["sums"], data["counts"]
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load category centroids {self.path}: {e}")
+            return
+        with self._lock:
+            self._sums = {str(l): s.astype(np.float64) for l, s in zip(labels, sums)}
+            self._counts = {str(l): int(c) for l, c in zip(labels, counts)}
+            self._matrix = None
+
+    def rebuild_from_store(self, vectordb) -> int:
+        """Recomputes centroids from the lead chunks already in the store."""
+        rows = vectordb._collection.get(
+            where={"chunk_index": 0}, include=["embeddings", "metadatas"]
+        )
+        embeddings = rows.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return 0
+        self.clear()
+        labels = [m.get("category", "") for m in rows["metadatas"]]
+        return self.update(np.asarray(embeddings, dtype=np.float32), labels)
+
+
+def tune_thresholds(classifier: CentroidClassifier, vectors, labels: List[str],
+                    min_precision: float = 0.9) -> dict:
+    """
+    Grid-searches (similarity, margin) on held-out labelled vectors.
+
+    Returns the pair routing the most queries while keeping precision of
+    the routed ones at or above `min_precision`, with its coverage and
+    precision. Falls back to the strictest pair when none qualifies.
+    """
+    predicted, sims, margins = classifier.predict(vectors)
+    keep = [i for i, l in enumerate(labels) if l and l not in GENERIC_CATEGORIES]
+    if not keep or predicted[0] is None:
+        return {"min_similarity": MIN_SIMILARITY, "min_margin": MIN_MARGIN,
+                "coverage": 0.0, "precision": 0.0}
+    correct = np.array([predicted[i] == labels[i] for i in keep])
+    sims, margins = sims[keep], margins[keep]
+
+    best = None
+    for sim_t in np.round(np.arange(0.2, 0.81, 0.05), 2):
+        for margin_t in np.round(np.arange(0.0, 0.21, 0.02), 2):
+            routed = (sims >= sim_t) & (margins >= margin_t)
+            if not routed.any():
+                continue
+            precision = float(correct[routed].mean())
+            coverage = float(routed.mean())
+            if precision < min_precision:
+                continue
+            if best is None or coverage > best["coverage"]:
+                best = {"min_similarity": float(sim_t), "min_margin": float(margin_t),
+                        "coverage": coverage, "precision": precision}
+    return best or {"min_similarity": 0.8, "min_margin": 0.2, "coverage": 0.0, "precision": 0.0}
+
+
+def assign_categories(classifier: CentroidClassifier, vectors, feed_labels: List[str]) -> List[dict]:
+    """
+    Assigns a category to generic-feed articles and verifies the rest.
+
+    Returns one dict per article with "category" (final label) and, when
+    the classifier disagrees confidently with the feed, "predicted".
+    """
+    predicted, sims, margins = classifier.predict(vectors)
+    out = []
+    for feed, label, sim, margin in zip(feed_labels, predicted, sims, margins):
+        decision = {"category": feed, "confidence": round(float(sim), 3)}
+        confident = label is not None and sim >= MIN_SIMILARITY
+        if feed in GENERIC_CATEGORIES:
+            if confident and margin >= MIN_MARGIN:
+                decision["category"] = label
+        elif confident and label != feed and margin >= VERIFY_MARGIN:
+            decision["predicted"] = label
+        out.append(decision)
+    return out
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_category_classifier() -> CentroidClassifier:
+    """
+    Process-wide classifier persisted alongside the vector store. When no
+    centroids were saved yet they are built from the labelled corpus.
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                from rag.vectordb import CHROMA_DIR, get_vector_db
+                classifier = CentroidClassifier(path=os.path.join(CHROMA_DIR, "category_centroids.npz"))
+                if not len(classifier):
+                    try:
+                        if classifier.rebuild_from_store(get_vector_db()):
+                            classifier.save()
+                            logger.info(f"🧭 Category centroids built for {classifier.labels}")
+                    except Exception as e:
+                        logger.warning(f"⚠️  Could not build category centroids: {e}")
+                _classifier = classifier
+    return _classifier
+
+
+if __name__ == "__main__":
+    # Hold out every fifth labelled lead, fit centroids on the rest and
+    # report the routing thresholds that meet the precision target
+    from rag.vectordb import get_vector_db
+
+    rows = get_vector_db()._collection.get(where={"chunk_index": 0}, include=["embeddings", "metadatas"])
+    vectors = np.asarray(rows.get("embeddings") if rows.get("embeddings") is not None else [],
+                         dtype=np.float32)
+    labels = [m.get("category", "") for m in rows["metadatas"]]
+    held_out = np.arange(len(labels)) % 5 == 0
+    classifier = CentroidClassifier()
+    classifier.update(vectors[~held_out], [l for l, h in zip(labels, held_out) if not h])
+    result = tune_thresholds(classifier, vectors[held_out], [l for l, h in zip(labels, held_out) if h])
+    print(f"🧭 {int(held_out.sum())} held-out leads, {len(classifier.labels)} categories: {result}")
@@ -0,0 +1,168 @@
+"""
+chunk_index.py
+--------------
+Chunk-level article index.
+
+Articles are split into chunks sized to the embedding model's token
+window, so every word piece that gets tokenized is also embedded and
+search covers the full body instead of the lead.
+
+Every chunk is stored with its parent article ID (`parent_id`) plus
+`chunk_index` / `chunk_count`. Query results are folded back into one
+hit per article. Readers that list articles (the /news routes, cache
+builders) must ask for the lead chunks only, where={"chunk_index": 0},
+or every article comes back once per chunk.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from rag.embedder import get_embedding_model, get_embedding_tokenizer
+from rag.splitter import split_text_into_token_chunks
+from rag.vectordb import get_vector_db, add_with_embeddings, search_by_vector
+
+CHUNK_OVERLAP_TOKENS = 32
+
+# Chunk hits fetched per requested article (several chunks of one
+# article can rank next to each other)
+SEARCH_OVERSAMPLE = 4
+
+
+def chunk_article(article_id: str, content: str, metadata: dict):
+    """
+    Splits one article into token-window chunks.
+
+    Returns (ids, texts, metadatas), one entry per chunk.
+    """
+    tokenizer, max_tokens = get_embedding_tokenizer()
+    chunks = split_text_into_token_chunks(
+        content, tokenizer, max_tokens, CHUNK_OVERLAP_TOKENS
+    ) or [content]
+
+    ids, texts, metadatas = [], [], []
+    for i, chunk in enumerate(chunks):
+        meta = dict(metadata)
+        meta.update({
+            "id": article_id,
+            "parent_id": article_id,
+            "chunk_index": i,
+            "chunk_count": len(chunks),
+        })
+        ids.append(f"{article_id}::{i}")
+        texts.append(chunk)
+        metadatas.append(meta)
+
+    return ids, texts, metadatas
+
+
+def embed_articles(articles: List[dict]) -> List[dict]:
+    """
+    Chunks and embeds a batch of articles without writing them.
+
+    Input: list of {"id", "content", "metadata"}
+    Each article dict gains "chunk_ids", "chunk_texts", "chunk_metadatas"
+    and "vectors" ((n_chunks, dim) float32, normalized). vectors[0] is the
+    lead chunk and doubles as the article's dedupe vector.
+
+    All chunks of the batch go through a single embed_documents call.
+    """
+    if not articles:
+        return articles
+
+    all_texts, spans = [], []
+    for article in articles:
+        ids, texts, metas = chunk_article(
+            article["id"], article["content"], article.get("metadata", {})
+        )
+        article["chunk_ids"] = ids
+        article["chunk_texts"] = texts
+        article["chunk_metadatas"] = metas
+        spans.append((len(all_texts), len(all_texts) + len(texts)))
+        all_texts.extend(texts)
+
+    vectors = np.asarray(get_embedding_model().embed_documents(all_texts), dtype=np.float32)
+    for article, (lo, hi) in zip(articles, spans):
+        article["vectors"] = vectors[lo:hi]
+    return articles
+
+
+def write_articles(articles: List[dict], vectordb=None) -> int:
+    """
+    Writes already-embedded articles (see embed_articles) in one call.
+    Returns the number of chunk rows written.
+    """
+    if not articles:
+        return 0
+
+    vectordb = vectordb or get_vector_db()
+    ids, texts, metas, vectors = [], [], [], []
+    for article in articles:
+        ids.extend(article["chunk_ids"])
+        texts.extend(article["chunk_texts"])
+        metas.extend(article["chunk_metadatas"])
+        vectors.append(article["vectors"])
+
+    add_with_embeddings(vectordb, ids, texts, np.concatenate(vectors), metas)
+
+    # Lexical side of hybrid search (saved by the caller with the other indexes)
+    from rag.bm25_index import get_bm25_index
+    get_bm25_index().add(ids, texts)
+    return len(ids)
+
+
+def index_articles(articles: List[dict], vectordb=None) -> Dict[str, np.ndarray]:
+    """
+    Chunks, embeds and writes a batch of articles.
+
+    Output: {article_id: (n_chunks, dim) array} so callers can reuse
+    the vectors that were just computed.
+    """
+    embed_articles(articles)
+    write_articles(articles, vectordb=vectordb)
+    return {article["id"]: article["vectors"] for article in articles}
+
+
+def aggregate_chunk_hits(docs_and_scores, k: int) -> List[Tuple[object, float]]:
+    """
+    Folds chunk hits into one (Document, similarity) per parent article.
+
+    An article is ranked by its best-matching chunk, and that chunk is
+    returned as the article's representative passage.
+    """
+    best = {}
+    order = []
+    for doc, score in docs_and_scores:
+        parent = doc.metadata.get("parent_id") or doc.metadata.get("id") or id(doc)
+        if parent not in best:
+            order.append(parent)
+            best[parent] = (doc, score)
+        elif score > best[parent][1]:
+            best[parent] = (doc, score)
+
+    hits = [best[p] for p in order]
+    hits.sort(key=lambda pair: pair[1], reverse=True)
+    return hits[:k]
+
+
+def search_articles_by_vector(embedding, k: int = 5, filter: Optional[dict] = None,
+                              vectordb=None) -> List[Tuple[object, float]]:
+    """
+    Chunk-level kNN for a query vector, aggregated to k articles.
+    """
+    vectordb = vectordb or get_vector_db()
+    pairs = search_by_vector(vectordb, embedding, k=k * SEARCH_OVERSAMPLE, filter=filter)
+    return aggregate_chunk_hits(pairs, k)
+
+
+def search_articles(query: str, k: int = 5, filter: Optional[dict] = None,
+                    vectordb=None) -> List[Tuple[object, float]]:
+    """
+    Embeds the query once and returns up to k (Document, similarity)
+    pairs, one per article.
+    """
+    embedding = get_embedding_model().embed_query(query)
+    return search_articles_by_vector(embedding, k=k, filter=filter, vectordb=vectordb)
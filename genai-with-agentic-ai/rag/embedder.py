@@ -8,38 +8,125 @@ We use a FREE HuggingFace Model:
 """
 
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from rag.embedding_cache import CachedEmbeddings
+from rag.embedding_service import MicroBatchingEmbeddings
+from rag.autotune import get_host_tuning
+from rag.length_buckets import BUCKET_SIZE, LengthBucketedEmbeddings
+from rag.model_artifacts import resolve_model
 import os
+import threading
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime, see rag/onnx_embedder.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+# Disk cache of computed vectors (see rag/embedding_cache.py)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") == "1"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+
+# Sort bulk embed_documents input into length buckets (see rag/length_buckets.py)
+EMBEDDING_BUCKETING = os.getenv("EMBEDDING_BUCKETING", "1") == "1"
+
+# Coalesce concurrent query embeddings (see rag/embedding_service.py)
+EMBEDDING_MICROBATCH = os.getenv("EMBEDDING_MICROBATCH", "1") == "1"
+
+# all-MiniLM-L6-v2 truncates input at 256 word pieces
+EMBEDDING_MAX_TOKENS = 256
 
 # Cache the embedding model to avoid reloading
 _embedding_model_cache = None
+_embedding_model_lock = threading.Lock()
 
-def get_embedding_model():
+
+def _wrap_model(model, model_id: str, bucket_size: int = None):
+    if EMBEDDING_BUCKETING:
+        model = LengthBucketedEmbeddings(model, bucket_size=bucket_size or BUCKET_SIZE)
+    # Cache hits never reach the batching queue
+    if EMBEDDING_MICROBATCH:
+        model = MicroBatchingEmbeddings(model)
+    if not EMBEDDING_CACHE_ENABLED:
+        return model
+    try:
+        return CachedEmbeddings(model, model_id, cache_dir=EMBEDDING_CACHE_DIR)
+    except Exception as e:
+        print(f"Embedding cache disabled: {e}")
+        return model
+
+
+def build_embedding_backend(backend: str, threads: int = None, batch_size: int = None):
     """
-    Returns a FREE encoder model that can embed text chunks.
-    Uses caching to avoid PyTorch device issues.
+    Bare backend model (no cache / batching wrappers). threads and
+    batch_size default to the library settings.
     """
-    global _embedding_model_cache
-    
-    if _embedding_model_cache is not None:
-        return _embedding_model_cache
-    
+    if backend == "onnx":
+        from rag.onnx_embedder import ONNX_BATCH_SIZE, OnnxEmbeddings
+        return OnnxEmbeddings(threads=threads, batch_size=batch_size or ONNX_BATCH_SIZE)
+
+    if threads:
+        import torch
+        torch.set_num_threads(int(threads))
+    encode_kwargs = {'normalize_embeddings': True}
+    if batch_size:
+        encode_kwargs['batch_size'] = int(batch_size)
+    return HuggingFaceEmbeddings(
+        model_name=resolve_model(EMBEDDING_MODEL_NAME),
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs=encode_kwargs
+    )
+
+
+def _load_embedding_model():
+    # Threads / batch size measured by rag/autotune.py on this host, if any
+    if EMBEDDING_BACKEND == "onnx":
+        try:
+            tuning = get_host_tuning("onnx")
+            model = build_embedding_backend("onnx", tuning.get("threads"), tuning.get("batch_size"))
+            return _wrap_model(model, EMBEDDING_MODEL_NAME + ":onnx-int8", tuning.get("batch_size"))
+        except Exception as e:
+            print(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+
     try:
-        # Set environment variable to avoid meta tensor issues
-        os.environ['TRANSFORMERS_OFFLINE'] = '0'
-        
-        embedding_model = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        
-        _embedding_model_cache = embedding_model
-        return embedding_model
+        tuning = get_host_tuning("torch")
+        model = build_embedding_backend("torch", tuning.get("threads"), tuning.get("batch_size"))
+        return _wrap_model(model, EMBEDDING_MODEL_NAME + ":normalized", tuning.get("batch_size"))
     except Exception as e:
         print(f"Error loading embedding model: {e}")
         # Fallback: try without device specification
         embedding_model = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+            model_name=resolve_model(EMBEDDING_MODEL_NAME)
         )
-        _embedding_model_cache = embedding_model
-        return embedding_model
+        # Unnormalized vectors: kept under a separate cache key
+        return _wrap_model(embedding_model, EMBEDDING_MODEL_NAME + ":raw")
+
+
+def get_embedding_model():
+    """
+    Returns a FREE encoder model that can embed text chunks.
+    Loaded once per process; concurrent first callers wait for that load.
+    """
+    global _embedding_model_cache
+
+    if _embedding_model_cache is None:
+        with _embedding_model_lock:
+            if _embedding_model_cache is None:
+                _embedding_model_cache = _load_embedding_model()
+                # A request-path load recovers a failed startup warmup
+                from rag.model_lifecycle import get_model_lifecycle
+                get_model_lifecycle().mark_ready("embedder")
+    return _embedding_model_cache
+
+
+def get_embedding_tokenizer():
+    """
+    Returns (tokenizer, max_tokens) for the loaded embedding model.
+
+    max_tokens is the model's input window including special tokens.
+    tokenizer is None when the backend does not expose one; callers
+    should then fall back to an approximate token count.
+    """
+    model = get_embedding_model()
+    client = getattr(model, "client", None)
+    tokenizer = getattr(client, "tokenizer", None)
+    max_tokens = getattr(client, "max_seq_length", None) or EMBEDDING_MAX_TOKENS
+    return tokenizer, max_tokens
@@ -0,0 +1,275 @@
+"""
+embedding_cache.py
+------------------
+Disk-backed embedding cache in front of embed_documents / embed_query.
+
+Vectors are keyed by (model id, normalized text hash), so re-ingesting
+an unchanged article, rebuilding the index after a wipe or re-checking
+a duplicate costs a lookup instead of a forward pass.
+
+Layout of the cache directory:
+- vectors.f16   float16 matrix, one row per slot, memory-mapped
+- index.db      sqlite: key -> slot, last-used time (LRU), free slots
+
+The matrix grows by doubling; once `max_entries` keys are stored the
+least recently used tenth is evicted and their slots reused.
+
+Hits only read the index: their last-used times are kept in memory and
+written in one batch on the next store (before any eviction), every
+FLUSH_SECONDS, or on flush()/close(). One sqlite connection is reused.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import atexit
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "embedding_cache"
+DEFAULT_MAX_ENTRIES = 200_000
+_INITIAL_ROWS = 1024
+_SQL_CHUNK = 500   # keys per IN (...) query
+FLUSH_SECONDS = 30.0   # max age of unwritten last-used times
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC + collapsed whitespace (the tokenizer ignores both)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model_id: str, text: str, kind: str = "d") -> str:
+    payload = f"{model_id}\0{kind}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain Embeddings. Only cache misses reach the model,
+    and repeated texts within one call are embedded once.
+    """
+
+    def __init__(self, base: Embeddings, model_id: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.base = base
+        self.model_id = model_id
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}   # key -> last used, not yet written
+        self._flushed_at = time.time()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db_path = os.path.join(cache_dir, "index.db")
+        self._vec_path = os.path.join(cache_dir, "vectors.f16")
+        self._db = sqlite3.connect(self._db_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._init_db()
+        atexit.register(self.close)
+
+    # Backends expose the tokenizer / max length through .client
+    @property
+    def client(self):
+        return getattr(self.base, "client", None)
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _init_db(self):
+        conn = self._db
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                slot INTEGER,
+                last_used REAL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_used)")
+        conn.execute("CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+        row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        if row is not None:
+            self._dim = int(row[0])
+
+    def _open_matrix(self, min_rows: int = 0) -> np.memmap:
+        """Maps vectors.f16, growing the file (by doubling) to hold min_rows."""
+        row_bytes = self._dim * 2
+        size = os.path.getsize(self._vec_path) if os.path.exists(self._vec_path) else 0
+        rows = size // row_bytes
+        if rows < min_rows:
+            rows = max(_INITIAL_ROWS, rows)
+            while rows < min_rows:
+                rows *= 2
+            with open(self._vec_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+            self._matrix = None
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(self._vec_path, dtype=np.float16, mode="r+", shape=(rows, self._dim))
+        return self._matrix
+
+    def _lookup(self, keys: List[str]) -> Dict[str, int]:
+        if self._dim is None or not keys:
+            return {}
+        found = {}
+        for i in range(0, len(keys), _SQL_CHUNK):
+            part = keys[i:i + _SQL_CHUNK]
+            marks = ",".join("?" * len(part))
+            found.update(self._db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({marks})", part
+            ).fetchall())
+        if found:
+            now = time.time()
+            self._touched.update((k, now) for k in found)
+            if now - self._flushed_at >= FLUSH_SECONDS:
+                self._flush_locked()
+        return found
+
+    def _write_touched(self, conn) -> None:
+        # Cleared by the caller once its transaction commits
+        if self._touched:
+            conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                             [(t, k) for k, t in self._touched.items()])
+
+    def _flush_locked(self) -> None:
+        try:
+            self._write_touched(self._db)
+            self._db.commit()
+            self._touched = {}
+            self._flushed_at = time.time()
+        except Exception as e:
+            self._db.rollback()
+            logger.warning(f"⚠️  Embedding cache LRU flush failed: {e}")
+
+    def flush(self) -> None:
+        """Writes pending last-used times."""
+        with self._lock:
+            if self._db is not None:
+                self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._flush_locked()
+                self._db.close()
+                self._db = None
+
+    def _store(self, keys: List[str], vectors: np.ndarray) -> None:
+        if not keys:
+            return
+        conn = self._db
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Hits since the last flush count for the LRU order below
+            self._write_touched(conn)
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dim', ?)", (str(self._dim),))
+
+            # Evict the least recently used tenth when the cap is reached
+            count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count + len(keys) > self.max_entries:
+                n_evict = max(count + len(keys) - self.max_entries, self.max_entries // 10)
+                victims = conn.execute(
+                    "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (n_evict,)
+                ).fetchall()
+                conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                conn.executemany("INSERT OR IGNORE INTO free_slots (slot) VALUES (?)", [(s,) for _, s in victims])
+
+            free = [r[0] for r in conn.execute(
+                "SELECT slot FROM free_slots ORDER BY slot LIMIT ?", (len(keys),)
+            )]
+            conn.executemany("DELETE FROM free_slots WHERE slot = ?", [(s,) for s in free])
+            row = conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()
+            next_slot = int(row[0]) if row else 0
+            fresh = list(range(next_slot, next_slot + len(keys) - len(free)))
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('next_slot', ?)",
+                         (str(next_slot + len(fresh)),))
+            slots = free + fresh
+
+            # Vectors land in the file before their keys become visible
+            matrix = self._open_matrix(min_rows=max(slots) + 1)
+            matrix[np.asarray(slots)] = vectors.astype(np.float16)
+            matrix.flush()
+
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(k, s, now) for k, s in zip(keys, slots)]
+            )
+            conn.commit()
+            self._touched = {}
+            self._flushed_at = now
+        except Exception:
+            conn.rollback()
+            raise
+
+    # ------------------------------------------------------------------
+    # Embeddings interface
+    # ------------------------------------------------------------------
+    def _embed(self, texts: List[str], kind: str, compute) -> List[List[float]]:
+        keys = [cache_key(self.model_id, t, kind) for t in texts]
+        with self._lock:
+            slots = self._lookup(list(set(keys)))
+            out = [None] * len(texts)
+            if slots:
+                matrix = self._open_matrix(min_rows=max(slots.values()) + 1)
+                for i, k in enumerate(keys):
+                    if k in slots:
+                        out[i] = matrix[slots[k]].astype(np.float32)
+
+        miss_keys, miss_texts, pending = [], [], set()
+        for k, t, v in zip(keys, texts, out):
+            if v is None and k not in pending:
+                pending.add(k)
+                miss_keys.append(k)
+                miss_texts.append(t)
+
+        self.hits += len(texts) - sum(v is None for v in out)
+        self.misses += len(miss_keys)
+
+        if miss_texts:
+            computed = np.asarray(compute(miss_texts), dtype=np.float32)
+            with self._lock:
+                try:
+                    self._store(miss_keys, computed)
+                except Exception as e:
+                    logger.warning(f"⚠️  Embedding cache write failed: {e}")
+            by_key = dict(zip(miss_keys, computed))
+            for i, k in enumerate(keys):
+                if out[i] is None:
+                    out[i] = by_key[k]
+
+        return [v.tolist() for v in out]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "d", self.base.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "q", lambda ts: [self.base.embed_query(ts[0])])[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
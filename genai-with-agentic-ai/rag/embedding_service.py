@@ -0,0 +1,127 @@
+"""
+embedding_service.py
+--------------------
+In-process micro-batching for query embeddings.
+
+/news/search, /chat/message and /rag/ask each embed one short query on
+their own threadpool thread. Instead of many single-row forward passes
+contending for the model, embed_query() puts the text on a queue and
+waits on a Future; one worker thread gathers whatever arrives within
+MICROBATCH_WAIT_MS (or up to MICROBATCH_MAX_ITEMS texts), runs a single
+embed_documents call and hands each caller its row.
+
+Batches go through embed_documents (MiniLM encodes queries and documents
+the same way). Bulk embed_documents calls from ingestion and re-indexing
+are already batched and go straight to the wrapped model.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_WAIT_MS = float(os.getenv("MICROBATCH_WAIT_MS", "3"))
+MICROBATCH_MAX_ITEMS = int(os.getenv("MICROBATCH_MAX_ITEMS", "32"))
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """
+    Wraps any LangChain Embeddings; concurrent embed_query calls share
+    one batched forward pass.
+    """
+
+    def __init__(self, base: Embeddings, max_wait_ms: float = MICROBATCH_WAIT_MS,
+                 max_items: int = MICROBATCH_MAX_ITEMS):
+        self.base = base
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_items = max_items
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "largest_batch": 0, "failed": 0}
+
+    # Backends expose the tokenizer / max length through .client
+    @property
+    def client(self):
+        return getattr(self.base, "client", None)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Embeddings interface
+    # ------------------------------------------------------------------
+    def embed_query(self, text: str) -> List[float]:
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def get_stats(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "mean_batch": round(self.stats["requests"] / batches, 2) if batches else 0.0,
+            "pending": self._queue.qsize(),
+        }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _gather(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_items:
+            # Requests that queued up during the previous forward pass are
+            # taken immediately; otherwise wait out the rest of the window
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._gather()
+            batch = [(t, f) for t, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self.base.embed_documents([t for t, _ in batch])
+            except Exception as e:
+                self.stats["failed"] += len(batch)
+                logger.warning(f"⚠️  Query embedding batch failed ({len(batch)} queries): {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
@@ -0,0 +1,164 @@
+"""
+faiss_store.py
+--------------
+FAISS vector backend (VECTOR_BACKEND=faiss).
+
+Flat, HNSW or IVF index over inner product (our embeddings are
+normalized, so inner product = cosine), wrapped in an IndexIDMap keyed by
+the side-table row number (see rag/local_store.py). Metadata filters and
+deleted rows are applied inside the search with an IDSelectorBitmap, so
+a filtered query still returns k hits.
+
+persist() writes index.faiss atomically. With FAISS_MMAP=1 the file is
+opened memory-mapped, so several worker processes share one copy of the
+index pages; the first write after such a load reads the index into RAM
+(memory-mapped IVF lists are read-only).
+
+    FAISS_INDEX_TYPE   flat | hnsw | ivf      (default flat)
+    FAISS_HNSW_M       graph degree           (32)
+    FAISS_EF_SEARCH    HNSW search beam       (64)
+    FAISS_NLIST        IVF lists              (sqrt of rows, set at training)
+    FAISS_NPROBE       IVF lists per query    (16)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import logging
+from typing import Tuple
+
+import faiss
+import numpy as np
+
+from rag.local_store import LocalVectorStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+NLIST = int(os.getenv("FAISS_NLIST", "0"))
+NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+USE_MMAP = os.getenv("FAISS_MMAP", "0") == "1"
+
+INDEX_FILE = "index.faiss"
+INDEX_META_FILE = "index.json"
+IVF_MIN_TRAIN_ROWS = 1024   # below this an IVF store answers with exact search
+
+
+class FaissVectorStore(LocalVectorStore):
+
+    def __init__(self, path: str, embedding_function=None, collection_name: str = "news_articles",
+                 index_type: str = INDEX_TYPE, mmap: bool = USE_MMAP):
+        if index_type not in ("flat", "hnsw", "ivf"):
+            raise ValueError(f"Unknown FAISS index type {index_type}")
+        self.index_type = index_type
+        self.mmap = mmap
+        self._index = None
+        self._mapped = False
+        super().__init__(path, embedding_function=embedding_function, collection_name=collection_name)
+
+    # ------------------------------------------------------------------
+    # Index construction
+    # ------------------------------------------------------------------
+    def _new_index(self, train: np.ndarray = None):
+        dim = self._dim
+        if self.index_type == "hnsw":
+            inner = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            inner.hnsw.efSearch = EF_SEARCH
+        elif self.index_type == "ivf" and train is not None and len(train) >= IVF_MIN_TRAIN_ROWS:
+            nlist = NLIST or max(16, int(np.sqrt(len(train))))
+            quantizer = faiss.IndexFlatIP(dim)
+            inner = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            inner.train(train)
+            inner.nprobe = NPROBE
+            logger.info(f"🧭 Trained IVF index ({nlist} lists) on {len(train)} vectors")
+        else:
+            # flat, and ivf until there is enough data to train it
+            inner = faiss.IndexFlatIP(dim)
+        return faiss.IndexIDMap(inner)
+
+    def _inner(self):
+        return faiss.downcast_index(self._index.index)
+
+    def _untrained_ivf(self) -> bool:
+        return self.index_type == "ivf" and not isinstance(self._inner(), faiss.IndexIVF)
+
+    def _index_reset(self) -> None:
+        self._mapped = False
+        if self._dim is None:
+            self._index = None
+            return
+        alive = np.flatnonzero(self._alive)
+        train = np.asarray(self._matrix[alive]) if self.index_type == "ivf" and len(alive) else None
+        self._index = self._new_index(train)
+
+    def _ensure_writable(self) -> None:
+        if self._mapped:
+            path = os.path.join(self.path, INDEX_FILE)
+            self._index = faiss.read_index(path)
+            self._mapped = False
+
+    def _index_add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if self._index is None:
+            self._index = self._new_index()
+        self._ensure_writable()
+        self._index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), np.asarray(rows, dtype=np.int64))
+        if self._untrained_ivf() and self._index.ntotal >= IVF_MIN_TRAIN_ROWS:
+            # Train on the live rows; row numbers must not move mid-write
+            self._rebuild_index_locked()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _search_params(self, selector):
+        inner = self._inner()
+        if isinstance(inner, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(EF_SEARCH, inner.hnsw.efSearch))
+        if isinstance(inner, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=inner.nprobe)
+        return faiss.SearchParameters(sel=selector)
+
+    def _index_search(self, queries: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, int(mask.sum()))
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+        sims, rows = self._index.search(
+            np.ascontiguousarray(queries, dtype=np.float32), k, params=self._search_params(selector)
+        )
+        return sims, rows
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _index_save(self) -> None:
+        if self._index is None:
+            return
+        if self._mapped:
+            # Nothing was added since the mapped file was read
+            return
+        path = os.path.join(self.path, INDEX_FILE)
+        faiss.write_index(self._index, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        meta_path = os.path.join(self.path, INDEX_META_FILE)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"index_type": self.index_type, "rows": self._next_row}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        logger.info(f"💾 Saved {self.index_type} FAISS index ({self._index.ntotal} vectors)")
+
+    def _index_load(self) -> int:
+        path = os.path.join(self.path, INDEX_FILE)
+        meta_path = os.path.join(self.path, INDEX_META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if meta.get("index_type") != self.index_type or not os.path.exists(path):
+            logger.info(f"🔁 No saved {self.index_type} index in {self.path}, rebuilding")
+            return 0
+        self._index = faiss.read_index(path, faiss.IO_FLAG_MMAP if self.mmap else 0)
+        self._mapped = self.mmap
+        return int(meta["rows"])
@@ -0,0 +1,126 @@
+"""
+length_buckets.py
+-----------------
+Length-bucketed batching for bulk embed_documents calls.
+
+A forward pass pads every sequence to the longest one in its batch, so
+a 20-token title batched with 256-token body chunks costs as much as a
+256-token chunk. Texts are therefore counted with the model's tokenizer,
+sorted by token length and cut into buckets of similar length; each
+bucket is one call to the wrapped model and the vectors are scattered
+back into input order.
+
+Padding is tracked per call and cumulatively: padding_ratio is the share
+of padded token slots that carry no token, next to the ratio the same
+texts would have had in arrival order.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import threading
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SIZE = int(os.getenv("EMBEDDING_BUCKET_SIZE", "32"))   # texts per forward pass
+REPORT_MIN_TEXTS = 256   # log the padding report for calls at least this large
+
+
+def token_lengths(texts: List[str], tokenizer=None, max_tokens: int = 256) -> np.ndarray:
+    """Token count per text (with special tokens, truncated like the model)."""
+    if tokenizer is None:
+        # ~1.3 word pieces per whitespace word for English news text
+        counts = [int(len(t.split()) * 1.3) + 2 for t in texts]
+    else:
+        counts = [len(ids) for ids in tokenizer(
+            list(texts), truncation=True, max_length=max_tokens,
+            return_attention_mask=False, return_token_type_ids=False,
+        )["input_ids"]]
+    return np.minimum(np.asarray(counts, dtype=np.int64), max_tokens)
+
+
+def plan_buckets(lengths: np.ndarray, bucket_size: int = BUCKET_SIZE) -> List[np.ndarray]:
+    """Index groups of similar length, shortest first."""
+    order = np.argsort(lengths, kind="stable")
+    return [order[i:i + bucket_size] for i in range(0, len(order), bucket_size)]
+
+
+def padded_tokens(lengths: np.ndarray, batches: List[np.ndarray]) -> int:
+    return int(sum(len(b) * int(lengths[b].max()) for b in batches if len(b)))
+
+
+def padding_ratio(real: int, padded: int) -> float:
+    return round(1.0 - real / padded, 3) if padded else 0.0
+
+
+class LengthBucketedEmbeddings(Embeddings):
+    """
+    Wraps a backend model; embed_documents runs one call per length bucket.
+    """
+
+    def __init__(self, base: Embeddings, bucket_size: int = BUCKET_SIZE, max_tokens: int = None):
+        self.base = base
+        self.bucket_size = bucket_size
+        self.max_tokens = max_tokens or getattr(self.client, "max_seq_length", None) or 256
+        self._lock = threading.Lock()
+        self.stats = {"texts": 0, "passes": 0, "real_tokens": 0, "padded_tokens": 0, "unsorted_padded_tokens": 0}
+
+    # Backends expose the tokenizer / max length through .client
+    @property
+    def client(self):
+        return getattr(self.base, "client", None)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if len(texts) <= 1:
+            return self.base.embed_documents(texts)
+
+        lengths = token_lengths(texts, getattr(self.client, "tokenizer", None), self.max_tokens)
+        buckets = plan_buckets(lengths, self.bucket_size)
+
+        out: List[List[float]] = [None] * len(texts)
+        for bucket in buckets:
+            vectors = self.base.embed_documents([texts[i] for i in bucket])
+            for i, vector in zip(bucket, vectors):
+                out[i] = vector
+
+        report = self._record(lengths, buckets)
+        if len(texts) >= REPORT_MIN_TEXTS:
+            logger.info(
+                f"🧮 Embedded {len(texts)} texts in {len(buckets)} passes, "
+                f"padding {report['padding_ratio']:.0%} (unsorted {report['unsorted_padding_ratio']:.0%})"
+            )
+        return out
+
+    def _record(self, lengths: np.ndarray, buckets: List[np.ndarray]) -> dict:
+        real = int(lengths.sum())
+        padded = padded_tokens(lengths, buckets)
+        arrival = [np.arange(i, min(i + self.bucket_size, len(lengths)))
+                   for i in range(0, len(lengths), self.bucket_size)]
+        unsorted = padded_tokens(lengths, arrival)
+        with self._lock:
+            self.stats["texts"] += len(lengths)
+            self.stats["passes"] += len(buckets)
+            self.stats["real_tokens"] += real
+            self.stats["padded_tokens"] += padded
+            self.stats["unsorted_padded_tokens"] += unsorted
+        return {
+            "padding_ratio": padding_ratio(real, padded),
+            "unsorted_padding_ratio": padding_ratio(real, unsorted),
+        }
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["padding_ratio"] = padding_ratio(stats["real_tokens"], stats["padded_tokens"])
+        stats["unsorted_padding_ratio"] = padding_ratio(stats["real_tokens"], stats["unsorted_padded_tokens"])
+        return stats
@@ -102,11 +102,16 @@ Supports both Flan-T5 and Llama models.
 from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
 from typing import Optional
 import os
+import threading
+
+from rag.model_artifacts import resolve_model
 
 # Singleton to avoid reloading models
 _llm_pipeline = None
 _model_name = None
 _is_llama = False
+# Held while a pipeline is (re)built so concurrent callers load it once
+_llm_lock = threading.RLock()
 
 
 def get_local_llm(model_name: Optional[str] = None):
@@ -120,6 +125,11 @@ def get_local_llm(model_name: Optional[str] = None):
     Returns:
         Pipeline that can be called like: llm("question")
     """
+    with _llm_lock:
+        return _load_local_llm(model_name)
+
+
+def _load_local_llm(model_name: Optional[str] = None):
     global _llm_pipeline, _model_name, _is_llama
     
     # Check if model changed - force reload
@@ -147,7 +157,7 @@ def get_local_llm(model_name: Optional[str] = None):
             # Use text-generation for Llama models with better parameters
             _llm_pipeline = pipeline(
                 "text-generation",
-                model=_model_name,
+                model=resolve_model(_model_name),
                 max_new_tokens=512,  # Allow longer responses
                 do_sample=True,
                 temperature=0.7,
@@ -161,7 +171,7 @@ def get_local_llm(model_name: Optional[str] = None):
             # Use text2text-generation for Flan-T5 models
             _llm_pipeline = pipeline(
                 "text2text-generation",
-                model=_model_name,
+                model=resolve_model(_model_name),
                 max_length=512,
                 do_sample=False,
                 device=-1,
@@ -224,6 +234,48 @@ class LocalLLM:
         
         return generated
     
+    def batch(self, prompts, batch_size: int = 8) -> list:
+        """
+        Runs several prompts through the pipeline in one call.
+        Callers should group prompts of similar length to limit padding.
+        """
+        texts = []
+        for prompt in prompts:
+            if hasattr(prompt, 'text'):
+                texts.append(prompt.text)
+            elif hasattr(prompt, 'to_string'):
+                texts.append(prompt.to_string())
+            else:
+                texts.append(str(prompt))
+        if not texts:
+            return []
+        
+        global _is_llama
+        
+        if _is_llama:
+            results = self.pipeline(
+                texts,
+                max_new_tokens=self.kwargs.get('max_length', 512),
+                return_full_text=False,
+                truncation=True,
+                batch_size=batch_size
+            )
+        else:
+            results = self.pipeline(
+                texts,
+                max_length=self.kwargs.get('max_length', 512),
+                truncation=True,
+                batch_size=batch_size
+            )
+        
+        outputs = []
+        for result in results:
+            # text-generation yields a list per prompt, text2text a dict
+            item = result[0] if isinstance(result, list) and result else result
+            generated = item.get('generated_text', '') if isinstance(item, dict) else ""
+            outputs.append(generated.replace('<|eot_id|>', '').replace('<|end_header_id|>', '').strip())
+        return outputs
+    
     def run(self, prompt: str) -> str:
         """Legacy run interface (deprecated but still works)"""
         return self.invoke(prompt)
@@ -0,0 +1,686 @@
+"""
+local_store.py
+--------------
+Common base for the in-process vector backends (rag/faiss_store.py, ...).
+
+A store directory holds:
+- vectors.f32   float32 matrix, one row per stored vector (memory-mapped;
+                float16 "vectors.f16" for stores with VECTOR_DTYPE = float16)
+- rows.db       sqlite side table: row -> chunk id, document, metadata
+- index files   whatever the concrete backend persists (see _index_save)
+
+Rows are append-only between compactions: re-writing a chunk's vector
+appends a new row and drops the old one from the side table, so a row
+number always names the same vector. Dead rows are masked out of
+searches. compact() rebuilds the index from the live rows and, once
+dead rows pass COMPACT_DEAD_FRACTION, also rewrites the vector file
+with the live rows only and renumbers them 0..n-1 (the new file is
+swapped in after the renumbering commits; an interrupted swap is
+finished on open). The backend index is a cache of vectors.f32 — rows
+it has not seen yet (crash before persist, deleted index file) are
+added back on open, and an index covering more rows than the store
+(saved before a compaction) is rebuilt.
+
+Metadata filters are resolved through a MetadataIndex
+(rag/metadata_index.py) kept in step with the side table; a filter that
+leaves at most EXACT_FILTER_ROWS candidates is scored exactly over
+those rows, so a selective filter is cheaper than no filter.
+
+The store speaks enough of the Chroma / LangChain API for the rest of
+the code base: the rag.vectordb hooks (add_embeddings, search_by_vector,
+top1_by_vectors, get_metadatas, get_article_rows, update_rows), the
+LangChain VectorStore search methods, and a `_collection` shim with
+Chroma's get / query / upsert / update / delete / count. Distances
+follow Chroma (squared L2 on normalized vectors, 2 - 2cos), so
+rag.vectordb.distance_to_cosine applies unchanged.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from rag.metadata_index import MetadataIndex
+from rag.numpy_store import matches_where, merge_metadata, top_k
+
+logger = logging.getLogger(__name__)
+
+_INITIAL_ROWS = 1024
+_SQL_CHUNK = 500           # values per IN (...) query
+COMPACT_DEAD_FRACTION = 0.25
+_COMPACT_BATCH = 8192      # rows copied per step when rewriting the vector file
+# Filtered searches with at most this many candidate rows are scored
+# exactly over those rows instead of going through the backend index
+EXACT_FILTER_ROWS = int(os.getenv("EXACT_FILTER_ROWS", "4096"))
+
+
+# ----------------------------------------------------------------------
+# Chroma-style `where` filters
+# ----------------------------------------------------------------------
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def _json_path(key: str) -> str:
+    return '$."' + key.replace('"', '""') + '"'
+
+
+def where_to_sql(where: Optional[dict]) -> Tuple[str, list]:
+    """
+    Translates a Chroma metadata filter ({"category": "Tech"},
+    {"$and": [...]}, {"publishDate": {"$gte": ...}}, {"id": {"$in": [...]}})
+    into a SQL condition over the JSON metadata column.
+    """
+    if not where:
+        return "1", []
+    clauses, params = [], []
+    for key, cond in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(sub) for sub in cond]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(p[0] for p in parts) + ")" if parts else "1")
+            for p in parts:
+                params.extend(p[1])
+            continue
+        field = "json_extract(metadata, ?)"
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, value in cond.items():
+            if op in ("$in", "$nin"):
+                values = list(value)
+                if not values:
+                    clauses.append("0" if op == "$in" else "1")
+                    continue
+                marks = ",".join("?" * len(values))
+                clauses.append(f"{field} {'IN' if op == '$in' else 'NOT IN'} ({marks})")
+                params.append(_json_path(key))
+                params.extend(values)
+            elif op in _COMPARISONS:
+                clauses.append(f"{field} {_COMPARISONS[op]} ?")
+                params.extend([_json_path(key), value])
+            else:
+                raise ValueError(f"Unsupported filter operator {op}")
+    return " AND ".join(clauses) if clauses else "1", params
+
+
+class _CollectionShim:
+    """The subset of chromadb.Collection the code base calls on `_collection`."""
+
+    def __init__(self, store: "LocalVectorStore"):
+        self._store = store
+        self.name = store.collection_name
+
+    def count(self) -> int:
+        return self._store.count()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None, **_):
+        include = include or ["metadatas", "documents"]
+        return self._store._get(ids=ids, where=where, include=include, limit=limit, offset=offset)
+
+    def query(self, query_embeddings=None, query_texts=None, n_results=10, where=None, include=None, **_):
+        include = include or ["metadatas", "documents", "distances"]
+        if query_embeddings is None:
+            query_embeddings = self._store._embed_documents(list(query_texts))
+        out = {key: [] for key in ["ids"] + list(include)}
+        with self._store._lock:
+            sims, rows = self._store._search_rows(np.asarray(query_embeddings, dtype=np.float32), n_results, where)
+            for q_sims, q_rows in zip(sims, rows):
+                keep = q_rows >= 0
+                payload = self._store._rows_payload(q_rows[keep], include)
+                out["ids"].append(payload["ids"])
+                for key in include:
+                    if key == "distances":
+                        out["distances"].append([2.0 - 2.0 * float(s) for s in q_sims[keep]])
+                    else:
+                        out[key].append(payload[key])
+        return out
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None, **_):
+        if embeddings is None:
+            embeddings = self._store._embed_documents(documents)
+        self._store._write(ids, documents, embeddings, metadatas)
+
+    add = upsert
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None, **_):
+        self._store.update_rows(ids, texts=documents, embeddings=embeddings, metadatas=metadatas)
+
+    def delete(self, ids=None, where=None, **_):
+        with self._store._lock:
+            self._store._delete(self._store._select_rows(ids=ids, where=where))
+
+
+class LocalVectorStore(VectorStore, ABC):
+    """
+    Side table + vector file + pluggable index. Subclasses implement
+    _index_reset / _index_add / _index_search, and may persist the index
+    through _index_save / _index_load.
+    """
+
+    VECTOR_DTYPE = np.float32
+
+    def __init__(self, path: str, embedding_function: Optional[Embeddings] = None,
+                 collection_name: str = "news_articles"):
+        self.path = path
+        self.collection_name = collection_name
+        self._embedding_function = embedding_function
+        self._lock = threading.RLock()
+        self._db_path = os.path.join(path, "rows.db")
+        self._vec_path = os.path.join(path, "vectors.f16" if self.VECTOR_DTYPE == np.float16 else "vectors.f32")
+        self._matrix: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        self._next_row = 0
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._meta_index = MetadataIndex()
+
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._init_db()
+        self._load_rows()
+        self._open_index()
+
+    # ------------------------------------------------------------------
+    # Backend index (subclasses)
+    # ------------------------------------------------------------------
+    @abstractmethod
+    def _index_reset(self) -> None:
+        """Drops the index (rows are re-added through _index_add)."""
+
+    @abstractmethod
+    def _index_add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Indexes `vectors` under the given row numbers."""
+
+    @abstractmethod
+    def _index_search(self, queries: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(sims, rows) of shape (n, k); rows are -1 past the last hit. Only rows with mask set may be returned."""
+
+    def _index_save(self) -> None:
+        pass
+
+    def _index_load(self) -> int:
+        """Loads a persisted index; returns how many rows it covers (0 = none)."""
+        return 0
+
+    # ------------------------------------------------------------------
+    # Side table and vector file
+    # ------------------------------------------------------------------
+    def _init_db(self) -> None:
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS rows (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT UNIQUE,
+                    document TEXT,
+                    metadata TEXT
+                )
+            ''')
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+
+    def _meta_get(self, name: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _meta_set(self, name: str, value) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def _load_rows(self) -> None:
+        if self._meta_get("swap_vectors"):
+            # A compaction committed its renumbering but did not swap the file in
+            if os.path.exists(self._vec_path + ".compact"):
+                os.replace(self._vec_path + ".compact", self._vec_path)
+            self._db.execute("DELETE FROM meta WHERE name = 'swap_vectors'")
+            self._db.commit()
+        dim = self._meta_get("dim")
+        self._dim = int(dim) if dim else None
+        self._next_row = int(self._meta_get("next_row") or 0)
+        self._alive = np.zeros(self._next_row, dtype=bool)
+        self._row_of = {}
+        self._meta_index = MetadataIndex()
+        rows, metadatas = [], []
+        for row, chunk_id, metadata in self._db.execute("SELECT row, id, metadata FROM rows"):
+            self._row_of[chunk_id] = row
+            self._alive[row] = True
+            rows.append(row)
+            metadatas.append(json.loads(metadata) if metadata else {})
+        self._meta_index.add(rows, metadatas)
+        if self._dim is not None:
+            self._open_matrix(self._next_row)
+
+    def _open_matrix(self, min_rows: int) -> np.memmap:
+        row_bytes = self._dim * np.dtype(self.VECTOR_DTYPE).itemsize
+        size = os.path.getsize(self._vec_path) if os.path.exists(self._vec_path) else 0
+        rows = size // row_bytes
+        if rows < min_rows or rows == 0:
+            rows = max(_INITIAL_ROWS, rows)
+            while rows < min_rows:
+                rows *= 2
+            with open(self._vec_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+            self._matrix = None
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(self._vec_path, dtype=self.VECTOR_DTYPE, mode="r+", shape=(rows, self._dim))
+        return self._matrix
+
+    def _open_index(self) -> None:
+        covered = self._index_load() if self._dim is not None else 0
+        if covered > self._next_row:
+            # Saved before a compaction renumbered the rows
+            logger.info(f"🔁 Index in {self.path} predates compaction, rebuilding")
+            covered = 0
+        if not covered:
+            self._index_reset()
+            alive = np.flatnonzero(self._alive)
+            if len(alive):
+                self._index_add(alive, np.asarray(self._matrix[alive]))
+            return
+        if covered < self._next_row:
+            # Rows written after the index was last saved
+            missing = np.arange(covered, self._next_row)
+            missing = missing[self._alive[missing]]
+            if len(missing):
+                self._index_add(missing, np.asarray(self._matrix[missing]))
+
+    def vectors(self) -> np.ndarray:
+        """Read-only view of every row's vector (dead rows included)."""
+        if self._dim is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._matrix[:self._next_row]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self._embedding_function is None:
+            raise ValueError("No embedding function; pass embeddings explicitly")
+        return self._embedding_function.embed_documents(list(texts))
+
+    def _write(self, ids, texts, vectors, metadatas) -> List[str]:
+        """Upsert: every id gets a fresh row with the given vector."""
+        ids = list(ids)
+        if not ids:
+            return []
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        texts = list(texts) if texts is not None else [""] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [{}] * len(ids)
+
+        # Last write wins for ids repeated within the call
+        latest = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        order = sorted(latest.values())
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+                self._meta_set("dim", self._dim)
+            replaced = [self._row_of[ids[i]] for i in order if ids[i] in self._row_of]
+            if replaced:
+                self._drop_rows_locked(replaced)
+
+            rows = np.arange(self._next_row, self._next_row + len(order))
+            matrix = self._open_matrix(int(rows[-1]) + 1)
+            matrix[rows] = vectors[order]
+            matrix.flush()
+
+            self._db.executemany(
+                "INSERT INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(int(r), ids[i], texts[i], json.dumps(metadatas[i] or {})) for r, i in zip(rows, order)]
+            )
+            self._next_row += len(order)
+            self._meta_set("next_row", self._next_row)
+            self._db.commit()
+
+            alive = np.zeros(self._next_row, dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            alive[rows] = True
+            self._alive = alive
+            for r, i in zip(rows, order):
+                self._row_of[ids[i]] = int(r)
+            self._index_add(rows, vectors[order])
+            self._on_rows_added(rows, [metadatas[i] or {} for i in order])
+        return ids
+
+    def _drop_rows_locked(self, rows: List[int]) -> None:
+        for i in range(0, len(rows), _SQL_CHUNK):
+            part = [int(r) for r in rows[i:i + _SQL_CHUNK]]
+            marks = ",".join("?" * len(part))
+            for (chunk_id,) in self._db.execute(f"SELECT id FROM rows WHERE row IN ({marks})", part).fetchall():
+                self._row_of.pop(chunk_id, None)
+            self._db.execute(f"DELETE FROM rows WHERE row IN ({marks})", part)
+        self._alive[np.asarray(rows, dtype=np.int64)] = False
+        self._on_rows_removed(np.asarray(rows, dtype=np.int64))
+
+    def _delete(self, rows) -> None:
+        rows = [int(r) for r in rows]
+        if not rows:
+            return
+        with self._lock:
+            self._drop_rows_locked(rows)
+            self._db.commit()
+
+    # Secondary structures kept in step with the rows
+    def _on_rows_added(self, rows: np.ndarray, metadatas: List[dict]) -> None:
+        self._meta_index.add(rows, metadatas)
+
+    def _on_rows_removed(self, rows: np.ndarray) -> None:
+        self._meta_index.remove(rows)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def count(self) -> int:
+        return len(self._row_of)
+
+    def _select_rows(self, ids=None, where=None, limit=None, offset=None) -> np.ndarray:
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[i] for i in ids if i in self._row_of]
+                if where:
+                    allowed = self._allowed_mask(where)
+                    rows = [r for r in rows if allowed[r]]
+            elif where:
+                rows = np.flatnonzero(self._allowed_mask(where))
+            else:
+                rows = np.flatnonzero(self._alive)
+        rows = np.asarray(rows, dtype=np.int64)
+        start = offset or 0
+        return rows[start:start + limit] if limit is not None else rows[start:]
+
+    def _allowed_mask(self, where: Optional[dict]) -> np.ndarray:
+        """Alive rows matching a Chroma-style metadata filter."""
+        with self._lock:
+            if not where:
+                return self._alive.copy()
+            mask, residual = self._meta_index.restrict(where, self._next_row)
+            mask = self._alive.copy() if mask is None else mask & self._alive
+            if residual and mask.any():
+                # Only the part of the filter the metadata index cannot answer
+                matched = np.zeros(self._next_row, dtype=bool)
+                try:
+                    clause, params = where_to_sql(residual)
+                except ValueError:
+                    # Operators SQL cannot express (tags $contains inside an
+                    # $or): checked in Python on the candidate rows only
+                    for row, (_, _, metadata) in self._fetch(np.flatnonzero(mask)).items():
+                        matched[row] = matches_where(metadata, residual)
+                else:
+                    rows = [r for (r,) in self._db.execute(f"SELECT row FROM rows WHERE {clause}", params)]
+                    if rows:
+                        matched[rows] = True
+                mask &= matched
+            return mask
+
+    def has_matches(self, where: Optional[dict]) -> bool:
+        return bool(self._allowed_mask(where).any())
+
+    def _fetch(self, rows) -> Dict[int, Tuple[str, str, dict]]:
+        out = {}
+        rows = [int(r) for r in rows]
+        with self._lock:
+            for i in range(0, len(rows), _SQL_CHUNK):
+                part = rows[i:i + _SQL_CHUNK]
+                marks = ",".join("?" * len(part))
+                for row, chunk_id, document, metadata in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM rows WHERE row IN ({marks})", part
+                ):
+                    out[row] = (chunk_id, document, json.loads(metadata) if metadata else {})
+        return out
+
+    def _rows_payload(self, rows, include) -> dict:
+        fetched = self._fetch(rows)
+        rows = [int(r) for r in rows if int(r) in fetched]
+        payload = {"ids": [fetched[r][0] for r in rows]}
+        if "documents" in include:
+            payload["documents"] = [fetched[r][1] for r in rows]
+        if "metadatas" in include:
+            payload["metadatas"] = [fetched[r][2] for r in rows]
+        if "embeddings" in include:
+            payload["embeddings"] = np.asarray(self._matrix[rows], dtype=np.float32) if rows else np.zeros((0, self._dim or 0), dtype=np.float32)
+        return payload
+
+    def _get(self, ids=None, where=None, include=(), limit=None, offset=None) -> dict:
+        """Selected rows' payload, resolved under one lock (see compact())."""
+        with self._lock:
+            return self._rows_payload(self._select_rows(ids=ids, where=where, limit=limit, offset=offset), include)
+
+    def _search_rows(self, queries: np.ndarray, k: int, where: Optional[dict] = None):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        empty = (np.full((len(queries), k), -1.0, dtype=np.float32), np.full((len(queries), k), -1, dtype=np.int64))
+        if self._dim is None or not self._row_of or k <= 0:
+            return empty
+        mask = self._allowed_mask(where)
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return empty
+        with self._lock:
+            if where and len(candidates) <= EXACT_FILTER_ROWS:
+                return self._exact_search(queries, k, candidates)
+            return self._index_search(queries, k, mask)
+
+    def _exact_search(self, queries: np.ndarray, k: int, candidates: np.ndarray):
+        """Brute force over a small candidate set (selective filters)."""
+        scores = queries @ np.asarray(self._matrix[candidates], dtype=np.float32).T
+        best = top_k(scores, k)
+        return np.take_along_axis(scores, best, axis=1), candidates[best]
+
+    def _documents(self, sims, rows) -> List[Tuple[Document, float]]:
+        keep = rows >= 0
+        fetched = self._fetch(rows[keep])
+        out = []
+        for row, sim in zip(rows[keep], sims[keep]):
+            if int(row) in fetched:
+                chunk_id, document, metadata = fetched[int(row)]
+                out.append((Document(page_content=document, metadata=metadata, id=chunk_id), float(sim)))
+        return out
+
+    # ------------------------------------------------------------------
+    # rag.vectordb hooks
+    # ------------------------------------------------------------------
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, **kwargs) -> List[str]:
+        texts = [t for t, _ in text_embeddings]
+        vectors = [v for _, v in text_embeddings]
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        return self._write(ids, texts, vectors, metadatas)
+
+    def get_metadatas(self, ids) -> Dict[str, dict]:
+        payload = self._get(ids=list(ids), include=["metadatas"])
+        return dict(zip(payload["ids"], payload["metadatas"]))
+
+    def get_article_rows(self, article_ids):
+        payload = self._get(where={"parent_id": {"$in": list(article_ids)}}, include=["metadatas"])
+        return payload["ids"], payload["metadatas"]
+
+    def update_rows(self, ids, texts=None, embeddings=None, metadatas=None) -> List[str]:
+        with self._lock:
+            present = [i for i, chunk_id in enumerate(ids) if chunk_id in self._row_of]
+            if not present:
+                return []
+            current = self._fetch([self._row_of[ids[i]] for i in present])
+            row_ids = [ids[i] for i in present]
+            docs = [texts[i] if texts is not None else current[self._row_of[ids[i]]][1] for i in present]
+            metas = [merge_metadata(current[self._row_of[ids[i]]][2], metadatas[i] if metadatas is not None else None)
+                     for i in present]
+
+            if embeddings is not None:
+                self._write(row_ids, docs, [embeddings[i] for i in present], metas)
+                return row_ids
+
+            self._db.executemany(
+                "UPDATE rows SET document = ?, metadata = ? WHERE id = ?",
+                [(d, json.dumps(m or {}), chunk_id) for d, m, chunk_id in zip(docs, metas, row_ids)]
+            )
+            self._db.commit()
+            if metadatas is not None:
+                rows = np.asarray([self._row_of[c] for c in row_ids], dtype=np.int64)
+                self._on_rows_removed(rows)
+                self._on_rows_added(rows, metas)
+            return row_ids
+
+    def search_by_vector(self, embedding, k: int = 5, filter: Optional[dict] = None):
+        # Rows are resolved under the same lock, so a compaction cannot renumber them in between
+        with self._lock:
+            sims, rows = self._search_rows(np.asarray([embedding], dtype=np.float32), k, filter)
+            return self._documents(sims[0], rows[0])
+
+    def top1_by_vectors(self, embeddings, where: Optional[dict] = None):
+        n = len(embeddings)
+        out_sims = np.full(n, -1.0, dtype=np.float32)
+        metas = [None] * n
+        with self._lock:
+            sims, rows = self._search_rows(np.asarray(embeddings, dtype=np.float32), 1, where)
+            fetched = self._fetch(rows[rows >= 0])
+        for i in range(n):
+            row = int(rows[i, 0])
+            if row >= 0 and row in fetched:
+                out_sims[i] = sims[i, 0]
+                metas[i] = fetched[row][2]
+        return out_sims, metas
+
+    # ------------------------------------------------------------------
+    # LangChain VectorStore
+    # ------------------------------------------------------------------
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding_function
+
+    @property
+    def _collection(self) -> _CollectionShim:
+        return _CollectionShim(self)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        return self._write(ids, texts, self._embed_documents(texts), metadatas)
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k: int = 4, filter=None, **kwargs):
+        """(Document, distance) pairs; distance = 2 - 2cos, as Chroma reports it."""
+        return [(doc, 2.0 - 2.0 * sim) for doc, sim in self.search_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.search_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter=None, **kwargs):
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance / 2.0
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            self._delete(self._select_rows(ids=list(ids or [])))
+        return True
+
+    def get_by_ids(self, ids) -> List[Document]:
+        payload = self._get(ids=list(ids), include=["documents", "metadatas"])
+        return [Document(page_content=d, metadata=m, id=i)
+                for i, d, m in zip(payload["ids"], payload["documents"], payload["metadatas"])]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, path: str = None, **kwargs: Any) -> "LocalVectorStore":
+        store = cls(path, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    # ------------------------------------------------------------------
+    # Persistence / maintenance
+    # ------------------------------------------------------------------
+    def dead_fraction(self) -> float:
+        return (self._next_row - len(self._row_of)) / self._next_row if self._next_row else 0.0
+
+    def _rebuild_index_locked(self) -> None:
+        self._index_reset()
+        alive = np.flatnonzero(self._alive)
+        if len(alive):
+            self._index_add(alive, np.asarray(self._matrix[alive]))
+
+    def _rewrite_rows_locked(self) -> None:
+        """Copies the live rows to a new vector file and renumbers them 0..n-1."""
+        alive = np.flatnonzero(self._alive)
+        n = len(alive)
+        capacity = _INITIAL_ROWS
+        while capacity < n:
+            capacity *= 2
+        tmp = self._vec_path + ".compact"
+        packed = np.memmap(tmp, dtype=self.VECTOR_DTYPE, mode="w+", shape=(capacity, self._dim))
+        for start in range(0, n, _COMPACT_BATCH):
+            part = alive[start:start + _COMPACT_BATCH]
+            packed[start:start + len(part)] = self._matrix[part]
+        packed.flush()
+        del packed
+
+        # Ascending old rows move to lower-or-equal numbers, so no UPDATE
+        # collides with a row that has not moved yet
+        self._db.executemany("UPDATE rows SET row = ? WHERE row = ?",
+                             [(new, int(old)) for new, old in enumerate(alive) if new != old])
+        self._meta_set("next_row", n)
+        self._meta_set("swap_vectors", 1)
+        self._db.commit()
+        self._matrix = None
+        os.replace(tmp, self._vec_path)
+        self._db.execute("DELETE FROM meta WHERE name = 'swap_vectors'")
+        self._db.commit()
+        self._load_rows()
+        logger.info(f"🧹 Compacted {self.path}: {n} live rows kept")
+
+    def compact(self, rewrite: Optional[bool] = None) -> None:
+        """
+        Rebuilds the index from the live rows. With `rewrite` (default:
+        dead rows past COMPACT_DEAD_FRACTION) the vector file is rewritten
+        and the rows renumbered first, which frees the dead rows' disk.
+        """
+        with self._lock:
+            if self._dim is None:
+                return
+            if rewrite is None:
+                rewrite = self.dead_fraction() > COMPACT_DEAD_FRACTION
+            if rewrite and len(self._row_of) < self._next_row:
+                self._rewrite_rows_locked()
+                self._rebuild_index_locked()
+                # The saved index still names the old row numbers
+                self._index_save()
+                return
+            self._rebuild_index_locked()
+
+    def persist(self) -> None:
+        with self._lock:
+            if self._dim is None:
+                return
+            if self.dead_fraction() > COMPACT_DEAD_FRACTION:
+                self.compact(rewrite=True)   # saves the rebuilt index
+            else:
+                self._index_save()
+
+    def delete_collection(self) -> None:
+        """Removes every row and the vector / index files."""
+        with self._lock:
+            self._db.execute("DELETE FROM rows")
+            self._db.execute("DELETE FROM meta")
+            self._db.commit()
+            self._matrix = None
+            for name in os.listdir(self.path):
+                if name != os.path.basename(self._db_path) and not name.startswith(os.path.basename(self._db_path)):
+                    os.remove(os.path.join(self.path, name))
+            self._dim = None
+            self._next_row = 0
+            self._row_of = {}
+            self._alive = np.zeros(0, dtype=bool)
+            self._meta_index = MetadataIndex()
+            self._index_reset()
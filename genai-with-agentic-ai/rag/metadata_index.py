@@ -0,0 +1,241 @@
+"""
+metadata_index.py
+-----------------
+Secondary indexes over chunk metadata for filtered kNN.
+
+The in-process stores (rag/numpy_store.py, rag/local_store.py) keep one
+MetadataIndex next to their vectors, updated on every write. For a row
+number it holds:
+- category, source domain and chunk index as integer codes (one
+  vectorized compare per filter, no JSON decoding; {"chunk_index": 0}
+  selects the article leads)
+- publish time as epoch seconds (range filters on publishTs or on ISO
+  publishDate strings)
+- tags as postings lists (tag -> rows), for {"tags": {"$contains": tag}}
+
+restrict() turns a Chroma-style `where` into a boolean row mask plus
+whatever part of the filter the indexes cannot answer, so the caller
+only scores (and, for the rest, only inspects) the candidate rows.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+CODED_FIELDS = ("category", "sourceDomain", "chunk_index")
+TIME_FIELDS = ("publishTs", "publishDate")
+
+_RANGE = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+    "$eq": np.equal,
+}
+
+
+def to_timestamp(value) -> float:
+    """Epoch seconds from a number or an ISO date string (NaN if unparseable)."""
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return np.nan
+
+
+def row_fields(metadata: dict) -> Tuple[str, str, float, Tuple[str, ...]]:
+    """(category, source domain, publish time, tags) of one row."""
+    from agents.story_clusters import source_domain
+    from agents.keyword_tagger import parse_tags
+    domain = metadata.get("sourceDomain") or source_domain(metadata.get("source", ""))
+    ts = to_timestamp(metadata.get("publishTs"))
+    if np.isnan(ts):
+        ts = to_timestamp(metadata.get("publishDate"))
+    tags = tuple(sorted({t.lower() for t in parse_tags(metadata.get("tags"))}))
+    return metadata.get("category"), domain, ts, tags
+
+
+class MetadataIndex:
+    """
+    Column-per-field index over row numbers [0, size).
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._codes: Dict[str, Dict[str, int]] = {f: {} for f in CODED_FIELDS}
+        self._columns: Dict[str, np.ndarray] = {f: np.full(0, -1, dtype=np.int32) for f in CODED_FIELDS}
+        self._ts = np.full(0, np.nan)
+        self._present = np.zeros(0, dtype=bool)
+        self._tags: Dict[str, Set[int]] = {}
+        self._row_tags: Dict[int, Tuple[str, ...]] = {}
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._present)
+        if rows <= capacity:
+            return
+        capacity = max(1024, capacity)
+        while capacity < rows:
+            capacity *= 2
+        for field, column in self._columns.items():
+            grown = np.full(capacity, -1, dtype=np.int32)
+            grown[:len(column)] = column
+            self._columns[field] = grown
+        ts = np.full(capacity, np.nan)
+        ts[:len(self._ts)] = self._ts
+        self._ts = ts
+        present = np.zeros(capacity, dtype=bool)
+        present[:len(self._present)] = self._present
+        self._present = present
+
+    def _code(self, field: str, value) -> int:
+        if value is None or value == "":
+            return -1
+        codes = self._codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def add(self, rows, metadatas: List[dict]) -> None:
+        rows = [int(r) for r in rows]
+        if not rows:
+            return
+        self._reserve(max(rows) + 1)
+        self.size = max(self.size, max(rows) + 1)
+        for row, metadata in zip(rows, metadatas):
+            if self._present[row]:
+                self.remove([row])
+            category, domain, ts, tags = row_fields(metadata or {})
+            self._columns["category"][row] = self._code("category", category)
+            self._columns["sourceDomain"][row] = self._code("sourceDomain", domain)
+            self._columns["chunk_index"][row] = self._code("chunk_index", (metadata or {}).get("chunk_index"))
+            self._ts[row] = ts
+            self._present[row] = True
+            if tags:
+                self._row_tags[row] = tags
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(row)
+
+    def remove(self, rows) -> None:
+        for row in rows:
+            row = int(row)
+            if row >= len(self._present) or not self._present[row]:
+                continue
+            for column in self._columns.values():
+                column[row] = -1
+            self._ts[row] = np.nan
+            self._present[row] = False
+            for tag in self._row_tags.pop(row, ()):
+                postings = self._tags.get(tag)
+                if postings is not None:
+                    postings.discard(row)
+                    if not postings:
+                        del self._tags[tag]
+
+    def move(self, src: int, dst: int) -> None:
+        """Re-labels row src as dst (dst must be free)."""
+        self._reserve(dst + 1)
+        for column in self._columns.values():
+            column[dst] = column[src]
+            column[src] = -1
+        self._ts[dst], self._ts[src] = self._ts[src], np.nan
+        self._present[dst], self._present[src] = self._present[src], False
+        tags = self._row_tags.pop(src, ())
+        if tags:
+            self._row_tags[dst] = tags
+            for tag in tags:
+                postings = self._tags[tag]
+                postings.discard(src)
+                postings.add(dst)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _view(self, array: np.ndarray, n: int, fill) -> np.ndarray:
+        if len(array) >= n:
+            return array[:n]
+        out = np.full(n, fill, dtype=array.dtype)
+        out[:len(array)] = array
+        return out
+
+    def _field_mask(self, key: str, cond, n: int) -> Optional[np.ndarray]:
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        present = self._view(self._present, n, False)
+        masks = []
+        for op, target in cond.items():
+            if key in CODED_FIELDS and op in ("$eq", "$ne", "$in", "$nin"):
+                column = self._view(self._columns[key], n, -1)
+                values = [target] if op in ("$eq", "$ne") else list(target)
+                codes = [self._codes[key][v] for v in values if v in self._codes[key]]
+                # Lookup table indexed by code; -1 (missing) hits the last slot
+                table = np.zeros(len(self._codes[key]) + 1, dtype=bool)
+                table[codes] = True
+                hit = table[column]
+                masks.append(hit if op in ("$eq", "$in") else present & ~hit)
+            elif key in TIME_FIELDS and op in _RANGE:
+                bound = to_timestamp(target)
+                if np.isnan(bound):
+                    return None
+                with np.errstate(invalid="ignore"):
+                    masks.append(_RANGE[op](self._view(self._ts, n, np.nan), bound))
+            elif key == "tags" and op == "$contains":
+                hit = np.zeros(n, dtype=bool)
+                rows = [r for r in self._tags.get(str(target).lower(), ()) if r < n]
+                hit[rows] = True
+                masks.append(hit)
+            else:
+                return None
+        return np.logical_and.reduce(masks) if masks else present.copy()
+
+    def restrict(self, where: Optional[dict], n: int) -> Tuple[Optional[np.ndarray], Optional[dict]]:
+        """
+        (mask over rows [0, n) or None, residual filter or None). Rows
+        outside the mask cannot match; the residual still has to be
+        checked on the rows inside it.
+        """
+        if not where:
+            return None, None
+        masks, residual = [], []
+        for key, cond in where.items():
+            if key == "$and":
+                for sub in cond:
+                    mask, rest = self.restrict(sub, n)
+                    if mask is not None:
+                        masks.append(mask)
+                    if rest:
+                        residual.append(rest)
+            elif key == "$or":
+                parts = [self.restrict(sub, n) for sub in cond]
+                if parts and all(mask is not None and not rest for mask, rest in parts):
+                    masks.append(np.logical_or.reduce([mask for mask, _ in parts]))
+                else:
+                    residual.append({"$or": cond})
+            else:
+                mask = self._field_mask(key, cond, n)
+                if mask is None:
+                    residual.append({key: cond})
+                else:
+                    masks.append(mask)
+        mask = np.logical_and.reduce(masks) if masks else None
+        if not residual:
+            return mask, None
+        return mask, residual[0] if len(residual) == 1 else {"$and": residual}
+
+    def stats(self) -> dict:
+        return {
+            "rows": int(self._present[:self.size].sum()),
+            "categories": len(self._codes["category"]),
+            "domains": len(self._codes["sourceDomain"]),
+            "tags": len(self._tags),
+        }
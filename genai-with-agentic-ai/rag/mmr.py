@@ -0,0 +1,108 @@
+"""
+mmr.py
+------
+Diversity-aware article retrieval (maximal marginal relevance).
+
+Instead of fetching k hits and discarding near-duplicates afterwards,
+mmr_search_articles() pulls a pool of MMR_POOL * k candidate articles in
+one hybrid search, drops the ones the caller cannot use, and picks k
+with MMR over their chunk vectors:
+
+    next = argmax  lambda * sim(query, d) - (1 - lambda) * max sim(d, picked)
+
+Each step is one vectorized update over the pool. Candidates that are
+near-identical to a pick (DUPLICATE_SIMILARITY) are never picked, and no
+source domain contributes more than max_per_source articles, so the k
+results are usable as they come back.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MMR_MAX_PER_SOURCE = int(os.getenv("MMR_MAX_PER_SOURCE", "2"))
+MMR_POOL = 4                 # candidate articles per requested article
+DUPLICATE_SIMILARITY = 0.95  # syndicated copies / re-posts of one story
+
+
+def mmr_select(query_vector, vectors, k: int, lambda_mult: float = MMR_LAMBDA,
+               groups: Optional[List[str]] = None, max_per_group: Optional[int] = None,
+               duplicate_similarity: float = DUPLICATE_SIMILARITY) -> List[int]:
+    """Indices of up to k rows of `vectors`, in pick order."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not len(vectors) or k <= 0:
+        return []
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = vectors @ query
+    pairwise = vectors @ vectors.T
+    redundancy = np.full(len(vectors), -np.inf, dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+
+    group_ids = None
+    if groups is not None and max_per_group:
+        _, group_ids = np.unique(np.asarray(groups, dtype=object).astype(str), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=np.int64)
+
+    picked: List[int] = []
+    while len(picked) < k and available.any():
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        score = lambda_mult * relevance - (1.0 - lambda_mult) * penalty
+        score[~available] = -np.inf
+        best = int(np.argmax(score))
+        picked.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+        available &= redundancy < duplicate_similarity
+        if group_ids is not None:
+            group_counts[group_ids[best]] += 1
+            if group_counts[group_ids[best]] >= max_per_group:
+                available &= group_ids != group_ids[best]
+    return picked
+
+
+def _source_of(metadata: dict) -> str:
+    from agents.story_clusters import source_domain
+    return metadata.get("sourceDomain") or source_domain(metadata.get("source", ""))
+
+
+def mmr_search_articles(query: str, query_vector, k: int = 5, filter: Optional[dict] = None,
+                        vectordb=None, lambda_mult: float = MMR_LAMBDA,
+                        max_per_source: int = MMR_MAX_PER_SOURCE,
+                        keep: Optional[Callable] = None) -> List[Tuple[object, float]]:
+    """
+    Up to k diverse (Document, relevance) pairs, one per article. `keep`
+    filters the candidate pool (e.g. unreadable scrapes) before selection.
+    """
+    from rag.bm25_index import hybrid_search_articles
+    from rag.vectordb import fetch_rows, get_vector_db
+
+    vectordb = vectordb or get_vector_db()
+    pool = hybrid_search_articles(query, query_vector, k=k * MMR_POOL, filter=filter, vectordb=vectordb)
+    if keep is not None:
+        pool = [(doc, score) for doc, score in pool if keep(doc)]
+    if not pool:
+        return []
+
+    # Each article is represented by the vector of its best-matching chunk
+    chunk_ids = [doc.id or f"{doc.metadata.get('parent_id')}::{doc.metadata.get('chunk_index', 0)}" for doc, _ in pool]
+    rows = fetch_rows(vectordb, chunk_ids, ["embeddings"])
+    pool = [(pair, rows[c]["embeddings"]) for pair, c in zip(pool, chunk_ids) if c in rows]
+    if not pool:
+        return []
+
+    matrix = np.asarray([v for _, v in pool], dtype=np.float32)
+    picked = mmr_select(
+        query_vector, matrix, k, lambda_mult=lambda_mult,
+        groups=[_source_of(doc.metadata) for (doc, _), _ in pool],
+        max_per_group=max_per_source,
+    )
+    relevance = matrix[picked] @ np.asarray(query_vector, dtype=np.float32)
+    return [(pool[i][0][0], float(r)) for i, r in zip(picked, relevance)]
@@ -0,0 +1,198 @@
+"""
+model_artifacts.py
+------------------
+Offline-first model resolution from a local artifact directory.
+
+Models are fetched once at build time into MODEL_ARTIFACT_DIR (one
+sub-directory per model, safetensors weights only) and recorded in
+manifest.json with their Hub revision and per-file sha256 / size. At
+runtime resolve_model() maps a Hub id to that directory, so
+sentence-transformers and transformers load from disk without revision
+lookups, and weights come from memory-mapped safetensors.
+
+Models missing from the manifest resolve to their Hub id (old behaviour)
+unless MODEL_ARTIFACTS_REQUIRED=1, which turns that into an error.
+
+Build step:
+    python rag/model_artifacts.py prefetch     # default models
+    python rag/model_artifacts.py verify
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", os.path.join(PROJECT_ROOT, "models"))
+MANIFEST_FILE = "manifest.json"
+ARTIFACTS_REQUIRED = os.getenv("MODEL_ARTIFACTS_REQUIRED", "0") == "1"
+
+DEFAULT_MODELS = [
+    "sentence-transformers/all-MiniLM-L6-v2",
+    "google/flan-t5-base",
+]
+
+# Configs, tokenizers and safetensors weights; no .bin / .h5 / onnx copies
+ALLOW_PATTERNS = ["*.json", "*.txt", "*.model", "*.safetensors", "1_Pooling/*"]
+
+_manifest_cache: Optional[dict] = None
+_manifest_lock = threading.Lock()
+
+
+def _manifest_path(root: str = None) -> str:
+    return os.path.join(root or MODEL_ARTIFACT_DIR, MANIFEST_FILE)
+
+
+def load_manifest(root: str = None) -> dict:
+    try:
+        with open(_manifest_path(root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"models": {}}
+
+
+def save_manifest(manifest: dict, root: str = None) -> None:
+    path = _manifest_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _list_files(model_dir: str) -> List[str]:
+    files = []
+    for base, dirs, names in os.walk(model_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]   # skip .cache metadata
+        for name in names:
+            files.append(os.path.relpath(os.path.join(base, name), model_dir))
+    return sorted(files)
+
+
+# ----------------------------------------------------------------------
+# Runtime
+# ----------------------------------------------------------------------
+def resolve_model(model_name: str, root: str = None) -> str:
+    """
+    Local directory for a pinned model, else the Hub id. Only checks that
+    the recorded files exist with the recorded sizes (no hashing).
+    """
+    global _manifest_cache
+    if root is None:
+        with _manifest_lock:
+            if _manifest_cache is None:
+                _manifest_cache = load_manifest()
+            manifest = _manifest_cache
+    else:
+        manifest = load_manifest(root)
+
+    entry = manifest.get("models", {}).get(model_name)
+    if entry:
+        model_dir = os.path.join(root or MODEL_ARTIFACT_DIR, entry["path"])
+        intact = all(
+            os.path.exists(os.path.join(model_dir, rel))
+            and os.path.getsize(os.path.join(model_dir, rel)) == meta["size"]
+            for rel, meta in entry["files"].items()
+        )
+        if intact:
+            return model_dir
+        logger.warning(f"⚠️  Local artifacts for {model_name} are incomplete ({model_dir})")
+
+    if ARTIFACTS_REQUIRED:
+        raise FileNotFoundError(
+            f"{model_name} is not in {_manifest_path(root)} (run: python rag/model_artifacts.py prefetch)"
+        )
+    return model_name
+
+
+# ----------------------------------------------------------------------
+# Build time
+# ----------------------------------------------------------------------
+def prefetch(model_name: str, revision: Optional[str] = None, root: str = None) -> dict:
+    """Downloads a model snapshot into the artifact dir and records it."""
+    from huggingface_hub import HfApi, snapshot_download
+
+    root = root or MODEL_ARTIFACT_DIR
+    sha = HfApi().model_info(model_name, revision=revision).sha
+    rel_dir = model_name.replace("/", "--")
+    model_dir = os.path.join(root, rel_dir)
+    snapshot_download(
+        repo_id=model_name,
+        revision=sha,
+        local_dir=model_dir,
+        allow_patterns=ALLOW_PATTERNS,
+        token=os.getenv("HUGGINGFACE_TOKEN") or os.getenv("HF_TOKEN"),
+    )
+
+    files = {
+        rel: {"sha256": _sha256(os.path.join(model_dir, rel)), "size": os.path.getsize(os.path.join(model_dir, rel))}
+        for rel in _list_files(model_dir)
+    }
+    if not any(rel.endswith(".safetensors") for rel in files):
+        raise RuntimeError(f"{model_name}@{sha} has no safetensors weights")
+
+    entry = {"path": rel_dir, "revision": sha, "fetched_at": time.time(), "files": files}
+    manifest = load_manifest(root)
+    manifest.setdefault("models", {})[model_name] = entry
+    save_manifest(manifest, root)
+    logger.info(f"📦 {model_name}@{sha[:8]} pinned in {model_dir} ({len(files)} files)")
+    return entry
+
+
+def verify(model_names: Optional[List[str]] = None, root: str = None) -> Dict[str, List[str]]:
+    """
+    Re-hashes pinned artifacts. Returns {model: [problems]}; an empty
+    list means the model is intact.
+    """
+    root = root or MODEL_ARTIFACT_DIR
+    manifest = load_manifest(root)
+    models = manifest.get("models", {})
+    results = {}
+    for name in model_names or sorted(models):
+        entry = models.get(name)
+        if entry is None:
+            results[name] = ["not in manifest"]
+            continue
+        model_dir = os.path.join(root, entry["path"])
+        problems = []
+        for rel, meta in entry["files"].items():
+            path = os.path.join(model_dir, rel)
+            if not os.path.exists(path):
+                problems.append(f"missing {rel}")
+            elif os.path.getsize(path) != meta["size"] or _sha256(path) != meta["sha256"]:
+                problems.append(f"checksum mismatch {rel}")
+        results[name] = problems
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    names = sys.argv[2:]
+    if command == "prefetch":
+        for name in names or DEFAULT_MODELS:
+            prefetch(name)
+    elif command == "verify":
+        report = verify(names or None)
+        for name, problems in report.items():
+            print(f"{'OK ' if not problems else 'BAD'} {name}" + "".join(f"\n    {p}" for p in problems))
+        sys.exit(0 if report and not any(report.values()) else 1)
+    else:
+        print("usage: python rag/model_artifacts.py [prefetch|verify] [model ...]")
+        sys.exit(2)
@@ -0,0 +1,167 @@
+"""
+model_lifecycle.py
+------------------
+One-time model load and warmup at startup, plus the readiness state
+behind GET /ready.
+
+The embedder (and, with MODEL_WARMUP_LLM=1, the local Flan-T5 pipeline)
+is loaded on a background thread when the app starts, then run once on
+a short input so first-call allocations and kernel selection happen
+before any user request. get_embedding_model() / get_local_llm() hold a
+lock while loading, so a request racing the startup load waits for it
+instead of loading a second copy.
+
+/ stays a liveness check; /ready answers 503 until every required model
+is warm, so load balancers only route to warm instances.
+
+A failed load is retried with exponential backoff (LOAD_ATTEMPTS tries),
+and any later successful get_embedding_model() call marks the embedder
+ready, so a transient failure (model download, disk) does not keep the
+instance out of rotation for good.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WARMUP_LLM = os.getenv("MODEL_WARMUP_LLM", "0") == "1"
+
+LOAD_ATTEMPTS = int(os.getenv("MODEL_LOAD_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = 2.0     # doubled after every failed attempt
+RETRY_MAX_SECONDS = 60.0
+
+WARMUP_TEXTS = [
+    "Warmup sentence for the embedding model.",
+    "A somewhat longer warmup paragraph so that the first batched forward pass "
+    "sees more than one sequence length before real traffic arrives.",
+]
+
+
+def _innermost(model):
+    """Backend under the cache / batching wrappers (warmup must not hit the cache)."""
+    while hasattr(model, "base"):
+        model = model.base
+    return model
+
+
+def _load_embedder() -> None:
+    from rag.embedder import get_embedding_model
+    backend = _innermost(get_embedding_model())
+    backend.embed_documents(WARMUP_TEXTS)
+    backend.embed_query(WARMUP_TEXTS[0])
+
+
+def _load_llm() -> None:
+    from agents.scraper_agent import _get_llm
+    _get_llm().invoke("Summarize: the service is starting.")
+
+
+class ModelLifecycle:
+    """
+    Tracks load state per model: pending -> loading -> ready | failed,
+    where failed goes back to loading on the next retry.
+    """
+
+    def __init__(self, warmup_llm: bool = WARMUP_LLM, attempts: int = LOAD_ATTEMPTS,
+                 retry_base: float = RETRY_BASE_SECONDS):
+        self.attempts = max(1, attempts)
+        self.retry_base = retry_base
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loaders: Dict[str, Callable[[], None]] = {"embedder": _load_embedder}
+        if warmup_llm:
+            self._loaders["llm"] = _load_llm
+        self._state = {name: {"status": "pending"} for name in self._loaders}
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        """Loads and warms every model once, on a background thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.load_all, name="model-warmup", daemon=True)
+            self._thread.start()
+
+    def load_all(self) -> bool:
+        for name, loader in self._loaders.items():
+            self._load(name, loader)
+        return self.is_ready()
+
+    def _load(self, name: str, loader: Callable[[], None]) -> None:
+        delay = self.retry_base
+        for attempt in range(1, self.attempts + 1):
+            if self._status(name) == "ready":
+                return   # marked ready by a request path meanwhile
+            self._set(name, status="loading", attempt=attempt)
+            start = time.perf_counter()
+            try:
+                loader()
+            except Exception as e:
+                last = attempt == self.attempts
+                self._set(name, status="failed", error=str(e), attempt=attempt,
+                          retry_in=None if last else delay)
+                logger.error(f"❌ {name} failed to load (attempt {attempt}/{self.attempts}): {e}")
+                if not last:
+                    time.sleep(delay)
+                    delay = min(delay * 2, RETRY_MAX_SECONDS)
+                continue
+            secs = round(time.perf_counter() - start, 2)
+            self._set(name, status="ready", load_seconds=secs, attempt=attempt)
+            logger.info(f"🔥 {name} loaded and warmed up in {secs}s")
+            return
+
+    def mark_ready(self, name: str) -> None:
+        """Records a model loaded outside the warmup thread (e.g. by a request)."""
+        with self._lock:
+            state = self._state.get(name)
+            if state is None or state["status"] in ("ready", "loading"):
+                return
+            self._state[name] = {"status": "ready", "recovered": True}
+        logger.info(f"🔥 {name} loaded on demand, marked ready")
+        self._check_ready()
+
+    def _status(self, name: str) -> str:
+        with self._lock:
+            return self._state[name]["status"]
+
+    def _set(self, name: str, **fields) -> None:
+        with self._lock:
+            self._state[name] = fields
+        if fields["status"] == "ready":
+            self._check_ready()
+
+    def _check_ready(self) -> None:
+        if self.is_ready():
+            self._ready.set()
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(s["status"] == "ready" for s in self._state.values())
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def status(self) -> dict:
+        with self._lock:
+            models = {name: dict(s) for name, s in self._state.items()}
+        return {"ready": all(s["status"] == "ready" for s in models.values()), "models": models}
+
+
+_lifecycle = None
+_lifecycle_lock = threading.Lock()
+
+
+def get_model_lifecycle() -> ModelLifecycle:
+    global _lifecycle
+    if _lifecycle is None:
+        with _lifecycle_lock:
+            if _lifecycle is None:
+                _lifecycle = ModelLifecycle()
+    return _lifecycle
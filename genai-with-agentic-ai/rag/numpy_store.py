@@ -0,0 +1,403 @@
+"""
+numpy_store.py
+--------------
+Exact in-memory search over the Chroma collection for small corpora.
+
+Below EXACT_SEARCH_MAX_ROWS rows a brute-force (n, d) x (d, N) product is
+cheaper than a round trip through Chroma's client and HNSW index, so
+get_vector_db() wraps the Chroma store in ExactSearchStore: every vector
+is held normalized in one contiguous float32 matrix, top-k comes from
+argpartition, and metadata filters pre-restrict the candidate rows
+through a MetadataIndex (rag/metadata_index.py). Several queries are
+answered with one matrix product.
+
+Chroma stays the store of record: writes go to Chroma first and then to
+the matrix under one lock, so concurrent writers land in the same order
+in both, and anything this class does not implement (as_retriever,
+_collection, persist, ...) is passed through. When the corpus outgrows
+the threshold the matrix is dropped and searches go to Chroma again.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from rag.metadata_index import MetadataIndex
+
+logger = logging.getLogger(__name__)
+
+EXACT_SEARCH_MAX_ROWS = int(os.getenv("EXACT_SEARCH_MAX_ROWS", "20000"))   # 0 disables
+
+_INITIAL_ROWS = 1024
+_COMPARE = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+
+def merge_metadata(current: Optional[dict], patch: Optional[dict]) -> dict:
+    """Chroma update semantics: keys in `patch` overwrite, None removes, the rest is kept."""
+    merged = dict(current or {})
+    for key, value in (patch or {}).items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return merged
+
+
+def matches_where(metadata: dict, where: Optional[dict]) -> bool:
+    """Python evaluation of a Chroma metadata filter for one row."""
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, sub) for sub in cond):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, target in cond.items():
+            if op == "$eq":
+                ok = value == target
+            elif op == "$ne":
+                ok = value != target
+            elif op == "$in":
+                ok = value in target
+            elif op == "$nin":
+                ok = value not in target
+            elif op == "$contains":
+                from agents.keyword_tagger import parse_tags
+                ok = str(target).lower() in {t.lower() for t in parse_tags(value)}
+            elif op in _COMPARE:
+                try:
+                    ok = value is not None and _COMPARE[op](value, target)
+                except TypeError:
+                    ok = False
+            else:
+                raise ValueError(f"Unsupported filter operator {op}")
+            if not ok:
+                return False
+    return True
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class ExactIndex:
+    """
+    Normalized vectors in one contiguous matrix, with ids, documents,
+    metadata and a MetadataIndex aligned to its rows.
+    Deletes move the last row into the hole, so rows [0, n) are all live.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self._matrix: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[dict] = []
+        self._pos: Dict[str, int] = {}
+        self.meta = MetadataIndex()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[:self.n] if self._matrix is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def _grow(self, rows: int, dim: int) -> None:
+        capacity = self._matrix.shape[0] if self._matrix is not None else 0
+        if rows <= capacity:
+            return
+        capacity = max(capacity, _INITIAL_ROWS)
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        if self._matrix is not None:
+            matrix[:self.n] = self._matrix[:self.n]
+        self._matrix = matrix
+
+    def upsert(self, ids, documents, vectors, metadatas) -> None:
+        vectors = _normalize(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        self._grow(self.n + len(ids), vectors.shape[1])
+        for chunk_id, document, vector, metadata in zip(ids, documents, vectors, metadatas):
+            metadata = metadata or {}
+            pos = self._pos.get(chunk_id)
+            if pos is None:
+                pos = self.n
+                self.n += 1
+                self._pos[chunk_id] = pos
+                self.ids.append(chunk_id)
+                self.documents.append(document)
+                self.metadatas.append(metadata)
+            else:
+                self.documents[pos] = document
+                self.metadatas[pos] = metadata
+            self._matrix[pos] = vector
+            self.meta.add([pos], [metadata])
+
+    def update(self, ids, documents=None, vectors=None, metadatas=None) -> None:
+        if vectors is not None:
+            vectors = _normalize(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        for i, chunk_id in enumerate(ids):
+            pos = self._pos.get(chunk_id)
+            if pos is None:
+                continue
+            if documents is not None:
+                self.documents[pos] = documents[i]
+            if vectors is not None:
+                self._matrix[pos] = vectors[i]
+            if metadatas is not None:
+                self.metadatas[pos] = merge_metadata(self.metadatas[pos], metadatas[i])
+                self.meta.add([pos], [self.metadatas[pos]])
+
+    def remove(self, ids) -> None:
+        for chunk_id in ids:
+            pos = self._pos.pop(chunk_id, None)
+            if pos is None:
+                continue
+            last = self.n - 1
+            self.meta.remove([pos])
+            if pos != last:
+                moved = self.ids[last]
+                self.meta.move(last, pos)
+                self._matrix[pos] = self._matrix[last]
+                self.ids[pos] = moved
+                self.documents[pos] = self.documents[last]
+                self.metadatas[pos] = self.metadatas[last]
+                self._pos[moved] = pos
+            self.ids.pop()
+            self.documents.pop()
+            self.metadatas.pop()
+            self.n -= 1
+
+    def mask(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        """Rows matching the filter, or None for no filter."""
+        if not where:
+            return None
+        mask, residual = self.meta.restrict(where, self.n)
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        if residual:
+            for i in np.flatnonzero(mask):
+                mask[i] = matches_where(self.metadatas[i], residual)
+        return mask
+
+    def search(self, queries: np.ndarray, k: int, where: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(cosine sims, row positions), shape (n_queries, <= k), best first."""
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        mask = self.mask(where)
+        if mask is None:
+            matrix, rows = self.matrix, None
+        else:
+            rows = np.flatnonzero(mask)
+            matrix = self.matrix[rows]
+        if len(matrix) == 0:
+            return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+        scores = queries @ matrix.T
+        best = top_k(scores, k)
+        sims = np.take_along_axis(scores, best, axis=1)
+        return sims, (rows[best] if rows is not None else best)
+
+
+class ExactSearchStore:
+    """
+    Chroma store plus an ExactIndex mirror used for every search.
+    """
+
+    def __init__(self, store, max_rows: int = EXACT_SEARCH_MAX_ROWS):
+        self.store = store
+        self.max_rows = max_rows
+        self._lock = threading.RLock()
+        self._index: Optional[ExactIndex] = self._load()
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def _load(self) -> Optional[ExactIndex]:
+        if self.store._collection.count() > self.max_rows:
+            return None
+        rows = self.store._collection.get(include=["embeddings", "documents", "metadatas"])
+        index = ExactIndex()
+        ids = rows.get("ids") or []
+        if ids:
+            index.upsert(ids, rows["documents"], np.asarray(rows["embeddings"], dtype=np.float32), rows["metadatas"])
+        logger.info(f"🧮 Exact in-memory search over {index.n} vectors")
+        return index
+
+    @property
+    def active(self) -> bool:
+        return self._index is not None
+
+    def _check_size(self) -> None:
+        if self._index is not None and self._index.n > self.max_rows:
+            logger.info(f"📈 {self._index.n} vectors exceed EXACT_SEARCH_MAX_ROWS, searching through Chroma")
+            self._index = None
+
+    def _documents(self, sims: np.ndarray, rows: np.ndarray) -> List[Tuple[Document, float]]:
+        index = self._index
+        return [
+            (Document(page_content=index.documents[r], metadata=index.metadatas[r], id=index.ids[r]), float(s))
+            for s, r in zip(sims, rows)
+        ]
+
+    # ------------------------------------------------------------------
+    # Writes: Chroma first, then the mirror, both under the lock
+    # ------------------------------------------------------------------
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, **kwargs) -> List[str]:
+        text_embeddings = list(text_embeddings)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in text_embeddings]
+        metadatas = list(metadatas) if metadatas is not None else [{}] * len(ids)
+        texts = [t for t, _ in text_embeddings]
+        vectors = [v for _, v in text_embeddings]
+        with self._lock:
+            self.store._collection.upsert(ids=ids, embeddings=vectors, metadatas=metadatas, documents=texts)
+            if self._index is not None:
+                self._index.upsert(ids, texts, vectors, metadatas)
+                self._check_size()
+        return ids
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs) -> List[str]:
+        texts = list(texts)
+        vectors = self.store.embeddings.embed_documents(texts)
+        return self.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+
+    def add_documents(self, documents, ids=None, **kwargs) -> List[str]:
+        return self.add_texts(
+            [d.page_content for d in documents], metadatas=[d.metadata for d in documents], ids=ids
+        )
+
+    def update_rows(self, ids, texts=None, embeddings=None, metadatas=None) -> List[str]:
+        with self._lock:
+            if self._index is not None:
+                present = [i for i, chunk_id in enumerate(ids) if chunk_id in self._index._pos]
+                ids = [ids[i] for i in present]
+                texts = [texts[i] for i in present] if texts is not None else None
+                embeddings = [embeddings[i] for i in present] if embeddings is not None else None
+                metadatas = [metadatas[i] for i in present] if metadatas is not None else None
+                if not ids:
+                    return []
+            self.store._collection.update(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+            if self._index is not None:
+                self._index.update(ids, texts, embeddings, metadatas)
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        with self._lock:
+            # Resolve a metadata filter to row ids before Chroma drops the rows
+            targets = self._delete_targets(ids, kwargs.get("where"))
+            result = self.store.delete(ids=ids, **kwargs)
+            if self._index is not None:
+                if kwargs.get("where_document"):
+                    self._index = self._load()   # document filters are not mirrored
+                else:
+                    self._index.remove(targets)
+        return result
+
+    def _delete_targets(self, ids, where) -> List[str]:
+        if self._index is None:
+            return []
+        if not where:
+            return list(ids or [])
+        index = self._index
+        matched = [index.ids[i] for i in np.flatnonzero(index.mask(where))]
+        if ids is None:
+            return matched
+        wanted = set(ids)
+        return [i for i in matched if i in wanted]
+
+    def delete_collection(self) -> None:
+        self.store.delete_collection()
+        with self._lock:
+            self._index = ExactIndex()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get_metadatas(self, ids) -> Dict[str, dict]:
+        with self._lock:
+            if self._index is not None:
+                index = self._index
+                return {i: index.metadatas[index._pos[i]] for i in ids if i in index._pos}
+        rows = self.store._collection.get(ids=list(ids), include=["metadatas"])
+        return dict(zip(rows.get("ids") or [], rows.get("metadatas") or []))
+
+    def search_by_vector(self, embedding, k: int = 5, filter: Optional[dict] = None):
+        with self._lock:
+            if self._index is not None:
+                sims, rows = self._index.search(np.asarray([embedding], dtype=np.float32), k, filter)
+                return self._documents(sims[0], rows[0])
+        from rag.vectordb import search_by_vector
+        return search_by_vector(self.store, embedding, k=k, filter=filter)
+
+    def search_by_vectors(self, embeddings, k: int = 5, filter: Optional[dict] = None):
+        """search_by_vector for several queries with one matrix product."""
+        with self._lock:
+            if self._index is not None:
+                sims, rows = self._index.search(np.asarray(embeddings, dtype=np.float32), k, filter)
+                return [self._documents(s, r) for s, r in zip(sims, rows)]
+        return [self.search_by_vector(e, k=k, filter=filter) for e in embeddings]
+
+    def has_matches(self, where: Optional[dict]) -> bool:
+        with self._lock:
+            if self._index is not None:
+                return self._index.n > 0 and (not where or bool(self._index.mask(where).any()))
+        return bool(self.store._collection.get(where=where or None, limit=1, include=[])["ids"])
+
+    def top1_by_vectors(self, embeddings, where: Optional[dict] = None):
+        with self._lock:
+            if self._index is not None:
+                n = len(embeddings)
+                out_sims = np.full(n, -1.0, dtype=np.float32)
+                metas = [None] * n
+                sims, rows = self._index.search(np.asarray(embeddings, dtype=np.float32), 1, where)
+                if rows.shape[1]:
+                    out_sims[:] = sims[:, 0]
+                    metas = [self._index.metadatas[r] for r in rows[:, 0]]
+                return out_sims, metas
+        from rag.vectordb import top1_by_vectors
+        return top1_by_vectors(self.store, embeddings, where=where)
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k: int = 4, filter=None, **kwargs):
+        """(Document, distance) pairs; distance = 2 - 2cos, as Chroma reports it."""
+        return [(doc, 2.0 - 2.0 * sim) for doc, sim in self.search_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.search_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter=None, **kwargs):
+        embedding = self.store.embeddings.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
@@ -0,0 +1,206 @@
+"""
+onnx_embedder.py
+----------------
+ONNX Runtime backend for all-MiniLM-L6-v2 (EMBEDDING_BACKEND=onnx).
+
+The encoder is exported once to ONNX and dynamically quantized to int8
+weights; inference then runs on onnxruntime's CPU provider with the Rust
+("fast") tokenizer, so serving needs neither PyTorch nor
+sentence-transformers. Pooling matches the sentence-transformers model
+(attention-masked mean, then L2 normalization), so vectors stay
+cosine-compatible with those already in the store.
+
+Export (needs torch, transformers, onnx and onnxruntime, once per host):
+    python rag/onnx_embedder.py export
+Quick throughput check against the PyTorch backend:
+    python rag/onnx_embedder.py bench
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import logging
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(PROJECT_ROOT, "models", "all-MiniLM-L6-v2-onnx"))
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_FP32_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+ONNX_BATCH_SIZE = 32
+ONNX_MAX_TOKENS = 256
+
+
+def export_quantized(model_name: str, out_dir: str = ONNX_MODEL_DIR, max_tokens: int = ONNX_MAX_TOKENS) -> str:
+    """
+    Exports the HF encoder to ONNX, quantizes its weights to int8 and
+    saves the fast tokenizer next to it. Returns the quantized model path.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    class _Encoder(torch.nn.Module):
+        # Keyword call: the positional order of forward() differs between
+        # transformers releases
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.encoder(input_ids=input_ids, attention_mask=attention_mask,
+                                token_type_ids=token_type_ids).last_hidden_state
+
+    sample = tokenizer(["export sample"], return_tensors="pt", padding="max_length",
+                       truncation=True, max_length=16)
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    axes = {0: "batch", 1: "sequence"}
+    fp32_path = os.path.join(out_dir, ONNX_FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(model), inputs, fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": axes, "attention_mask": axes, "token_type_ids": axes,
+                "last_hidden_state": axes,
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+
+    # tokenizer.json is what the serving side loads
+    tokenizer.model_max_length = max_tokens
+    tokenizer.save_pretrained(out_dir)
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    int8_path = os.path.join(out_dir, ONNX_MODEL_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8, per_channel=True)
+    logger.info(f"✅ Exported {model_name} to {int8_path}")
+    return int8_path
+
+
+def mean_pool(hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Attention-masked mean over tokens, L2-normalized (sentence-transformers pooling)."""
+    mask = mask[:, :, None].astype(np.float32)
+    summed = (hidden * mask).sum(axis=1)
+    pooled = summed / np.maximum(mask.sum(axis=1), 1e-9)
+    return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+
+class _Client:
+    """Mirrors the bits of SentenceTransformer that callers read via .client."""
+
+    def __init__(self, tokenizer, max_seq_length: int):
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    LangChain Embeddings over an int8 ONNX graph. Vectors are normalized.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, model_file: str = ONNX_MODEL_FILE,
+                 batch_size: int = ONNX_BATCH_SIZE, max_tokens: int = ONNX_MAX_TOKENS,
+                 threads: int = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        from transformers import PreTrainedTokenizerFast
+
+        model_path = os.path.join(model_dir, model_file)
+        tokenizer_path = os.path.join(model_dir, TOKENIZER_FILE)
+        if not os.path.exists(model_path) or not os.path.exists(tokenizer_path):
+            raise FileNotFoundError(
+                f"ONNX model not found in {model_dir} (run: python rag/onnx_embedder.py export)"
+            )
+
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(max_length=max_tokens)
+        self._tokenizer.enable_padding(pad_id=self._tokenizer.token_to_id("[PAD]") or 0)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        # HF-compatible view of the same tokenizer for the chunk splitter
+        self.client = _Client(
+            PreTrainedTokenizerFast(tokenizer_file=tokenizer_path, model_max_length=max_tokens),
+            max_tokens,
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+        return mean_pool(hidden, mask)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([
+            self._encode_batch(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]).astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+
+def _bench(n: int = 512):
+    from rag.embedder import EMBEDDING_MODEL_NAME
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    texts = [f"Sample news paragraph {i} about markets, elections and sport. " * (1 + i % 8) for i in range(n)]
+    onnx_model = OnnxEmbeddings()
+    torch_model = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    for name, model in (("torch", torch_model), ("onnx-int8", onnx_model)):
+        model.embed_documents(texts[:8])
+        start = time.perf_counter()
+        vectors = np.asarray(model.embed_documents(texts))
+        secs = time.perf_counter() - start
+        print(f"{name:10s} {n / secs:8.1f} texts/s")
+        if name == "torch":
+            reference = vectors
+    print(f"min cosine vs torch: {float((reference * vectors).sum(axis=1).min()):.4f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    if command == "export":
+        from rag.embedder import EMBEDDING_MODEL_NAME
+        from rag.model_artifacts import resolve_model
+        export_quantized(resolve_model(EMBEDDING_MODEL_NAME))
+    elif command == "bench":
+        _bench()
+    else:
+        print("usage: python rag/onnx_embedder.py [export|bench]")
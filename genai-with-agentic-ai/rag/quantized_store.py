@@ -0,0 +1,222 @@
+"""
+quantized_store.py
+------------------
+Int8 scalar-quantized vector backend (VECTOR_BACKEND=quantized).
+
+Candidate search runs over one uint8 code per dimension held in RAM
+(per-dimension offset and step, trained on the stored vectors), a
+quarter of the float32 footprint. The best RERANK_FACTOR * k candidates
+are then re-scored exactly against the float16 originals, which stay
+on disk in the memory-mapped vectors.f16 (see rag/local_store.py), so
+only the pages of re-ranked rows are read.
+
+Codes are saved to codes.npy on persist(). The quantizer is re-trained
+from the originals whenever the store has doubled since the last
+training, so the ranges follow the corpus.
+
+    python rag/quantized_store.py report [n_queries]
+
+prints recall@10 (codes only, and codes + re-rank) against exact
+search over the stored originals, next to the memory each
+representation takes.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import logging
+from typing import Tuple
+
+import numpy as np
+
+from rag.local_store import LocalVectorStore
+from rag.numpy_store import top_k
+
+logger = logging.getLogger(__name__)
+
+RERANK_FACTOR = int(os.getenv("QUANT_RERANK_FACTOR", "4"))
+MIN_RERANK = 50
+SCAN_BLOCK = 4096   # code rows converted to float per matmul block (cache-sized)
+
+CODES_FILE = "codes.npy"
+QUANT_META_FILE = "quantizer.json"
+
+
+class ScalarQuantizer:
+    """Per-dimension affine map of [lo, hi] onto 0..255."""
+
+    def __init__(self, lo: np.ndarray, step: np.ndarray):
+        self.lo = lo.astype(np.float32)
+        self.step = step.astype(np.float32)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, margin: float = 0.05) -> "ScalarQuantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        lo, hi = vectors.min(axis=0), vectors.max(axis=0)
+        pad = (hi - lo) * margin
+        lo, hi = lo - pad, hi + pad
+        return cls(lo, np.maximum(hi - lo, 1e-6) / 255.0)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - self.lo) / self.step)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.step + self.lo
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """queries . decode(codes) without materializing the decoded matrix."""
+        bias = queries @ self.lo
+        weighted = queries * self.step
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        # One cache-sized float buffer, refilled per block of codes
+        buffer = np.empty((min(SCAN_BLOCK, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK):
+            block = codes[start:start + SCAN_BLOCK]
+            buffer[:len(block)] = block
+            np.matmul(weighted, buffer[:len(block)].T, out=out[:, start:start + len(block)])
+        out += bias[:, None]
+        return out
+
+
+class QuantizedVectorStore(LocalVectorStore):
+
+    VECTOR_DTYPE = np.float16
+
+    def __init__(self, path: str, embedding_function=None, collection_name: str = "news_articles"):
+        self._quantizer = None
+        self._codes = np.zeros((0, 0), dtype=np.uint8)
+        self._trained_rows = 0
+        super().__init__(path, embedding_function=embedding_function, collection_name=collection_name)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _index_reset(self) -> None:
+        self._quantizer = None
+        self._trained_rows = 0
+        self._codes = np.zeros((0, self._dim or 0), dtype=np.uint8)
+
+    def _train_locked(self) -> None:
+        alive = np.flatnonzero(self._alive)
+        originals = np.asarray(self._matrix[alive], dtype=np.float32)
+        self._quantizer = ScalarQuantizer.train(originals)
+        self._trained_rows = len(alive)
+        self._codes = np.zeros((self._next_row, self._dim), dtype=np.uint8)
+        self._codes[alive] = self._quantizer.encode(originals)
+        logger.info(f"🗜️  Trained int8 quantizer on {len(alive)} vectors")
+
+    def _index_add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if self._quantizer is None or len(self._row_of) >= 2 * self._trained_rows:
+            # (Re)train whenever the store has doubled: amortized O(1) per row
+            self._train_locked()
+            return
+        rows = np.asarray(rows, dtype=np.int64)
+        needed = int(rows.max()) + 1
+        if needed > len(self._codes):
+            grown = np.zeros((max(needed, 2 * len(self._codes)), self._dim), dtype=np.uint8)
+            grown[:len(self._codes)] = self._codes
+            self._codes = grown
+        self._codes[rows] = self._quantizer.encode(vectors)
+
+    def _index_search(self, queries: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(mask)
+        scores = self._quantizer.scores(queries, self._codes[:n])
+        scores[:, ~mask] = -np.inf
+        depth = min(max(RERANK_FACTOR * k, MIN_RERANK), int(mask.sum()))
+        candidates = top_k(scores, depth)
+
+        # Exact re-score of the candidates from the float16 originals
+        originals = np.asarray(self._matrix[candidates.ravel()], dtype=np.float32)
+        exact = np.einsum("qd,qcd->qc", queries, originals.reshape(candidates.shape + (self._dim,)))
+        best = top_k(exact, k)
+        return np.take_along_axis(exact, best, axis=1), np.take_along_axis(candidates, best, axis=1)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _index_save(self) -> None:
+        if self._quantizer is None:
+            return
+        path = os.path.join(self.path, CODES_FILE)
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, self._codes[:self._next_row])
+        os.replace(path + ".tmp", path)
+        meta_path = os.path.join(self.path, QUANT_META_FILE)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "lo": self._quantizer.lo.tolist(),
+                "step": self._quantizer.step.tolist(),
+                "trained_rows": self._trained_rows,
+                "rows": self._next_row,
+            }, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _index_load(self) -> int:
+        try:
+            with open(os.path.join(self.path, QUANT_META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            codes = np.load(os.path.join(self.path, CODES_FILE))
+        except (OSError, ValueError):
+            return 0
+        self._quantizer = ScalarQuantizer(np.asarray(meta["lo"]), np.asarray(meta["step"]))
+        self._trained_rows = int(meta["trained_rows"])
+        self._codes = codes
+        return int(meta["rows"])
+
+    # ------------------------------------------------------------------
+    # Report
+    # ------------------------------------------------------------------
+    def memory_report(self) -> dict:
+        rows, dim = len(self._row_of), self._dim or 0
+        return {
+            "rows": rows,
+            "dim": dim,
+            "codes_ram_mb": round(rows * dim / 1e6, 2),
+            "float16_disk_mb": round(rows * dim * 2 / 1e6, 2),
+            "float32_ram_mb": round(rows * dim * 4 / 1e6, 2),
+        }
+
+
+def recall_report(store: QuantizedVectorStore, n_queries: int = 200, k: int = 10, seed: int = 0) -> dict:
+    """recall@k of codes-only and codes + re-rank search against exact search over the originals."""
+    alive = np.flatnonzero(store._alive)
+    if not len(alive):
+        return {"queries": 0, **store.memory_report()}
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(alive, size=min(n_queries, len(alive)), replace=False)
+    originals = np.asarray(store._matrix[alive], dtype=np.float32)
+    queries = originals[np.searchsorted(alive, picks)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    truth = alive[top_k(queries @ originals.T, k)]
+    mask = store._alive.copy()
+    coarse = store._quantizer.scores(queries, store._codes[:len(mask)])
+    coarse[:, ~mask] = -np.inf
+    codes_only = top_k(coarse, k)
+    _, reranked = store._index_search(queries, k, mask)
+
+    def recall(found):
+        return round(float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])), 4)
+
+    return {
+        "queries": len(queries),
+        f"recall@{k}_codes": recall(codes_only),
+        f"recall@{k}_reranked": recall(reranked),
+        **store.memory_report(),
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command != "report":
+        print("usage: python rag/quantized_store.py report [n_queries]")
+        sys.exit(2)
+    from rag.vectordb import CHROMA_DIR
+    store = QuantizedVectorStore(os.path.join(CHROMA_DIR, "quantized"))
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(json.dumps(recall_report(store, n_queries), indent=2))
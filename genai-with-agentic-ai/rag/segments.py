@@ -0,0 +1,658 @@
+"""
+segments.py
+-----------
+Time-partitioned vector backend (VECTOR_BACKEND=segmented).
+
+Rows are split into one segment per UTC publish day (publishTs, else
+publishDate, else the time of writing), each a store directory of its
+own under vector_store/segments/:
+
+    2026-10-18.hot/       float32 rows scored exactly (FlatVectorStore)
+    2026-10-09.archive/   int8 codes in RAM + float16 originals on disk
+                          (rag/quantized_store.py), side table VACUUMed
+
+roll() moves segments older than SEGMENT_HOT_DAYS to the archive tier
+and deletes segments older than SEGMENT_RETENTION_DAYS as whole
+directories, so history is kept at a quarter of the RAM and expiry never
+scans rows. An archive is rebuilt into a fresh directory from a snapshot
+of the day's live ids without holding the store lock; the lock is only
+taken to check that no write reached that day meanwhile and to swap the
+directory in by rename. Reads pin the segments they visit, so a segment
+swapped out or expired mid-read is closed when its last reader is done.
+
+Searches only visit the segments a filter's publishTs / publishDate
+range touches ({"publishTs": {"$gte": time.time() - 86400}} reads one or
+two segments) and merge the per-segment top k. The store exposes the
+same rag.vectordb hooks and `_collection` subset as rag/local_store.py.
+
+    python rag/segments.py stats
+    python rag/segments.py roll
+
+print the segment list, or archive / expire segments now.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calendar
+import json
+import logging
+import math
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from rag.local_store import LocalVectorStore
+from rag.metadata_index import to_timestamp
+from rag.quantized_store import QuantizedVectorStore
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_HOT_DAYS = int(os.getenv("SEGMENT_HOT_DAYS", "2"))
+SEGMENT_RETENTION_DAYS = int(os.getenv("SEGMENT_RETENTION_DAYS", "30"))
+DAY_SECONDS = 86400
+_TIME_FIELDS = ("publishTs", "publishDate")
+_COPY_BATCH = 2048   # rows per write when rebuilding a segment as archive
+ARCHIVE_ATTEMPTS = 3   # lock-free rebuilds of a day still being written to
+
+
+def segment_day(metadata: dict, now: Optional[float] = None) -> str:
+    """UTC day (YYYY-MM-DD) a row belongs to."""
+    ts = to_timestamp(metadata.get("publishTs"))
+    if math.isnan(ts):
+        ts = to_timestamp(metadata.get("publishDate"))
+    if math.isnan(ts):
+        ts = time.time() if now is None else now
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+def day_start(day: str) -> float:
+    return float(calendar.timegm(time.strptime(day, "%Y-%m-%d")))
+
+
+def time_bounds(where: Optional[dict]) -> Tuple[float, float]:
+    """
+    [lo, hi] publish-time range a Chroma filter restricts rows to;
+    (-inf, inf) when it does not (including anything under $or).
+    """
+    lo, hi = -math.inf, math.inf
+    for key, cond in (where or {}).items():
+        if key == "$and":
+            for sub in cond:
+                sub_lo, sub_hi = time_bounds(sub)
+                lo, hi = max(lo, sub_lo), min(hi, sub_hi)
+            continue
+        if key not in _TIME_FIELDS:
+            continue
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, value in cond.items():
+            ts = to_timestamp(value)
+            if math.isnan(ts):
+                continue
+            if op in ("$gt", "$gte", "$eq"):
+                lo = max(lo, ts)
+            if op in ("$lt", "$lte", "$eq"):
+                hi = min(hi, ts)
+    return lo, hi
+
+
+class FlatVectorStore(LocalVectorStore):
+    """Hot segment: the float32 vector file is the index, scored exactly."""
+
+    def _index_reset(self) -> None:
+        pass
+
+    def _index_add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        pass
+
+    def _index_search(self, queries: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self._exact_search(queries, k, np.flatnonzero(mask))
+
+
+_TIERS = {"hot": FlatVectorStore, "archive": QuantizedVectorStore}
+
+
+def _close(store: LocalVectorStore) -> None:
+    with store._lock:
+        store._db.close()
+        store._matrix = None
+
+
+class _SegmentedCollection:
+    """The subset of chromadb.Collection the code base calls on `_collection`."""
+
+    def __init__(self, store: "SegmentedVectorStore"):
+        self._store = store
+        self.name = store.collection_name
+
+    def count(self) -> int:
+        return self._store.count()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None, **_):
+        include = include or ["metadatas", "documents"]
+        store = self._store
+        if ids is not None:
+            with store._reading(ids=ids) as located:
+                parts = [seg._collection.get(ids=day_ids, where=where, include=include)
+                         for seg, day_ids in located]
+        else:
+            parts, found = [], 0
+            wanted = None if limit is None else (offset or 0) + limit
+            with store._reading(where) as segments:
+                for seg in segments:
+                    if wanted is not None and found >= wanted:
+                        break
+                    part = seg._collection.get(where=where, include=include,
+                                               limit=None if wanted is None else wanted - found)
+                    found += len(part["ids"])
+                    parts.append(part)
+        out = _merge_payloads(parts, include, store._dim())
+        if ids is None and (offset or limit is not None):
+            start = offset or 0
+            end = None if limit is None else start + limit
+            out = {key: value[start:end] for key, value in out.items()}
+        return out
+
+    def query(self, query_embeddings=None, query_texts=None, n_results=10, where=None, include=None, **_):
+        include = include or ["metadatas", "documents", "distances"]
+        store = self._store
+        if query_embeddings is None:
+            query_embeddings = store._embed_documents(list(query_texts))
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        fields = list(include) + ([] if "distances" in include else ["distances"])
+        with store._reading(where) as segments:
+            parts = [seg._collection.query(query_embeddings=queries, n_results=n_results, where=where,
+                                           include=fields)
+                     for seg in segments]
+
+        out = {key: [] for key in ["ids"] + list(include)}
+        for q in range(len(queries)):
+            hits = []
+            for part in parts:
+                for j in range(len(part["ids"][q])):
+                    hits.append((part["distances"][q][j], part, j))
+            hits.sort(key=lambda hit: hit[0])
+            hits = hits[:n_results]
+            out["ids"].append([part["ids"][q][j] for _, part, j in hits])
+            for key in include:
+                out[key].append([part[key][q][j] for _, part, j in hits])
+        return out
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None, **_):
+        if embeddings is None:
+            embeddings = self._store._embed_documents(documents)
+        self._store._write(ids, documents, embeddings, metadatas)
+
+    add = upsert
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None, **_):
+        self._store.update_rows(ids, texts=documents, embeddings=embeddings, metadatas=metadatas)
+
+    def delete(self, ids=None, where=None, **_):
+        store = self._store
+        with store._lock:
+            if ids is not None:
+                for day, day_ids in store._locate_days(ids):
+                    store._changed(day)
+                    store._segments[day]._collection.delete(ids=day_ids, where=where)
+                return
+            for day in store._touched_days(where):
+                store._changed(day)
+                store._segments[day]._collection.delete(where=where)
+
+
+def _merge_payloads(parts: List[dict], include, dim: int) -> dict:
+    out = {"ids": [chunk_id for part in parts for chunk_id in part["ids"]]}
+    for key in include:
+        if key == "embeddings":
+            arrays = [np.asarray(part[key], dtype=np.float32) for part in parts if len(part["ids"])]
+            out[key] = np.concatenate(arrays) if arrays else np.zeros((0, dim), dtype=np.float32)
+        else:
+            out[key] = [value for part in parts for value in part[key]]
+    return out
+
+
+class SegmentedVectorStore(VectorStore):
+    """
+    One LocalVectorStore per publish day. Writes are routed by
+    segment_day(); reads fan out to the segments a filter touches.
+    """
+
+    def __init__(self, path: str, embedding_function: Optional[Embeddings] = None,
+                 collection_name: str = "news_articles",
+                 hot_days: int = SEGMENT_HOT_DAYS, retention_days: int = SEGMENT_RETENTION_DAYS):
+        self.path = path
+        self.collection_name = collection_name
+        self.hot_days = hot_days
+        self.retention_days = retention_days
+        self._embedding_function = embedding_function
+        self._lock = threading.RLock()
+        self._roll_lock = threading.Lock()
+        self._segments: Dict[str, LocalVectorStore] = {}
+        self._tiers: Dict[str, str] = {}
+        self._day_of: Dict[str, str] = {}     # chunk id -> segment day
+        self._changes: Dict[str, int] = {}    # writes per day, checked by roll()
+        self._readers: Dict[int, int] = {}    # id(segment) -> reads in flight
+        self._retired: Dict[int, LocalVectorStore] = {}   # closed when their last read ends
+        os.makedirs(path, exist_ok=True)
+        self._load_segments()
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+    def _segment_path(self, day: str, tier: str) -> str:
+        return os.path.join(self.path, f"{day}.{tier}")
+
+    def _open_segment(self, day: str, tier: str) -> LocalVectorStore:
+        return _TIERS[tier](self._segment_path(day, tier), embedding_function=self._embedding_function,
+                            collection_name=self.collection_name)
+
+    def _load_segments(self) -> None:
+        found: Dict[str, set] = {}
+        for name in os.listdir(self.path):
+            full = os.path.join(self.path, name)
+            day, _, tier = name.partition(".")
+            if tier not in _TIERS:
+                # Leftover of an interrupted archive rebuild
+                shutil.rmtree(full, ignore_errors=True)
+                continue
+            found.setdefault(day, set()).add(tier)
+        for day in sorted(found):
+            tier = "archive" if "archive" in found[day] else "hot"
+            if tier == "archive" and "hot" in found[day]:
+                # Crashed after the archive was swapped in, before the hot copy went
+                shutil.rmtree(self._segment_path(day, "hot"), ignore_errors=True)
+            self._segments[day] = self._open_segment(day, tier)
+            self._tiers[day] = tier
+            self._day_of.update(dict.fromkeys(self._segments[day]._row_of, day))
+
+    def _segment_for_write(self, day: str) -> LocalVectorStore:
+        seg = self._segments.get(day)
+        if seg is None:
+            seg = self._segments[day] = self._open_segment(day, "hot")
+            self._tiers[day] = "hot"
+        return seg
+
+    def _touched_days(self, where: Optional[dict]) -> List[str]:
+        """Days whose segment overlaps the filter's time range, newest first."""
+        lo, hi = time_bounds(where)
+        with self._lock:
+            return [d for d in sorted(self._segments, reverse=True)
+                    if day_start(d) <= hi and day_start(d) + DAY_SECONDS > lo]
+
+    def _touched(self, where: Optional[dict]) -> List[LocalVectorStore]:
+        with self._lock:
+            return [self._segments[d] for d in self._touched_days(where)]
+
+    def _locate_days(self, ids) -> List[Tuple[str, List[str]]]:
+        """(day, ids its segment holds) pairs for a list of chunk ids, newest first."""
+        with self._lock:
+            grouped: Dict[str, List[str]] = {}
+            for chunk_id in ids:
+                day = self._day_of.get(chunk_id)
+                if day is None:
+                    continue
+                if day not in self._segments or chunk_id not in self._segments[day]._row_of:
+                    # Removed behind the map's back (a where-delete)
+                    self._day_of.pop(chunk_id, None)
+                    continue
+                grouped.setdefault(day, []).append(chunk_id)
+            return sorted(grouped.items(), reverse=True)
+
+    def _locate(self, ids) -> List[Tuple[LocalVectorStore, List[str]]]:
+        """(segment, ids it holds) pairs for a list of chunk ids."""
+        with self._lock:
+            return [(self._segments[day], day_ids) for day, day_ids in self._locate_days(ids)]
+
+    def _pin(self, segments: List[LocalVectorStore]) -> None:
+        with self._lock:
+            for seg in segments:
+                self._readers[id(seg)] = self._readers.get(id(seg), 0) + 1
+
+    def _unpin(self, segments: List[LocalVectorStore]) -> None:
+        with self._lock:
+            for seg in segments:
+                left = self._readers[id(seg)] - 1
+                if left:
+                    self._readers[id(seg)] = left
+                    continue
+                del self._readers[id(seg)]
+                retired = self._retired.pop(id(seg), None)
+                if retired is not None:
+                    _close(retired)
+
+    def _retire_locked(self, seg: LocalVectorStore) -> None:
+        """Closes a segment that left self._segments, or defers that to its last reader."""
+        if self._readers.get(id(seg)):
+            self._retired[id(seg)] = seg
+        else:
+            _close(seg)
+
+    @contextmanager
+    def _reading(self, where: Optional[dict] = None, ids=None):
+        """
+        The segments a read visits (_touched(where), or _locate(ids) pairs),
+        pinned so roll() cannot close them until the read is done.
+        """
+        with self._lock:
+            parts = self._touched(where) if ids is None else self._locate(ids)
+            segments = parts if ids is None else [seg for seg, _ in parts]
+            self._pin(segments)
+        try:
+            yield parts
+        finally:
+            self._unpin(segments)
+
+    def _changed(self, day: str) -> None:
+        self._changes[day] = self._changes.get(day, 0) + 1
+
+    def _dim(self) -> int:
+        return next((seg._dim for seg in self._segments.values() if seg._dim), 0)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self._embedding_function is None:
+            raise ValueError("No embedding function; pass embeddings explicitly")
+        return self._embedding_function.embed_documents(list(texts))
+
+    def _write(self, ids, texts, vectors, metadatas) -> List[str]:
+        ids = list(ids)
+        if not ids:
+            return []
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        texts = list(texts) if texts is not None else [""] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [{}] * len(ids)
+        now = time.time()
+
+        latest = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        by_day: Dict[str, List[int]] = {}
+        for i in sorted(latest.values()):
+            by_day.setdefault(segment_day(metadatas[i] or {}, now), []).append(i)
+
+        with self._lock:
+            # A re-written row whose day changed leaves its old segment
+            for old_day, present in self._locate_days(list(latest)):
+                moved = [c for c in present if segment_day(metadatas[latest[c]] or {}, now) != old_day]
+                if moved:
+                    self._changed(old_day)
+                    self._segments[old_day].delete(moved)
+            for day, order in by_day.items():
+                self._changed(day)
+                self._segment_for_write(day)._write(
+                    [ids[i] for i in order], [texts[i] for i in order],
+                    vectors[order], [metadatas[i] for i in order]
+                )
+                self._day_of.update((ids[i], day) for i in order)
+        return ids
+
+    def update_rows(self, ids, texts=None, embeddings=None, metadatas=None) -> List[str]:
+        """Updates rows in place; a row stays in the segment it was written to."""
+        position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        updated = []
+        with self._lock:
+            for day, day_ids in self._locate_days(ids):
+                picks = [position[c] for c in day_ids]
+                self._changed(day)
+                updated.extend(self._segments[day].update_rows(
+                    day_ids,
+                    texts=None if texts is None else [texts[i] for i in picks],
+                    embeddings=None if embeddings is None else [embeddings[i] for i in picks],
+                    metadatas=None if metadatas is None else [metadatas[i] for i in picks],
+                ))
+        return updated
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            for day, day_ids in self._locate_days(list(ids or [])):
+                self._changed(day)
+                self._segments[day].delete(day_ids)
+                for chunk_id in day_ids:
+                    self._day_of.pop(chunk_id, None)
+        return True
+
+    # ------------------------------------------------------------------
+    # Reads / rag.vectordb hooks
+    # ------------------------------------------------------------------
+    def count(self) -> int:
+        with self._lock:
+            return sum(seg.count() for seg in self._segments.values())
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, **kwargs) -> List[str]:
+        texts = [t for t, _ in text_embeddings]
+        vectors = [v for _, v in text_embeddings]
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        return self._write(ids, texts, vectors, metadatas)
+
+    def search_by_vector(self, embedding, k: int = 5, filter: Optional[dict] = None):
+        hits = []
+        with self._reading(filter) as segments:
+            for seg in segments:
+                hits.extend(seg.search_by_vector(embedding, k=k, filter=filter))
+        hits.sort(key=lambda pair: pair[1], reverse=True)
+        return hits[:k]
+
+    def top1_by_vectors(self, embeddings, where: Optional[dict] = None):
+        n = len(embeddings)
+        best_sims = np.full(n, -1.0, dtype=np.float32)
+        best_metas = [None] * n
+        with self._reading(where) as segments:
+            for seg in segments:
+                sims, metas = seg.top1_by_vectors(embeddings, where=where)
+                for i in np.flatnonzero(sims > best_sims):
+                    best_sims[i] = sims[i]
+                    best_metas[i] = metas[i]
+        return best_sims, best_metas
+
+    def has_matches(self, where: Optional[dict]) -> bool:
+        with self._reading(where) as segments:
+            return any(seg.has_matches(where) for seg in segments)
+
+    def get_metadatas(self, ids) -> Dict[str, dict]:
+        out = {}
+        with self._reading(ids=ids) as located:
+            for seg, day_ids in located:
+                out.update(seg.get_metadatas(day_ids))
+        return out
+
+    def get_article_rows(self, article_ids):
+        ids, metadatas = [], []
+        with self._reading() as segments:
+            for seg in segments:
+                seg_ids, seg_metas = seg.get_article_rows(article_ids)
+                ids.extend(seg_ids)
+                metadatas.extend(seg_metas)
+        return ids, metadatas
+
+    def get_by_ids(self, ids) -> List[Document]:
+        docs = []
+        with self._reading(ids=ids) as located:
+            for seg, day_ids in located:
+                docs.extend(seg.get_by_ids(day_ids))
+        return docs
+
+    # ------------------------------------------------------------------
+    # LangChain VectorStore
+    # ------------------------------------------------------------------
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding_function
+
+    @property
+    def _collection(self) -> _SegmentedCollection:
+        return _SegmentedCollection(self)
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        return self._write(ids, texts, self._embed_documents(texts), metadatas)
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k: int = 4, filter=None, **kwargs):
+        """(Document, distance) pairs; distance = 2 - 2cos, as Chroma reports it."""
+        return [(doc, 2.0 - 2.0 * sim) for doc, sim in self.search_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.search_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter=None, **kwargs):
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter=None, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance / 2.0
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, path: str = None, **kwargs: Any) -> "SegmentedVectorStore":
+        store = cls(path, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    # ------------------------------------------------------------------
+    # Tiers / expiry
+    # ------------------------------------------------------------------
+    def _hot_snapshot_locked(self, day: str):
+        """(hot segment, write count, live ids) of a day still in the hot tier."""
+        if self._tiers.get(day) != "hot":
+            return None, 0, []
+        hot = self._segments[day]
+        with hot._lock:
+            return hot, self._changes.get(day, 0), list(hot._row_of)
+
+    def _build_archive(self, day: str, hot: LocalVectorStore, ids: List[str]) -> str:
+        """Copies the given rows of a hot segment into a fresh .archive.tmp directory."""
+        tmp = self._segment_path(day, "archive") + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        archive = QuantizedVectorStore(tmp, embedding_function=self._embedding_function,
+                                       collection_name=self.collection_name)
+        for start in range(0, len(ids), _COPY_BATCH):
+            payload = hot._get(ids=ids[start:start + _COPY_BATCH], include=["documents", "metadatas", "embeddings"])
+            archive._write(payload["ids"], payload["documents"], payload["embeddings"], payload["metadatas"])
+        archive.persist()
+        with archive._lock:
+            archive._db.execute("VACUUM")
+        _close(archive)
+        return tmp
+
+    def _swap_archive_locked(self, day: str, tmp: str, rows: int) -> None:
+        self._retire_locked(self._segments[day])
+        os.replace(tmp, self._segment_path(day, "archive"))
+        shutil.rmtree(self._segment_path(day, "hot"), ignore_errors=True)
+        self._segments[day] = self._open_segment(day, "archive")
+        self._tiers[day] = "archive"
+        logger.info(f"🗜️  Archived segment {day} ({rows} rows)")
+
+    def _archive(self, day: str) -> None:
+        """
+        Rebuilds a hot segment as archive outside the store lock. A day
+        written to during the copy is rebuilt again; after ARCHIVE_ATTEMPTS
+        the copy runs with writers held off.
+        """
+        for _ in range(ARCHIVE_ATTEMPTS):
+            with self._lock:
+                hot, version, ids = self._hot_snapshot_locked(day)
+                if hot is None:
+                    return
+                self._pin([hot])
+            try:
+                tmp = self._build_archive(day, hot, ids)
+            finally:
+                self._unpin([hot])
+            with self._lock:
+                if self._segments.get(day) is hot and self._changes.get(day, 0) == version:
+                    self._swap_archive_locked(day, tmp, len(ids))
+                    return
+            shutil.rmtree(tmp, ignore_errors=True)
+            logger.info(f"🔁 Segment {day} was written to while archiving, rebuilding")
+        with self._lock:
+            hot, _, ids = self._hot_snapshot_locked(day)
+            if hot is not None:
+                self._swap_archive_locked(day, self._build_archive(day, hot, ids), len(ids))
+
+    def roll(self, now: Optional[float] = None) -> List[str]:
+        """
+        Archives segments past the hot window and drops segments past
+        retention. Returns the chunk ids that were dropped.
+        """
+        now = time.time() if now is None else now
+        today = day_start(time.strftime("%Y-%m-%d", time.gmtime(now)))
+        dropped: List[str] = []
+        with self._roll_lock:
+            archive = []
+            with self._lock:
+                for day in sorted(self._segments):
+                    age_days = (today - day_start(day)) / DAY_SECONDS
+                    if age_days > self.retention_days:
+                        seg = self._segments.pop(day)
+                        dropped.extend(seg._row_of)
+                        for chunk_id in seg._row_of:
+                            self._day_of.pop(chunk_id, None)
+                        self._changes.pop(day, None)
+                        tier = self._tiers.pop(day)
+                        self._retire_locked(seg)
+                        shutil.rmtree(self._segment_path(day, tier), ignore_errors=True)
+                        logger.info(f"🗑️  Dropped segment {day} ({tier})")
+                    elif age_days >= self.hot_days and self._tiers[day] == "hot":
+                        archive.append(day)
+            for day in archive:
+                self._archive(day)
+        return dropped
+
+    def stats(self) -> List[dict]:
+        out = []
+        with self._lock:
+            for day in sorted(self._segments):
+                seg = self._segments[day]
+                folder = self._segment_path(day, self._tiers[day])
+                disk = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+                out.append({
+                    "day": day,
+                    "tier": self._tiers[day],
+                    "rows": seg.count(),
+                    "disk_mb": round(disk / 1e6, 2),
+                })
+        return out
+
+    def persist(self) -> None:
+        with self._lock:
+            for seg in self._segments.values():
+                seg.persist()
+
+    def delete_collection(self) -> None:
+        """Removes every segment."""
+        with self._lock:
+            for day, seg in self._segments.items():
+                self._retire_locked(seg)
+                shutil.rmtree(self._segment_path(day, self._tiers[day]), ignore_errors=True)
+            self._segments = {}
+            self._tiers = {}
+            self._day_of = {}
+            self._changes = {}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command not in ("stats", "roll"):
+        print("usage: python rag/segments.py stats|roll")
+        sys.exit(2)
+    from rag.vectordb import CHROMA_DIR
+    store = SegmentedVectorStore(os.path.join(CHROMA_DIR, "segments"))
+    if command == "roll":
+        print(f"dropped {len(store.roll())} rows")
+    print(json.dumps(store.stats(), indent=2))
@@ -28,3 +28,43 @@ def split_text_into_chunks(text_list):
         all_chunks.extend(chunks)
 
     return all_chunks
+
+
+def approx_token_count(text):
+    """
+    Conservative word-piece estimate for when no tokenizer is available.
+    English news text averages ~1.3 word pieces per word; rounding up
+    keeps chunks inside the model window.
+    """
+    return int(len(text.split()) * 1.5) + 1
+
+
+def split_text_into_token_chunks(text, tokenizer=None, max_tokens=256, overlap_tokens=32):
+    """
+    Input: one article string
+    Output: list[str] of chunks that each fit the embedding model's window
+
+    max_tokens is the model's input window; two slots are reserved for
+    the [CLS]/[SEP] pair so no chunk is truncated by the encoder.
+    """
+
+    budget = max(16, max_tokens - 2)
+    overlap = min(overlap_tokens, budget // 4)
+    separators = ["\n\n", "\n", ". ", " "]
+
+    if tokenizer is not None:
+        splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+            tokenizer,
+            chunk_size=budget,
+            chunk_overlap=overlap,
+            separators=separators
+        )
+    else:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=budget,
+            chunk_overlap=overlap,
+            length_function=approx_token_count,
+            separators=separators
+        )
+
+    return [c.strip() for c in splitter.split_text(text) if c.strip()]
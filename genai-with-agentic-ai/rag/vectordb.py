@@ -4,32 +4,269 @@ vectordb.py
 Compatible with LangChain 1.1.0
 
 Creates a Chroma vector DB with SentenceTransformer embeddings.
+
+VECTOR_BACKEND=faiss swaps Chroma for the in-process FAISS store
+(rag/faiss_store.py), VECTOR_BACKEND=quantized for the int8 store
+(rag/quantized_store.py), VECTOR_BACKEND=segmented for daily segments with
+a quantized archive tier (rag/segments.py); all are reached through get_vector_db() and the
+helpers below. A Chroma collection of at most EXACT_SEARCH_MAX_ROWS rows
+is searched exactly in memory (rag/numpy_store.py).
 """
 
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import logging
+import threading
+import time
+
+import numpy as np
 from langchain_community.vectorstores import Chroma
 from rag.embedder import get_embedding_model
 
+logger = logging.getLogger(__name__)
+
 CHROMA_DIR = "vector_store"
+COLLECTION_NAME = "news_articles"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
 
+# One row per article: the lead chunk (see rag/chunk_index.py)
+LEAD_ROWS = {"chunk_index": 0}
+
+# How often the shared handle is re-validated (a cheap count() call)
+HEALTH_CHECK_SECONDS = 30.0
+
+_vector_db = None
+_vector_db_checked = 0.0
+_vector_db_lock = threading.Lock()
 
-def get_vector_db():
-    """
-    Initializes (or loads) a ChromaDB instance.
-    """
 
+def _open_vector_db():
     if not os.path.exists(CHROMA_DIR):
         os.makedirs(CHROMA_DIR)
 
     embedding = get_embedding_model()
 
-    vectordb = Chroma(
+    if VECTOR_BACKEND == "quantized":
+        from rag.quantized_store import QuantizedVectorStore
+        return QuantizedVectorStore(
+            os.path.join(CHROMA_DIR, "quantized"),
+            embedding_function=embedding,
+            collection_name=COLLECTION_NAME
+        )
+
+    if VECTOR_BACKEND == "segmented":
+        from rag.segments import SegmentedVectorStore
+        return SegmentedVectorStore(
+            os.path.join(CHROMA_DIR, "segments"),
+            embedding_function=embedding,
+            collection_name=COLLECTION_NAME
+        )
+
+    if VECTOR_BACKEND == "faiss":
+        from rag.faiss_store import FaissVectorStore
+        return FaissVectorStore(
+            os.path.join(CHROMA_DIR, "faiss"),
+            embedding_function=embedding,
+            collection_name=COLLECTION_NAME
+        )
+
+    store = Chroma(
         persist_directory=CHROMA_DIR,
         embedding_function=embedding,
-        collection_name="news_articles"
+        collection_name=COLLECTION_NAME
+    )
+
+    from rag.numpy_store import EXACT_SEARCH_MAX_ROWS, ExactSearchStore
+    if EXACT_SEARCH_MAX_ROWS and store._collection.count() <= EXACT_SEARCH_MAX_ROWS:
+        return ExactSearchStore(store, max_rows=EXACT_SEARCH_MAX_ROWS)
+    return store
+
+
+def _is_healthy(vectordb) -> bool:
+    try:
+        vectordb._collection.count()
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️  Vector store handle failed its health check: {e}")
+        return False
+
+
+def get_vector_db():
+    """
+    Returns the process-wide vector store handle, opening it on first use.
+
+    The handle is re-validated at most every HEALTH_CHECK_SECONDS and
+    reopened if its collection has gone away; between checks this is a
+    plain global read.
+    """
+    global _vector_db, _vector_db_checked
+
+    vectordb = _vector_db
+    if vectordb is not None and time.monotonic() - _vector_db_checked < HEALTH_CHECK_SECONDS:
+        return vectordb
+
+    with _vector_db_lock:
+        now = time.monotonic()
+        if _vector_db is not None and now - _vector_db_checked < HEALTH_CHECK_SECONDS:
+            return _vector_db
+        if _vector_db is None or not _is_healthy(_vector_db):
+            _vector_db = _open_vector_db()
+        _vector_db_checked = now
+        return _vector_db
+
+
+def reset_vector_db():
+    """
+    Drops the shared handle so the next get_vector_db() reopens the store.
+    Call after deleting or replacing the collection / storage directory.
+    """
+    global _vector_db
+    with _vector_db_lock:
+        _vector_db = None
+
+
+def distance_to_cosine(distance) -> float:
+    """
+    Chroma's default space is squared L2. Our embeddings are normalized,
+    so ||a - b||^2 = 2 - 2cos(a, b) and the conversion is exact.
+    """
+    return 1.0 - float(distance) / 2.0
+
+
+def add_with_embeddings(vectordb, ids, texts, embeddings, metadatas):
+    """
+    Writes precomputed vectors so the store does not embed the texts again.
+    """
+    vectors = [[float(x) for x in e] for e in embeddings]
+
+    if hasattr(vectordb, "add_embeddings"):
+        return vectordb.add_embeddings(
+            list(zip(texts, vectors)), metadatas=metadatas, ids=ids
+        )
+
+    vectordb._collection.upsert(
+        ids=ids,
+        embeddings=vectors,
+        metadatas=metadatas,
+        documents=texts
+    )
+    return ids
+
+
+def get_metadatas(vectordb, ids):
+    """
+    Returns {id: metadata} for the rows that exist.
+    """
+    if hasattr(vectordb, "get_metadatas"):
+        return vectordb.get_metadatas(ids)
+
+    rows = vectordb._collection.get(ids=list(ids), include=["metadatas"])
+    return dict(zip(rows.get("ids") or [], rows.get("metadatas") or []))
+
+
+def get_article_rows(vectordb, article_ids):
+    """
+    Returns (row_ids, metadatas) of every chunk row of the given articles.
+    """
+    if hasattr(vectordb, "get_article_rows"):
+        return vectordb.get_article_rows(article_ids)
+
+    rows = vectordb._collection.get(
+        where={"parent_id": {"$in": list(article_ids)}}, include=["metadatas"]
+    )
+    return rows.get("ids") or [], rows.get("metadatas") or []
+
+
+def fetch_rows(vectordb, ids, include):
+    """
+    Returns {row_id: {field: value}} for the given row ids, with the
+    `include` fields (documents, metadatas, embeddings); missing ids are
+    left out.
+    """
+    rows = vectordb._collection.get(ids=list(ids), include=list(include))
+    out = {}
+    for i, row_id in enumerate(rows.get("ids") or []):
+        out[row_id] = {key: rows[key][i] for key in include}
+    return out
+
+
+def update_rows(vectordb, ids, texts=None, embeddings=None, metadatas=None):
+    """
+    Updates existing rows in place; ids that no longer exist are skipped.
+    """
+    vectors = None
+    if embeddings is not None:
+        vectors = [[float(x) for x in e] for e in embeddings]
+
+    if hasattr(vectordb, "update_rows"):
+        return vectordb.update_rows(ids, texts=texts, embeddings=vectors, metadatas=metadatas)
+
+    vectordb._collection.update(
+        ids=ids,
+        embeddings=vectors,
+        metadatas=metadatas,
+        documents=texts
     )
+    return ids
 
-    return vectordb
+
+def search_by_vector(vectordb, embedding, k=5, filter=None):
+    """
+    Returns (Document, cosine similarity) pairs for a query vector.
+    """
+    if hasattr(vectordb, "search_by_vector"):
+        return vectordb.search_by_vector(embedding, k=k, filter=filter)
+
+    pairs = vectordb.similarity_search_by_vector_with_relevance_scores(
+        embedding, k=k, filter=filter
+    )
+    return [(doc, distance_to_cosine(dist)) for doc, dist in pairs]
+
+
+def has_matches(vectordb, where) -> bool:
+    """
+    True if at least one row passes the metadata filter (answered from
+    the secondary metadata indexes where the store has them).
+    """
+    if hasattr(vectordb, "has_matches"):
+        return vectordb.has_matches(where)
+
+    rows = vectordb._collection.get(where=where or None, limit=1, include=[])
+    return bool(rows.get("ids"))
+
+
+def top1_by_vectors(vectordb, embeddings, where=None):
+    """
+    Nearest stored row for every query vector, in one batched query,
+    among the rows matching `where` (dedupe passes LEAD_ROWS so a lead
+    is only compared with other articles' leads).
+
+    Returns (similarities, metadatas): a float32 array of cosine
+    similarities (-1.0 where the store is empty) and the matching
+    rows' metadata (None where there is no match).
+    """
+    n = len(embeddings)
+    sims = np.full(n, -1.0, dtype=np.float32)
+    metas = [None] * n
+    if n == 0:
+        return sims, metas
+
+    if hasattr(vectordb, "top1_by_vectors"):
+        return vectordb.top1_by_vectors(embeddings, where=where)
+
+    if vectordb._collection.count() == 0:
+        return sims, metas
+
+    res = vectordb._collection.query(
+        query_embeddings=[[float(x) for x in e] for e in embeddings],
+        n_results=1,
+        where=where or None,
+        include=["distances", "metadatas"],
+    )
+    for i, (dists, row_metas) in enumerate(zip(res["distances"], res["metadatas"])):
+        if dists:
+            sims[i] = distance_to_cosine(dists[0])
+            metas[i] = row_metas[0]
+    return sims, metas
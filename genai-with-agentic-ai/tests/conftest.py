@@ -0,0 +1,19 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--onnx-parity", action="store_true",
+                     help="run the ONNX vs PyTorch parity tests (needs the exported model)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "onnx_parity: needs the exported ONNX model and the PyTorch reference")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--onnx-parity"):
+        return
+    skip = pytest.mark.skip(reason="ONNX parity tests run with --onnx-parity")
+    for item in items:
+        if "onnx_parity" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,52 @@
+import importlib
+import json
+
+import pytest
+
+import rag.autotune as autotune
+
+
+@pytest.fixture
+def tuning_file(tmp_path, monkeypatch):
+    """autotune re-imported with EMBEDDING_TUNING_PATH pointing into tmp_path."""
+    path = tmp_path / "embedding_tuning.json"
+    monkeypatch.setenv("EMBEDDING_TUNING_PATH", str(path))
+    importlib.reload(autotune)
+    yield path
+    monkeypatch.delenv("EMBEDDING_TUNING_PATH")
+    importlib.reload(autotune)
+
+
+def test_host_key_is_shared_by_same_shape_nodes(monkeypatch):
+    monkeypatch.setattr(autotune.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(autotune.platform, "machine", lambda: "x86_64")
+    monkeypatch.setattr(autotune, "cpu_model", lambda: "Xeon 8375C")
+    assert autotune.host_key("onnx") == "8cpu|x86_64|Xeon 8375C|onnx"
+    assert autotune.host_key("torch") != autotune.host_key("onnx")
+    monkeypatch.setattr(autotune.platform, "node", lambda: "replica-2")
+    assert autotune.host_key("onnx") == "8cpu|x86_64|Xeon 8375C|onnx"   # no hostname
+
+
+def test_thread_options_double_up_to_cpu_count():
+    assert autotune.thread_options(1) == [1]
+    assert autotune.thread_options(6) == [1, 2, 4, 6]
+    assert autotune.thread_options(8) == [1, 2, 4, 8]
+
+
+def test_save_and_get_host_tuning_round_trip(tuning_file):
+    assert autotune.TUNING_PATH == str(tuning_file)
+    assert autotune.get_host_tuning("onnx") == {}     # no file yet
+
+    autotune.save_host_tuning("onnx", {"threads": 4, "batch_size": 32})
+    autotune.save_host_tuning("torch", {"threads": 2, "batch_size": 16})
+    assert autotune.get_host_tuning("onnx") == {"threads": 4, "batch_size": 32}
+    assert autotune.get_host_tuning("torch") == {"threads": 2, "batch_size": 16}
+
+    autotune.save_host_tuning("onnx", {"threads": 8, "batch_size": 64})
+    data = json.loads(tuning_file.read_text())
+    assert data[autotune.host_key("onnx")] == {"threads": 8, "batch_size": 64}
+    assert len(data) == 2
+    assert not (tuning_file.parent / "embedding_tuning.json.tmp").exists()
+
+    tuning_file.write_text("{not json")
+    assert autotune.get_host_tuning("onnx") == {}     # unreadable file -> defaults
@@ -0,0 +1,90 @@
+from rag.bm25_index import BM25Index, rrf_fuse
+
+
+CHUNKS = {
+    "a1::0": "Shares of NVDA rose after the chipmaker reported record data center revenue.",
+    "a2::0": "The senate passed HR 4521 on Tuesday, sending the bill to the president.",
+    "a3::0": "Semiconductor stocks were mixed as investors weighed demand for AI hardware.",
+    "a4::0": "Mbappe scored twice as the home side came back to win the league match.",
+}
+
+
+def _index(path=None):
+    idx = BM25Index(path=path)
+    idx.add(list(CHUNKS), list(CHUNKS.values()))
+    return idx
+
+
+def test_exact_entity_ranks_first():
+    idx = _index()
+    assert idx.search("NVDA earnings", k=3)[0][0] == "a1::0"
+    assert idx.search("bill 4521", k=3)[0][0] == "a2::0"
+    assert idx.search("mbappe goals", k=3)[0][0] == "a4::0"
+    assert idx.search("cricket", k=3) == []
+
+
+def test_replace_and_delete_are_incremental():
+    idx = _index()
+    idx.add(["a1::0"], ["The chipmaker's annual meeting moved online this year."])
+    assert all(chunk_id != "a1::0" for chunk_id, _ in idx.search("NVDA", k=3))
+    idx.delete(["a4::0"])
+    assert idx.search("mbappe", k=3) == []
+    assert len(idx) == 3
+
+
+def test_persist_compacts_tombstones(tmp_path):
+    path = str(tmp_path / "bm25.npz")
+    idx = _index(path)
+    idx.delete(["a3::0", "a4::0"])
+    idx.save()
+
+    reloaded = BM25Index(path=path)
+    assert len(reloaded) == 2
+    assert reloaded.search("HR 4521", k=2)[0][0] == "a2::0"
+    assert reloaded.search("semiconductor", k=2) == []
+
+
+def test_rrf_rewards_agreement():
+    fused = rrf_fuse([["x", "y", "z"], ["y", "w"]])
+    assert fused[0][0] == "y"
+    assert {key for key, _ in fused} == {"x", "y", "z", "w"}
+
+
+def test_tombstones_leave_idf_as_if_never_indexed(tmp_path):
+    idx = _index()
+    idx.add(["x::0", "x::1"], ["NVDA NVDA NVDA guidance", "NVDA chips and NVDA supply"])
+    idx.delete(["x::0"])
+    idx.add(["x::1"], ["A cup final report."])
+    idx.delete(["x::1"])
+    fresh = _index()
+    for query in ("NVDA revenue", "bill 4521", "mbappe league"):
+        assert idx.search(query, k=4) == fresh.search(query, k=4)
+
+    # Tombstones below the compaction threshold survive a save and reload
+    path = str(tmp_path / "bm25.npz")
+    idx.path = path
+    idx.add(["a5::0"], ["Weather"])
+    idx.delete(["a5::0"])
+    idx.save()
+    assert BM25Index(path=path).search("NVDA revenue", k=4) == fresh.search("NVDA revenue", k=4)
+
+
+def test_hybrid_scores_are_cosine_similarities(tmp_path, monkeypatch):
+    import numpy as np
+
+    import rag.bm25_index as bm25_module
+    from rag.bm25_index import hybrid_search_articles
+    from rag.segments import FlatVectorStore
+
+    vectors = np.random.default_rng(0).normal(size=(len(CHUNKS), 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store = FlatVectorStore(str(tmp_path))
+    store._write(list(CHUNKS), list(CHUNKS.values()), vectors,
+                 [{"parent_id": c.split("::")[0], "chunk_index": 0} for c in CHUNKS])
+    monkeypatch.setattr(bm25_module, "get_bm25_index", _index)
+
+    for prune in (False, True):
+        hits = hybrid_search_articles("NVDA revenue", vectors[2], k=4, vectordb=store, prune=prune)
+        assert hits[0][0].metadata["parent_id"] in ("a1", "a3")
+        for doc, score in hits:
+            assert np.isclose(score, vectors[int(doc.metadata["parent_id"][1:]) - 1] @ vectors[2], atol=1e-5)
@@ -0,0 +1,74 @@
+import numpy as np
+
+from rag.category_classifier import MIN_MARGIN, MIN_SIMILARITY, CentroidClassifier, tune_thresholds
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _classifier():
+    classifier = CentroidClassifier()
+    classifier.update(
+        [_unit([1, 0, 0, 0]), _unit([1, 0.1, 0, 0]), _unit([0, 1, 0, 0]), _unit([0.1, 1, 0, 0])],
+        ["Business", "Business", "Sports", "Sports"],
+    )
+    return classifier
+
+
+def test_confident_query_is_routed():
+    assert _classifier().route(_unit([1, 0.05, 0.2, 0])) == "Business"
+
+
+def test_ambiguous_query_stays_unrouted():
+    classifier = _classifier()
+    # Halfway between two categories: high similarity, no margin
+    between = _unit([1, 1, 0, 0])
+    _, sims, margins = classifier.predict(between)
+    assert sims[0] >= MIN_SIMILARITY and margins[0] < MIN_MARGIN
+    assert classifier.route(between) is None
+    # Off-topic: slightly closer to one category, but far from both
+    off_topic = _unit([0.3, 0.1, 1, 1])
+    _, sims, margins = classifier.predict(off_topic)
+    assert margins[0] > 0.03 and sims[0] < MIN_SIMILARITY
+    assert classifier.route(off_topic) is None
+    assert CentroidClassifier().route(between) is None
+
+
+def test_tuning_keeps_routed_queries_precise():
+    classifier = _classifier()
+    queries = [_unit([1, 0.05, 0, 0]), _unit([0.05, 1, 0, 0]), _unit([1, 0.9, 0, 0]), _unit([0.9, 1, 0, 0])]
+    # The two near-diagonal queries are labelled against their nearest centroid
+    labels = ["Business", "Sports", "Sports", "Business"]
+    result = tune_thresholds(classifier, queries, labels, min_precision=1.0)
+    assert result["precision"] == 1.0 and result["coverage"] == 0.5
+    assert result["min_margin"] > 0
+
+
+def test_search_filters_on_the_routed_category(monkeypatch):
+    import api.news_api as news_api
+
+    class _Embedder:
+        def embed_query(self, text):
+            return _unit([1, 0.05, 0.2, 0]) if text == "markets" else _unit([1, 1, 0, 0])
+
+    stored = {"Business"}
+    calls = []
+    monkeypatch.setattr(news_api, "get_embedding_model", lambda: _Embedder())
+    monkeypatch.setattr(news_api, "get_category_classifier", _classifier)
+    monkeypatch.setattr(news_api, "get_vector_db", lambda: None)
+    monkeypatch.setattr(news_api, "has_matches", lambda db, where: where["category"] in stored
+                        if "category" in where else any(w.get("category") in stored for w in where["$and"]))
+    monkeypatch.setattr(news_api, "hybrid_search_articles",
+                        lambda q, vector, k, filter: calls.append(filter) or [])
+
+    news_api.search_articles("markets", hours=None)
+    news_api.search_articles("markets", hours=3)
+    news_api.search_articles("ambiguous", hours=None)
+    stored.clear()
+    news_api.search_articles("markets", hours=None)
+    assert calls[0] == {"category": "Business"}
+    assert calls[1]["$and"][1] == {"category": "Business"} and "publishTs" in calls[1]["$and"][0]
+    # Unrouted, or routed to a category with no stored rows: no category filter
+    assert calls[2] is None and calls[3] is None
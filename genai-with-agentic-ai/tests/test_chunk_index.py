@@ -0,0 +1,39 @@
+from langchain_core.documents import Document
+
+import rag.chunk_index as chunk_index
+from rag.chunk_index import aggregate_chunk_hits, chunk_article
+from rag.splitter import approx_token_count
+
+
+def test_chunks_fit_token_window(monkeypatch):
+    monkeypatch.setattr(chunk_index, "get_embedding_tokenizer", lambda: (None, 256))
+    words = [f"word{i}" for i in range(1500)]
+    content = ". ".join(" ".join(words[i:i + 12]) for i in range(0, len(words), 12))
+
+    ids, texts, metas = chunk_article("a1", content, {"title": "Long read"})
+    assert len(texts) > 1
+    assert all(approx_token_count(t) <= 254 for t in texts)
+    assert ids == [f"a1::{i}" for i in range(len(texts))]
+    assert [m["chunk_index"] for m in metas] == list(range(len(texts)))
+    assert {m["parent_id"] for m in metas} == {"a1"}
+    assert all(m["chunk_count"] == len(texts) and m["title"] == "Long read" for m in metas)
+    # The whole body is covered, not just the lead
+    assert "word0" in texts[0] and "word1499" in texts[-1]
+
+
+def test_short_article_is_one_chunk(monkeypatch):
+    monkeypatch.setattr(chunk_index, "get_embedding_tokenizer", lambda: (None, 256))
+    ids, texts, metas = chunk_article("a2", "A short brief.", {})
+    assert ids == ["a2::0"] and texts == ["A short brief."] and metas[0]["chunk_count"] == 1
+
+
+def test_aggregate_chunk_hits_returns_one_hit_per_article():
+    def hit(parent, i, score):
+        return Document(page_content=f"{parent} chunk {i}",
+                        metadata={"parent_id": parent, "chunk_index": i}), score
+
+    hits = [hit("a1", 0, 0.5), hit("a2", 2, 0.9), hit("a1", 3, 0.7), hit("a2", 0, 0.6), hit("a3", 1, 0.2)]
+    folded = aggregate_chunk_hits(hits, k=2)
+    assert [(d.metadata["parent_id"], s) for d, s in folded] == [("a2", 0.9), ("a1", 0.7)]
+    # The best chunk is the article's representative passage
+    assert folded[1][0].metadata["chunk_index"] == 3
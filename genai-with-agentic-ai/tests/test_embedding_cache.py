@@ -0,0 +1,86 @@
+import sqlite3
+
+import numpy as np
+
+from rag.embedding_cache import CachedEmbeddings, cache_key
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class _Base:
+    """Deterministic embedder that records what reached the model."""
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[self.scale * len(t), self.scale * t.count(" "), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [self.scale * len(text), 0.0, -1.0]
+
+
+def _last_used(cache_dir):
+    conn = sqlite3.connect(str(cache_dir / "index.db"))
+    rows = dict(conn.execute("SELECT key, last_used FROM entries").fetchall())
+    conn.close()
+    return rows
+
+
+def test_hits_skip_the_model_and_survive_a_restart(tmp_path):
+    base = _Base()
+    cache = CachedEmbeddings(base, MODEL + ":normalized", cache_dir=str(tmp_path))
+    first = cache.embed_documents(["alpha beta", "gamma", "alpha  beta"])
+    # Whitespace-normalized duplicates are embedded once
+    assert base.calls == [["alpha beta", "gamma"]] and first[0] == first[2]
+    assert cache.embed_documents(["gamma", "delta"])[0] == first[1]
+    assert base.calls[-1] == ["delta"]
+    # Queries and documents are cached apart
+    cache.embed_query("gamma")
+    assert base.calls[-1] == ["gamma"]
+    assert cache.stats() == {"entries": 4, "hits": 1, "misses": 4, "hit_rate": 0.2}
+    cache.close()
+
+    base = _Base()
+    reopened = CachedEmbeddings(base, MODEL + ":normalized", cache_dir=str(tmp_path))
+    assert np.allclose(reopened.embed_documents(["alpha beta"]), first[:1])
+    assert base.calls == []
+
+
+def test_model_variants_do_not_share_vectors(tmp_path):
+    keys = {cache_key(MODEL + suffix, "text") for suffix in (":normalized", ":onnx-int8", ":raw")}
+    assert len(keys) == 3
+
+    normalized = CachedEmbeddings(_Base(), MODEL + ":normalized", cache_dir=str(tmp_path))
+    raw_base = _Base(scale=10.0)
+    raw = CachedEmbeddings(raw_base, MODEL + ":raw", cache_dir=str(tmp_path))
+    a = normalized.embed_documents(["same text"])[0]
+    b = raw.embed_documents(["same text"])[0]
+    assert raw_base.calls == [["same text"]] and b[0] == 10 * a[0]
+
+
+def test_hits_are_flushed_in_batches_and_drive_eviction(tmp_path):
+    cache = CachedEmbeddings(_Base(), MODEL, cache_dir=str(tmp_path), max_entries=10)
+    texts = [f"text {i}" for i in range(10)]
+    cache.embed_documents(texts)
+    stored = _last_used(tmp_path)
+
+    # A hit only touches memory until the next flush
+    cache.embed_documents(texts[:2])
+    assert _last_used(tmp_path) == stored
+    cache.flush()
+    touched = _last_used(tmp_path)
+    assert all(touched[cache_key(MODEL, t)] > stored[cache_key(MODEL, t)] for t in texts[:2])
+
+    # Hits not yet flushed still protect their keys from eviction
+    cache.embed_documents(texts[2:4])
+    cache.embed_documents(["new 0", "new 1"])
+    assert cache.stats()["entries"] == 10
+    survivors = set(_last_used(tmp_path))
+    assert {cache_key(MODEL, t) for t in texts[:4]} <= survivors
+    assert len({cache_key(MODEL, t) for t in texts[4:]} & survivors) == 4
+    # Freed slots are reused: the vector file did not grow past one block
+    assert cache._matrix.shape[0] == 1024
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from rag.embedding_service import MicroBatchingEmbeddings
+
+
+class SlowModel(Embeddings):
+    """Fake model: fixed cost per forward pass, records batch sizes."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        time.sleep(0.02)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        self.batches.append(len(texts))
+        return [[float(len(t)), float(sum(map(ord, t)))] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def run_concurrently(fn, args):
+    results, errors = [None] * len(args), []
+
+    def worker(i, arg):
+        try:
+            results[i] = fn(arg)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i, a)) for i, a in enumerate(args)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results, errors
+
+
+def test_concurrent_queries_share_forward_passes():
+    model = SlowModel()
+    service = MicroBatchingEmbeddings(model, max_wait_ms=5, max_items=16)
+    queries = [f"query number {i}" for i in range(40)]
+
+    results, errors = run_concurrently(service.embed_query, queries)
+
+    assert not errors
+    assert sum(model.batches) == len(queries)
+    assert len(model.batches) < len(queries) / 2
+    assert max(model.batches) <= 16
+    # each caller gets its own row back
+    assert results == [SlowModel().embed_query(q) for q in queries]
+
+
+def test_errors_reach_every_caller():
+    service = MicroBatchingEmbeddings(SlowModel(fail=True), max_wait_ms=5)
+    _, errors = run_concurrently(service.embed_query, ["a", "b", "c"])
+    assert len(errors) == 3
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+def test_documents_bypass_the_queue():
+    model = SlowModel()
+    service = MicroBatchingEmbeddings(model)
+    assert service.embed_documents(["x", "yy"]) == [[1.0, 120.0], [2.0, 242.0]]
+    assert service.stats["batches"] == 0
@@ -0,0 +1,93 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+import agents.minhash_index as minhash_module
+import rag.bm25_index as bm25_module
+import rag.chunk_index as chunk_index
+from agents.enrichment_queue import LLM_INPUT_CHARS, EnrichmentQueue, merge_cleaned
+from agents.minhash_index import MinHashIndex
+from rag.bm25_index import BM25Index
+from rag.splitter import approx_token_count
+
+RAW = " ".join(f"Navigation menu junk. Council debate paragraph {i} on the zoning vote." for i in range(120))
+CLEANED = " ".join(f"The council approved the rezoning plan in vote number {i}." for i in range(10))
+
+
+class _Embedder:
+    def embed_documents(self, texts):
+        out = []
+        for text in texts:
+            v = np.zeros(32, dtype=np.float32)
+            for word in text.lower().split():
+                v[int(hashlib.md5(word.encode()).hexdigest(), 16) % 32] += 1
+            out.append(v / max(np.linalg.norm(v), 1e-9))
+        return out
+
+
+class _LLM:
+    def batch(self, prompts, batch_size=None):
+        if "Summarize" in prompts[0]:
+            return ["The council approved a rezoning plan after a long debate on Tuesday."] * len(prompts)
+        return [f"TITLE: Council approves rezoning\nCONTENT: {CLEANED}"] * len(prompts)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    from rag.segments import FlatVectorStore
+
+    bm25, minhash = BM25Index(), MinHashIndex()
+    monkeypatch.setattr(bm25_module, "get_bm25_index", lambda: bm25)
+    monkeypatch.setattr(minhash_module, "get_minhash_index", lambda: minhash)
+    monkeypatch.setattr(chunk_index, "get_embedding_model", lambda: _Embedder())
+    monkeypatch.setattr(chunk_index, "get_embedding_tokenizer", lambda: (None, 128))
+    monkeypatch.setattr(EnrichmentQueue, "start", lambda self: None)
+
+    store = FlatVectorStore(str(tmp_path / "store"))
+    article = {"id": "a1", "content": RAW, "metadata": {"title": "Home | News"}}
+    chunk_index.index_articles([article], vectordb=store)
+    minhash.add("a1", minhash.signature(RAW), timestamp=123.0)
+    return store, bm25, minhash, article, str(tmp_path / "cache.db")
+
+
+def test_merge_keeps_the_body_past_the_llm_input():
+    merged = merge_cleaned(RAW, "Clean lead.")
+    assert merged.startswith("Clean lead. ")
+    assert merged.endswith(RAW[-40:])
+    assert len(merged) < len(RAW) - LLM_INPUT_CHARS + 40
+    assert merge_cleaned("short raw text", "Clean lead.") == "Clean lead."
+
+
+def test_enrichment_rechunks_and_updates_side_indexes(env):
+    store, bm25, minhash, article, cache_path = env
+    old_ids = list(article["chunk_ids"])
+    queue = EnrichmentQueue(path=cache_path)
+    queue.enqueue(article)
+
+    assert queue.process([queue._queue.get()], llm=_LLM(), vectordb=store) == 1
+    rows = store._collection.get(where={"parent_id": "a1"}, include=["documents", "metadatas"])
+    assert rows["ids"][0] == "a1::0" and rows["documents"][0].startswith("The council approved")
+    assert all(approx_token_count(d) <= 126 for d in rows["documents"])
+    assert {m["title"] for m in rows["metadatas"]} == {"Council approves rezoning"}
+    assert {m["chunk_count"] for m in rows["metadatas"]} == {len(rows["ids"])}
+    # Chunks past the new count are gone from the store and from BM25
+    assert set(old_ids) - set(rows["ids"]) and not store.get_metadatas(set(old_ids) - set(rows["ids"]))
+    assert len(bm25) == len(rows["ids"])
+    assert bm25.search("rezoning", k=1)[0][0].startswith("a1::")
+    # MinHash now describes the stored text, index time unchanged
+    assert minhash.is_near_duplicate(rows["documents"][0] + " " + " ".join(rows["documents"][1:]))[0]
+    assert minhash._timestamps["a1"] == 123.0
+    assert queue.get_stats()["enriched"] == 1
+
+
+def test_pending_items_survive_a_restart(env):
+    store, _, _, article, cache_path = env
+    EnrichmentQueue(path=cache_path).enqueue(article)
+
+    restarted = EnrichmentQueue(path=cache_path)
+    assert restarted.restore() == 1
+    item = restarted._queue.get()
+    assert item["id"] == "a1" and item["chunk_ids"] == article["chunk_ids"]
+    restarted.process([item], llm=_LLM(), vectordb=store)
+    assert EnrichmentQueue(path=cache_path).restore() == 0
@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from rag.numpy_store import ExactSearchStore
+from rag.vectordb import LEAD_ROWS, get_metadatas, has_matches, search_by_vector, top1_by_vectors
+
+DIM = 24
+NOW = 1_700_000_000
+
+FILTERS = [
+    None,
+    {"category": "Tech"},
+    LEAD_ROWS,
+    {"$and": [{"category": "World"}, {"publishTs": {"$gte": NOW - 3 * 3600}}]},
+    {"parent_id": {"$in": ["a3", "a7", "a11"]}},
+    {"$or": [{"category": "Sports"}, {"chunk_index": {"$gt": 1}}]},
+]
+
+
+class _Embedder:
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        v = np.random.default_rng(abs(hash(text)) % 2**32).normal(size=DIM)
+        return (v / np.linalg.norm(v)).tolist()
+
+
+def _unit(rows):
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def stores(tmp_path):
+    from langchain_community.vectorstores import Chroma
+
+    chroma = Chroma(persist_directory=str(tmp_path), embedding_function=_Embedder(),
+                    collection_name="parity", collection_metadata={"hnsw:space": "l2"})
+    rng = np.random.default_rng(0)
+    ids, texts, vectors, metas = [], [], [], []
+    for a in range(20):
+        for c in range(3):
+            ids.append(f"a{a}::{c}")
+            texts.append(f"article {a} chunk {c}")
+            vectors.append(rng.normal(size=DIM))
+            metas.append({"parent_id": f"a{a}", "chunk_index": c, "category": ["Tech", "World", "Sports"][a % 3],
+                          "publishTs": NOW - a * 3600})
+    chroma._collection.upsert(ids=ids, embeddings=_unit(np.asarray(vectors)).tolist(),
+                              documents=texts, metadatas=metas)
+    exact = ExactSearchStore(chroma, max_rows=1000)
+    assert exact.active
+    return chroma, exact
+
+
+def _queries(n=5, seed=1):
+    return _unit(np.random.default_rng(seed).normal(size=(n, DIM)))
+
+
+def _chunk_id(doc):
+    # LangChain's Chroma wrapper does not always set Document.id
+    return f"{doc.metadata['parent_id']}::{doc.metadata['chunk_index']}"
+
+
+def _assert_same_hits(chroma, exact, query, where, k=8):
+    expected = search_by_vector(chroma, query.tolist(), k=k, filter=where)
+    got = search_by_vector(exact, query, k=k, filter=where)
+    assert [_chunk_id(d) for d, _ in got] == [_chunk_id(d) for d, _ in expected]
+    assert np.allclose([s for _, s in got], [s for _, s in expected], atol=1e-4)
+    assert [d.metadata for d, _ in got] == [d.metadata for d, _ in expected]
+
+
+@pytest.mark.parametrize("where", FILTERS)
+def test_search_matches_chroma(stores, where):
+    chroma, exact = stores
+    for query in _queries():
+        _assert_same_hits(chroma, exact, query, where)
+    assert has_matches(exact, where) == has_matches(chroma, where)
+
+
+def test_top1_and_reads_match_chroma(stores):
+    chroma, exact = stores
+    queries = _queries(6, seed=2)
+    for where in (None, LEAD_ROWS, {"category": "Sports"}):
+        sims, metas = top1_by_vectors(exact, queries, where=where)
+        ref_sims, ref_metas = top1_by_vectors(chroma, queries.tolist(), where=where)
+        assert np.allclose(sims, ref_sims, atol=1e-4) and metas == ref_metas
+    ids = ["a1::0", "a5::2", "missing"]
+    assert get_metadatas(exact, ids) == get_metadatas(chroma, ids)
+    assert not has_matches(exact, {"category": "Opinion"})
+
+
+def test_writes_keep_the_mirror_in_step(stores):
+    chroma, exact = stores
+    query = _queries(1, seed=3)[0]
+    exact.add_embeddings([("new lead", query.tolist())], metadatas=[{"parent_id": "n", "chunk_index": 0,
+                                                                     "category": "Tech"}], ids=["n::0"])
+    exact.update_rows(["a2::0", "gone::0"], metadatas=[{"parent_id": "a2", "chunk_index": 0, "category": "Tech"},
+                                                         {"parent_id": "gone", "chunk_index": 0}])
+    exact.delete(ids=["a4::0", "a4::1"])
+    for where in (None, {"category": "Tech"}, LEAD_ROWS):
+        _assert_same_hits(chroma, exact, query, where, k=10)
+    assert search_by_vector(exact, query, k=1)[0][0].id == "n::0"
+    # Metadata updates merge into the stored row, as in Chroma
+    assert get_metadatas(exact, ["a2::0"])["a2::0"]["publishTs"] == NOW - 2 * 3600
+
+
+def test_falls_back_to_chroma_past_max_rows(stores):
+    chroma, _ = stores
+    small = ExactSearchStore(chroma, max_rows=10)
+    assert not small.active
+    query = _queries(1, seed=4)[0]
+    _assert_same_hits(chroma, small, query, {"category": "World"})
+
+
+def test_delete_by_where_drops_the_mirror_rows(stores):
+    chroma, exact = stores
+    query = _queries(1, seed=5)[0]
+    exact.delete(where={"category": "Sports"})
+    exact.delete(ids=["a0::0", "a0::1", "a1::0"], where=LEAD_ROWS)
+    assert not has_matches(exact, {"category": "Sports"})
+    assert get_metadatas(exact, ["a0::0", "a0::1", "a1::0"]).keys() == {"a0::1"}
+    assert exact._index.n == chroma._collection.count()
+    for where in (None, {"category": "Tech"}, LEAD_ROWS):
+        _assert_same_hits(chroma, exact, query, where, k=10)
+
+
+def test_concurrent_writers_leave_mirror_and_chroma_equal(stores):
+    import threading
+
+    chroma, exact = stores
+    vectors = _queries(8, seed=6)
+
+    def write(seed):
+        for i in range(8):
+            v = vectors[(i + seed) % 8].tolist()
+            exact.add_embeddings([("contended", v)], metadatas=[{"parent_id": "c", "chunk_index": 0,
+                                                                "writer": seed}], ids=["c::0"])
+            exact.update_rows(["a3::0"], embeddings=[v], metadatas=[{"writer": seed}])
+
+    threads = [threading.Thread(target=write, args=(s,)) for s in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stored = chroma._collection.get(ids=["c::0", "a3::0"], include=["embeddings", "metadatas"])
+    for row_id, vector, metadata in zip(stored["ids"], stored["embeddings"], stored["metadatas"]):
+        pos = exact._index._pos[row_id]
+        assert np.allclose(exact._index.matrix[pos], vector, atol=1e-5)
+        assert exact._index.metadatas[pos] == metadata
@@ -0,0 +1,77 @@
+import pytest
+
+import agents.ingest_metrics as ingest_metrics
+from agents.ingest_metrics import BUCKETS_MS, Histogram, RunMetrics, stage_timer
+
+
+class _Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ingest_metrics, "time", clock)
+    return clock
+
+
+def test_histogram_quantiles():
+    assert Histogram().quantile(0.5) == 0.0
+    h = Histogram()
+    for ms in (0.5, 3, 3, 40, 120):
+        h.observe(ms)
+    assert h.counts[0] == 1 and h.counts[BUCKETS_MS.index(5)] == 2
+    assert h.quantile(0.5) == 5.0 and h.quantile(0.8) == 50.0 and h.quantile(1.0) == 250.0
+    # The last bucket is open: its quantile is the largest value seen
+    h.observe(45_000)
+    assert h.counts[-1] == 1 and h.quantile(1.0) == 45_000
+    assert Histogram(h.to_dict()).to_dict() == h.to_dict()
+
+
+def test_elapsed_is_summed_across_resumes(clock):
+    first = RunMetrics("r1")
+    clock.now += 30
+    saved = first.to_dict()
+    assert saved["elapsed"] == 30
+
+    # The process was down for an hour; only running time counts
+    clock.now += 3600
+    resumed = RunMetrics("r1", saved)
+    clock.now += 10
+    assert resumed.to_dict()["elapsed"] == 40
+    assert RunMetrics("r1", resumed.to_dict(), live=False).to_dict()["elapsed"] == 40
+
+
+def test_report_breaks_down_stages_hosts_and_throughput(clock):
+    metrics = RunMetrics("r2")
+    with stage_timer(metrics, "parse"):
+        clock.now += 0.2
+    metrics.observe("embed", 0.6)
+    metrics.observe_fetch("slow.com", 1.5, 2000, ok=False)
+    metrics.observe_fetch("slow.com", 0.5, 1000, ok=True)
+    metrics.observe_fetch("fast.com", 0.1, 500, ok=True)
+    metrics.count_source("https://slow.com/feed", "ingested", 3)
+    metrics.count_source("https://fast.com/feed", "ingested")
+    metrics.count_source("https://fast.com/feed", "rejected")
+    with stage_timer(None, "ignored"):
+        pass
+    clock.now += 7.8
+
+    report = metrics.report(top_hosts=1)
+    assert report["elapsed_s"] == 8.0 and report["articles_ingested"] == 4
+    assert report["articles_per_sec"] == 0.5
+    assert list(report["stages"]) == ["fetch", "embed", "parse"]
+    fetch = report["stages"]["fetch"]
+    assert fetch["count"] == 3 and fetch["total_s"] == 2.1 and fetch["share"] == 0.724
+    assert fetch["p50_ms"] == 500.0 and fetch["max_ms"] == 1500.0
+    assert report["bytes"] == {"fetch": 3500}
+    assert report["slow_hosts"] == [{"host": "slow.com", "requests": 2, "errors": 1, "mean_fetch_ms": 1000.0,
+                                     "total_fetch_s": 2.0, "bytes": 3000}]
+    assert RunMetrics("r3").report()["articles_per_sec"] == 0.0
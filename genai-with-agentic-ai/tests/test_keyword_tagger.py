@@ -0,0 +1,50 @@
+from agents.keyword_tagger import TAG_SEPARATOR, KeywordTagger, parse_tags, tokenize
+
+
+CORPUS = [
+    "Markets rallied as investors cheered strong earnings from retailers and markets closed higher.",
+    "Markets slipped as investors weighed inflation data and central bank comments.",
+    "Markets were flat while investors waited for the semiconductor earnings season.",
+    "The semiconductor shortage eased as foundries expanded semiconductor capacity in Arizona.",
+]
+
+
+def test_distinctive_terms_outrank_common_ones():
+    tagger = KeywordTagger()
+    tags = tagger.tag_batch(CORPUS, top_k=3)
+    assert len(tags) == len(CORPUS)
+    assert tags[3][0] == "semiconductor"
+    # "markets"/"investors" appear in most documents, so they lose to rarer terms
+    assert "markets" not in tags[3] and "investors" not in tags[3]
+    assert all(len(t) <= 3 for t in tags)
+    assert tagger.n_docs == 4
+
+
+def test_update_false_does_not_count_the_batch():
+    tagger = KeywordTagger()
+    tagger.observe(CORPUS)
+    before = (tagger.n_docs, tagger._df.copy(), list(tagger._terms))
+    tags = tagger.tag_batch(["Another semiconductor zeppelin story."], update=False)
+    assert tagger.n_docs == before[0]
+    assert (tagger._df == before[1]).all()
+    # Unseen terms are scored (df 0) but never join the vocabulary
+    assert "zeppelin" in tags[0] and tagger._terms == before[2] and "zeppelin" not in tagger._vocab
+    assert tagger.tag_batch(["", "the and"]) == [[], []]
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / "tags.npz")
+    tagger = KeywordTagger(path=path)
+    tagger.observe(CORPUS)
+    tagger.save()
+    reloaded = KeywordTagger(path=path)
+    assert reloaded.n_docs == 4 and len(reloaded) == len(tagger)
+    probe = ["Foundries expanded semiconductor capacity."]
+    assert reloaded.tag_batch(probe, update=False) == tagger.tag_batch(probe, update=False)
+
+
+def test_tokenize_and_parse_tags():
+    assert tokenize("The 2024 AI-chip race, per Reuters: Nvidia's lead") == ["ai-chip", "race", "nvidia", "lead"]
+    assert parse_tags(TAG_SEPARATOR.join(["ai", " chips ", ""])) == ["ai", "chips"]
+    assert parse_tags(["ai", "", "chips"]) == ["ai", "chips"]
+    assert parse_tags(None) == [] and parse_tags("") == []
@@ -0,0 +1,65 @@
+import numpy as np
+
+from rag.length_buckets import LengthBucketedEmbeddings, plan_buckets, token_lengths
+
+
+class _Tokenizer:
+    """One token per word plus [CLS] and [SEP], like a word-piece tokenizer on plain words."""
+
+    def __call__(self, texts, truncation, max_length, **_):
+        return {"input_ids": [[0] * min(len(t.split()) + 2, max_length) for t in texts]}
+
+
+class _Client:
+    tokenizer = _Tokenizer()
+    max_seq_length = 64
+
+
+class _Base:
+    """Vector = (word count, text number): checkable against the input position."""
+
+    def __init__(self, client=None):
+        self.client = client
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t.split())), float(t.split()[-1])] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _texts(n=40, seed=0):
+    lengths = np.random.default_rng(seed).integers(1, 60, size=n)
+    return [" ".join(["word"] * int(k) + [str(i)]) for i, k in enumerate(lengths)]
+
+
+def test_vectors_come_back_in_input_order():
+    for client in (None, _Client()):
+        base = _Base(client)
+        model = LengthBucketedEmbeddings(base, bucket_size=8)
+        texts = _texts()
+        vectors = model.embed_documents(texts)
+        assert [v[1] for v in vectors] == list(range(len(texts)))
+        assert [v[0] for v in vectors] == [len(t.split()) for t in texts]
+        # Several buckets, each sorted by length
+        assert len(base.batches) == 5 and all(len(b) == 8 for b in base.batches)
+        firsts = [len(b[0].split()) for b in base.batches]
+        assert firsts == sorted(firsts)
+    assert model.max_tokens == 64
+    assert LengthBucketedEmbeddings(_Base()).embed_documents(["only 0"]) == [[2.0, 0.0]]
+
+
+def test_bucketing_never_pads_more_than_arrival_order():
+    model = LengthBucketedEmbeddings(_Base(_Client()), bucket_size=8)
+    for seed in range(5):
+        model.embed_documents(_texts(seed=seed))
+    stats = model.get_stats()
+    assert stats["texts"] == 200 and stats["passes"] == 25
+    assert stats["padding_ratio"] <= stats["unsorted_padding_ratio"]
+    assert stats["padding_ratio"] < 0.2 < stats["unsorted_padding_ratio"]
+
+    lengths = token_lengths(["a b c", "a", "a " * 100], _Tokenizer(), max_tokens=64)
+    assert lengths.tolist() == [5, 3, 64]
+    assert [b.tolist() for b in plan_buckets(lengths, 2)] == [[1, 0], [2]]
@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+
+from rag.local_store import LocalVectorStore
+from rag.segments import FlatVectorStore
+
+DIM = 16
+
+
+def _vectors(n, seed=0):
+    v = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _fill(store, n, seed=0, start=0):
+    vectors = _vectors(n, seed)
+    ids = [f"a{start + i}::0" for i in range(n)]
+    metas = [{"parent_id": f"a{start + i}", "chunk_index": 0, "category": "Tech" if i % 2 else "World"}
+             for i in range(n)]
+    store._write(ids, [f"doc {start + i}" for i in range(n)], vectors, metas)
+    return ids, vectors
+
+
+def test_backends_must_implement_the_index_hooks():
+    class Partial(LocalVectorStore):
+        def _index_reset(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial("unused")
+
+
+def test_compact_rewrites_vectors_and_renumbers_rows(tmp_path):
+    store = FlatVectorStore(str(tmp_path))
+    ids, vectors = _fill(store, 40)
+    store.delete(ids[:30:2])   # 15 dead rows
+    store.update_rows([ids[1], ids[3]], embeddings=vectors[[1, 3]])   # two more, re-appended
+    assert store._next_row == 42 and store.dead_fraction() > 0.25
+
+    store.persist()
+    assert store._next_row == store.count() == 25 and store.dead_fraction() == 0
+    assert sorted(store._row_of.values()) == list(range(25))
+    for i in (1, 3, 31, 39):
+        hit = store.search_by_vector(vectors[i], k=1)[0]
+        assert hit[0].id == ids[i] and hit[1] > 0.999
+    assert store.get_metadatas([ids[31]])[ids[31]]["category"] == "Tech"
+    assert len(store._collection.get(where={"category": "World"})["ids"]) == 5
+
+    reopened = FlatVectorStore(str(tmp_path))
+    assert reopened.count() == 25
+    assert reopened.search_by_vector(vectors[39], k=1)[0][0].id == ids[39]
+
+
+def test_interrupted_vector_swap_is_finished_on_open(tmp_path, monkeypatch):
+    store = FlatVectorStore(str(tmp_path))
+    ids, vectors = _fill(store, 20)
+    store.delete(ids[:10])
+
+    def killed(*args):
+        raise OSError("killed before the vector file was swapped in")
+
+    # Renumbering is committed, the new vector file is not in place yet
+    monkeypatch.setattr("rag.local_store.os.replace", killed)
+    with pytest.raises(OSError):
+        store.compact(rewrite=True)
+    monkeypatch.undo()
+
+    reopened = FlatVectorStore(str(tmp_path))
+    assert reopened.count() == 10 and reopened._next_row == 10
+    assert reopened.search_by_vector(vectors[15], k=1)[0][0].id == ids[15]
+
+
+def test_lead_rows_ignore_matching_later_chunks(tmp_path):
+    from rag.vectordb import LEAD_ROWS, top1_by_vectors
+
+    def unit(v):
+        v = np.asarray(v, dtype=np.float32)
+        return v / np.linalg.norm(v)
+
+    store = FlatVectorStore(str(tmp_path))
+    wire = unit([1, 0.1, 0, 0])
+    store._write(
+        ["s1::0", "s1::3", "s2::0"], ["lead", "quoted wire copy", "lead"],
+        [unit([0, 0, 1, 0]), wire, unit([0.3, 0, 0, 1])],
+        [{"parent_id": "s1", "chunk_index": 0}, {"parent_id": "s1", "chunk_index": 3},
+         {"parent_id": "s2", "chunk_index": 0}],
+    )
+    sims, metas = top1_by_vectors(store, [wire])
+    assert metas[0]["chunk_index"] == 3
+    # A new lead is only compared with stored leads, never with later chunks
+    sims, metas = top1_by_vectors(store, [wire], where=LEAD_ROWS)
+    assert metas[0]["chunk_index"] == 0 and sims[0] < 0.85
+
+
+# ----------------------------------------------------------------------
+# FAISS backend
+# ----------------------------------------------------------------------
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_faiss_modes_search_filter_and_skip_deleted_rows(tmp_path, index_type):
+    pytest.importorskip("faiss")
+    from rag.faiss_store import FaissVectorStore
+
+    store = FaissVectorStore(str(tmp_path), index_type=index_type)
+    ids, vectors = _fill(store, 300)
+    for i in (0, 7, 150):
+        assert store.search_by_vector(vectors[i], k=1)[0][0].id == ids[i]
+
+    # Deleted rows are excluded by the IDSelectorBitmap and k hits still come back
+    store.delete([ids[7]])
+    hits = store.search_by_vector(vectors[7], k=5)
+    assert len(hits) == 5 and ids[7] not in {d.id for d, _ in hits}
+    sims, rows = store._index_search(vectors[7:8], 5, store._alive.copy())
+    assert (rows >= 0).all() and 7 not in rows
+
+    # Filter past EXACT_FILTER_ROWS goes through the index with the filter bitmap
+    mask = store._allowed_mask({"category": "Tech"})
+    sims, rows = store._index_search(vectors[:1], 10, mask)
+    assert mask[rows[0]].all()
+
+    store.persist()
+    reopened = FaissVectorStore(str(tmp_path), index_type=index_type)
+    assert reopened.search_by_vector(vectors[150], k=1)[0][0].id == ids[150]
+
+
+def test_ivf_trains_once_it_reaches_1024_rows(tmp_path):
+    faiss = pytest.importorskip("faiss")
+    from rag.faiss_store import IVF_MIN_TRAIN_ROWS, FaissVectorStore
+
+    store = FaissVectorStore(str(tmp_path), index_type="ivf")
+    ids, vectors = _fill(store, IVF_MIN_TRAIN_ROWS - 24)
+    assert store._untrained_ivf()
+    _fill(store, 24, seed=1, start=IVF_MIN_TRAIN_ROWS - 24)
+    assert isinstance(store._inner(), faiss.IndexIVF) and store._inner().is_trained
+    assert store._index.ntotal == IVF_MIN_TRAIN_ROWS
+    assert store.search_by_vector(vectors[3], k=1)[0][0].id == ids[3]
+    store.delete([ids[3]])
+    assert ids[3] not in {d.id for d, _ in store.search_by_vector(vectors[3], k=5)}
+
+
+def test_faiss_compaction_rebuilds_a_matching_index(tmp_path):
+    pytest.importorskip("faiss")
+    from rag.faiss_store import FaissVectorStore
+
+    store = FaissVectorStore(str(tmp_path), index_type="hnsw")
+    ids, vectors = _fill(store, 200)
+    store.persist()
+    store.delete(ids[:100])
+    store.persist()
+    assert store._next_row == 100 and store._index.ntotal == 100
+
+    reopened = FaissVectorStore(str(tmp_path), index_type="hnsw")
+    assert reopened._index.ntotal == 100
+    assert reopened.search_by_vector(vectors[120], k=1)[0][0].id == ids[120]
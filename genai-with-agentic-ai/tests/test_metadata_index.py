@@ -0,0 +1,89 @@
+import numpy as np
+
+from rag.metadata_index import MetadataIndex
+from rag.numpy_store import ExactIndex, matches_where
+
+NOW = 1_700_000_000
+ROWS = [
+    {"category": "Tech", "sourceDomain": "a.com", "chunk_index": 0, "publishTs": NOW, "tags": "ai,chips"},
+    {"category": "Tech", "source": "https://www.b.com/x", "chunk_index": 1, "publishTs": NOW - 7200, "tags": "ai"},
+    {"category": "World", "sourceDomain": "a.com", "chunk_index": 0, "publishDate": "2023-11-14T20:13:20+00:00",
+     "tags": "Elections", "author": "Jane"},
+    {"category": "Sports", "sourceDomain": "c.com", "chunk_index": 0, "tags": ""},
+]
+
+
+def _index():
+    index = MetadataIndex()
+    index.add(range(len(ROWS)), ROWS)
+    return index
+
+
+def _rows(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+def test_indexed_fields_resolve_without_residual():
+    index, n = _index(), len(ROWS)
+    cases = {
+        "category": ({"category": "Tech"}, [0, 1]),
+        "coded $in": ({"category": {"$in": ["World", "Sports", "Opinion"]}}, [2, 3]),
+        "coded $ne": ({"category": {"$ne": "Tech"}}, [2, 3]),
+        "domain from url": ({"sourceDomain": "b.com"}, [1]),
+        "leads": ({"chunk_index": 0}, [0, 2, 3]),
+        "range": ({"publishTs": {"$gte": NOW - 3600}}, [0]),
+        "iso date": ({"publishDate": {"$lt": "2023-11-14T21:00:00+00:00"}}, [1, 2]),
+        "tags": ({"tags": {"$contains": "AI"}}, [0, 1]),
+        "and": ({"$and": [{"category": "Tech"}, {"chunk_index": 0}]}, [0]),
+        "or": ({"$or": [{"category": "Sports"}, {"tags": {"$contains": "elections"}}]}, [2, 3]),
+    }
+    for name, (where, expected) in cases.items():
+        mask, residual = index.restrict(where, n)
+        assert residual is None, name
+        assert _rows(mask) == expected, name
+    assert index.restrict(None, n) == (None, None)
+
+
+def test_unindexed_parts_come_back_as_residual():
+    index, n = _index(), len(ROWS)
+    mask, residual = index.restrict({"$and": [{"category": "World"}, {"author": "Jane"}]}, n)
+    assert _rows(mask) == [2] and residual == {"author": "Jane"}
+
+    # One unindexed branch makes the whole $or residual, including its $contains
+    where = {"$or": [{"tags": {"$contains": "chips"}}, {"author": "Jane"}]}
+    mask, residual = index.restrict(where, n)
+    assert mask is None and residual == where
+    assert [i for i, m in enumerate(ROWS) if matches_where(m, residual)] == [0, 2]
+
+    mask, residual = index.restrict({"publishTs": {"$gte": "not a date"}}, n)
+    assert mask is None and residual == {"publishTs": {"$gte": "not a date"}}
+
+
+def test_updates_moves_and_removals_keep_postings_in_step():
+    index, n = _index(), len(ROWS)
+    index.add([1], [{"category": "World", "tags": "chips"}])
+    assert _rows(index.restrict({"tags": {"$contains": "ai"}}, n)[0]) == [0]
+    index.remove([0])
+    index.move(3, 0)
+    assert _rows(index.restrict({"category": "Sports"}, n)[0]) == [0]
+    assert _rows(index.restrict({"tags": {"$contains": "chips"}}, n)[0]) == [1]
+    assert index.stats()["rows"] == 3
+
+
+def test_contains_residual_in_the_stores(tmp_path):
+    from rag.segments import FlatVectorStore
+
+    where = {"$or": [{"tags": {"$contains": "chips"}}, {"author": "Jane"}]}
+    scoped = {"$and": [{"chunk_index": 0}, where]}
+    vectors = np.eye(len(ROWS), 8, dtype=np.float32)
+    ids = [f"a{i}::0" for i in range(len(ROWS))]
+
+    store = FlatVectorStore(str(tmp_path))
+    store._write(ids, ["doc"] * len(ROWS), vectors, ROWS)
+    assert _rows(store._allowed_mask(where)) == [0, 2]
+    assert _rows(store._allowed_mask(scoped)) == [0, 2]
+    assert [d.id for d, _ in store.search_by_vector(vectors[1], k=4, filter=where)] == ["a0::0", "a2::0"]
+
+    exact = ExactIndex()
+    exact.upsert(ids, ["doc"] * len(ROWS), vectors, ROWS)
+    assert _rows(exact.mask(where)) == [0, 2] and _rows(exact.mask(scoped)) == [0, 2]
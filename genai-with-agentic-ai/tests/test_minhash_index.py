@@ -0,0 +1,46 @@
+from agents.minhash_index import MinHashIndex
+
+
+WIRE_STORY = (
+    "The central bank raised interest rates by a quarter point on Wednesday, "
+    "citing persistent inflation in housing and services. Officials signalled "
+    "that further increases remain possible if price growth does not slow, "
+    "while markets had largely expected the move after strong jobs data."
+)
+
+
+def test_syndicated_copy_is_near_duplicate():
+    idx = MinHashIndex()
+    idx.add("a1", idx.signature(WIRE_STORY), timestamp=0)
+
+    syndicated = WIRE_STORY + " Reporting by staff; editing by the desk."
+    dup, match, score = idx.is_near_duplicate(syndicated)
+    assert dup
+    assert match == "a1"
+    assert score >= idx.threshold
+
+
+def test_unrelated_story_is_not_duplicate():
+    idx = MinHashIndex()
+    idx.add("a1", idx.signature(WIRE_STORY), timestamp=0)
+
+    other = (
+        "The home team won the championship final after extra time, with the "
+        "captain scoring twice in front of a sold-out stadium on Sunday night."
+    )
+    dup, _, score = idx.is_near_duplicate(other)
+    assert not dup
+    assert score < 0.3
+
+
+def test_expire_and_persist(tmp_path):
+    path = str(tmp_path / "minhash.npz")
+    idx = MinHashIndex(path=path)
+    idx.add("old", idx.signature(WIRE_STORY), timestamp=10)
+    idx.add("new", idx.signature("completely different text about space probes"), timestamp=100)
+    assert idx.expire(older_than=50) == 1
+    idx.save()
+
+    reloaded = MinHashIndex(path=path)
+    assert len(reloaded) == 1
+    assert not reloaded.is_near_duplicate(WIRE_STORY)[0]
@@ -0,0 +1,39 @@
+import numpy as np
+
+from rag.mmr import DUPLICATE_SIMILARITY, mmr_select
+
+QUERY = [1.0, 0.0, 0.0, 0.0]
+
+
+def _unit(*rows):
+    v = np.asarray(rows, dtype=np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_near_duplicates_of_a_pick_are_never_picked():
+    vectors = _unit([1.0, 0.1, 0.0, 0.0],    # best hit
+                    [1.0, 0.35, 0.0, 0.0],   # syndicated copy, cos ~0.97 with the best hit
+                    [0.6, 0.0, 0.8, 0.0])
+    assert vectors[0] @ vectors[1] > DUPLICATE_SIMILARITY
+    assert mmr_select(QUERY, vectors, k=3) == [0, 2]
+    assert mmr_select(QUERY, vectors, k=3, duplicate_similarity=0.99) == [0, 1, 2]
+    assert mmr_select(QUERY, vectors, k=0) == [] and mmr_select(QUERY, np.zeros((0, 4)), k=3) == []
+
+
+def test_no_source_passes_its_cap():
+    vectors = _unit([1.0, 0.0, 0.2, 0.0], [1.0, 0.0, 0.0, 0.5],
+                    [1.0, 0.6, 0.0, 0.0], [0.5, 0.0, 0.0, -1.0])
+    groups = ["a.com", "a.com", "a.com", "b.com"]
+    picked = mmr_select(QUERY, vectors, k=4, groups=groups, max_per_group=2)
+    assert picked == [0, 1, 3]
+    assert len(mmr_select(QUERY, vectors, k=4, groups=groups)) == 4
+
+
+def test_lambda_trades_relevance_for_novelty():
+    vectors = _unit([1.0, 0.1, 0.0, 0.0],
+                    [0.9, 0.5, 0.0, 0.0],    # close to the best hit, more relevant
+                    [0.7, -0.2, 0.7, 0.0])   # less relevant, covers something new
+    relevance = vectors @ np.asarray(QUERY, dtype=np.float32)
+    assert relevance[1] > relevance[2]
+    assert mmr_select(QUERY, vectors, k=2, lambda_mult=1.0) == [0, 1]
+    assert mmr_select(QUERY, vectors, k=2, lambda_mult=0.5) == [0, 2]
@@ -0,0 +1,68 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import rag.model_artifacts as artifacts
+from rag.model_artifacts import load_manifest, prefetch, resolve_model, verify
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+FILES = {"config.json": b'{"hidden_size": 384}', "model.safetensors": b"\x00" * 64, "1_Pooling/config.json": b"{}"}
+
+
+@pytest.fixture
+def pinned(tmp_path, monkeypatch):
+    """A fake Hub snapshot prefetched into tmp_path."""
+    def snapshot_download(repo_id, revision, local_dir, allow_patterns, token):
+        assert repo_id == MODEL and revision == "abc123" and "*.safetensors" in allow_patterns
+        for rel, data in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(local_dir, rel)), exist_ok=True)
+            with open(os.path.join(local_dir, rel), "wb") as f:
+                f.write(data)
+        os.makedirs(os.path.join(local_dir, ".cache"), exist_ok=True)
+        open(os.path.join(local_dir, ".cache", "lock"), "w").close()
+
+    class _Api:
+        def model_info(self, name, revision=None):
+            return SimpleNamespace(sha="abc123")
+
+    monkeypatch.setattr("huggingface_hub.HfApi", _Api)
+    monkeypatch.setattr("huggingface_hub.snapshot_download", snapshot_download)
+    entry = prefetch(MODEL, root=str(tmp_path))
+    return tmp_path, entry
+
+
+def test_prefetch_records_revision_and_files(pinned):
+    root, entry = pinned
+    assert entry["revision"] == "abc123" and entry["path"] == "sentence-transformers--all-MiniLM-L6-v2"
+    assert sorted(entry["files"]) == sorted(FILES)   # .cache metadata is skipped
+    assert entry["files"]["model.safetensors"]["size"] == 64
+    assert load_manifest(str(root))["models"][MODEL] == entry
+
+
+def test_intact_model_resolves_locally_and_damage_falls_back(pinned, monkeypatch):
+    root, entry = pinned
+    model_dir = os.path.join(str(root), entry["path"])
+    assert resolve_model(MODEL, root=str(root)) == model_dir
+    assert resolve_model("google/flan-t5-base", root=str(root)) == "google/flan-t5-base"
+    assert verify(root=str(root)) == {MODEL: []}
+
+    # Truncated weights: the size check fails, so the Hub id is used
+    with open(os.path.join(model_dir, "model.safetensors"), "wb") as f:
+        f.write(b"\x00" * 10)
+    assert resolve_model(MODEL, root=str(root)) == MODEL
+    monkeypatch.setattr(artifacts, "ARTIFACTS_REQUIRED", True)
+    with pytest.raises(FileNotFoundError):
+        resolve_model(MODEL, root=str(root))
+
+
+def test_verify_reports_checksum_mismatch_and_missing_files(pinned):
+    root, entry = pinned
+    model_dir = os.path.join(str(root), entry["path"])
+    # Same size, different bytes: only the hash catches it
+    with open(os.path.join(model_dir, "config.json"), "wb") as f:
+        f.write(b'{"hidden_size": 768}')
+    os.remove(os.path.join(model_dir, "1_Pooling", "config.json"))
+    report = verify([MODEL, "missing/model"], root=str(root))
+    assert sorted(report[MODEL]) == ["checksum mismatch config.json", "missing 1_Pooling/config.json"]
+    assert report["missing/model"] == ["not in manifest"]
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from rag.model_lifecycle import ModelLifecycle
+
+
+class _FlakyLoader:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OSError("model download interrupted")
+
+
+def _lifecycle(loader, attempts=3):
+    lifecycle = ModelLifecycle(warmup_llm=False, attempts=attempts, retry_base=0.0)
+    lifecycle._loaders["embedder"] = loader
+    return lifecycle
+
+
+def test_failed_load_is_retried_until_ready():
+    loader = _FlakyLoader(failures=2)
+    lifecycle = _lifecycle(loader)
+    assert lifecycle.status() == {"ready": False, "models": {"embedder": {"status": "pending"}}}
+
+    assert lifecycle.load_all()
+    assert loader.calls == 3
+    state = lifecycle.status()["models"]["embedder"]
+    assert state["status"] == "ready" and state["attempt"] == 3
+    assert lifecycle.wait_ready(timeout=0)
+
+
+def test_request_path_load_recovers_a_failed_warmup():
+    loader = _FlakyLoader(failures=10)
+    lifecycle = _lifecycle(loader, attempts=2)
+    assert not lifecycle.load_all()
+    state = lifecycle.status()["models"]["embedder"]
+    assert state["status"] == "failed" and state["retry_in"] is None and "interrupted" in state["error"]
+    assert loader.calls == 2 and not lifecycle.wait_ready(timeout=0)
+
+    lifecycle.mark_ready("embedder")
+    assert lifecycle.status()["ready"] and lifecycle.wait_ready(timeout=0)
+    # Once ready, a pending retry loop stops without calling the loader again
+    lifecycle.load_all()
+    assert loader.calls == 2
+
+
+def test_ready_endpoint_follows_the_state(monkeypatch):
+    main = pytest.importorskip("main")
+    lifecycle = _lifecycle(_FlakyLoader(failures=1), attempts=1)
+    monkeypatch.setattr(main, "get_model_lifecycle", lambda: lifecycle)
+
+    lifecycle.load_all()
+    response = main.ready()
+    assert response.status_code == 503 and json.loads(response.body)["ready"] is False
+
+    lifecycle.mark_ready("embedder")
+    assert main.ready().status_code == 200
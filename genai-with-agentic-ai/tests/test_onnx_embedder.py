@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+from rag.onnx_embedder import ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxEmbeddings, mean_pool
+
+
+TEXTS = [
+    "The central bank raised interest rates by a quarter point on Wednesday.",
+    "The home team won the championship final after extra time.",
+    "Scientists reported a new exoplanet in the habitable zone of a red dwarf.",
+    "Short.",
+    "Markets " * 400,   # longer than the 256-token window
+]
+
+
+# The model tests are opted into with --onnx-parity (tests/conftest.py);
+# once asked for, a missing model or reference fails instead of skipping
+@pytest.fixture(scope="module")
+def onnx_model():
+    if not os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_MODEL_FILE)):
+        pytest.fail("ONNX model not exported (python rag/onnx_embedder.py export)")
+    return OnnxEmbeddings()
+
+
+@pytest.fixture(scope="module")
+def torch_model():
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from rag.embedder import EMBEDDING_MODEL_NAME
+    try:
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+    except Exception as e:
+        pytest.fail(f"PyTorch reference model unavailable: {e}")
+
+
+def test_mean_pool_ignores_padding():
+    rng = np.random.default_rng(0)
+    hidden = rng.normal(size=(3, 6, 8)).astype(np.float32)
+    lengths = [6, 3, 1]
+    mask = np.zeros((3, 6), dtype=np.int64)
+    for i, n in enumerate(lengths):
+        mask[i, :n] = 1
+    # Padding positions carry garbage that must not leak into the mean
+    hidden[mask == 0] = 1e3
+
+    pooled = mean_pool(hidden, mask)
+    for i, n in enumerate(lengths):
+        reference = hidden[i, :n].mean(axis=0)
+        assert np.allclose(pooled[i], reference / np.linalg.norm(reference), atol=1e-6)
+    assert np.allclose(np.linalg.norm(pooled, axis=1), 1.0)
+    # An all-padding row pools to zeros instead of dividing by zero
+    assert np.isfinite(mean_pool(hidden[:1], np.zeros((1, 6), dtype=np.int64))).all()
+
+
+@pytest.mark.onnx_parity
+def test_vectors_are_normalized(onnx_model):
+    vectors = np.asarray(onnx_model.embed_documents(TEXTS))
+    assert vectors.shape == (len(TEXTS), 384)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-4)
+
+
+@pytest.mark.onnx_parity
+def test_parity_with_pytorch(onnx_model, torch_model):
+    ours = np.asarray(onnx_model.embed_documents(TEXTS))
+    reference = np.asarray(torch_model.embed_documents(TEXTS))
+    cosine = (ours * reference).sum(axis=1)
+    assert cosine.min() > 0.99
+
+    # Nearest other text is what retrieval depends on
+    nearest = lambda v: (v @ v.T - 2 * np.eye(len(v))).argmax(axis=1)
+    assert np.array_equal(nearest(ours), nearest(reference))
+
+
+@pytest.mark.onnx_parity
+def test_query_matches_document_embedding(onnx_model):
+    query = np.asarray(onnx_model.embed_query(TEXTS[0]))
+    document = np.asarray(onnx_model.embed_documents([TEXTS[0]])[0])
+    # int8 activations are scaled per batch, so allow a little drift
+    assert float(query @ document) > 0.999
@@ -0,0 +1,68 @@
+import numpy as np
+
+from rag.quantized_store import MIN_RERANK, QuantizedVectorStore, ScalarQuantizer, recall_report
+
+DIM = 64
+
+
+def _vectors(n, seed=0):
+    # Clustered like sentence embeddings: near neighbours are close in float
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, DIM))
+    v = centers[rng.integers(0, 20, size=n)] + 0.3 * rng.normal(size=(n, DIM))
+    return (v / np.linalg.norm(v, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _fill(store, vectors, start=0):
+    ids = [f"a{start + i}::0" for i in range(len(vectors))]
+    metas = [{"parent_id": f"a{start + i}", "chunk_index": 0, "category": "Tech" if i % 2 else "World"}
+             for i in range(len(vectors))]
+    store._write(ids, ["doc"] * len(vectors), vectors, metas)
+    return ids
+
+
+def test_rerank_recovers_recall_lost_to_the_codes(tmp_path):
+    store = QuantizedVectorStore(str(tmp_path))
+    _fill(store, _vectors(3000))
+    report = recall_report(store, n_queries=100, k=10)
+    assert report["queries"] == 100
+    assert report["recall@10_reranked"] >= 0.97
+    assert report["recall@10_reranked"] > report["recall@10_codes"]
+    assert report["rows"] == 3000 and report["codes_ram_mb"] < report["float32_ram_mb"] / 3
+
+
+def test_scores_are_exact_after_rerank_and_skip_dead_rows(tmp_path):
+    store = QuantizedVectorStore(str(tmp_path))
+    vectors = _vectors(500, seed=1)
+    ids = _fill(store, vectors)
+    for i in (0, 17, 499):
+        doc, sim = store.search_by_vector(vectors[i], k=1)[0]
+        assert doc.id == ids[i] and np.isclose(sim, 1.0, atol=1e-3)
+
+    hits = store.search_by_vector(vectors[3], k=5, filter={"category": "Tech"})
+    expected = np.asarray(vectors[[int(d.id[1:-3]) for d, _ in hits]], dtype=np.float16).astype(np.float32)
+    assert np.allclose([s for _, s in hits], expected @ vectors[3], atol=1e-3)
+    assert all(d.metadata["category"] == "Tech" for d, _ in hits)
+
+    store.delete([ids[17]])
+    assert ids[17] not in {d.id for d, _ in store.search_by_vector(vectors[17], k=MIN_RERANK)}
+
+
+def test_quantizer_retrains_as_the_store_doubles_and_reloads(tmp_path):
+    store = QuantizedVectorStore(str(tmp_path))
+    first = _vectors(200, seed=2)
+    _fill(store, first)
+    assert store._trained_rows == 200
+    # Out-of-range vectors clip to the trained range until the next retrain
+    shifted = np.clip(_vectors(200, seed=3) * 3.0, -1, 1)
+    ids = _fill(store, shifted, start=200)
+    assert store._trained_rows == 400
+    originals = np.asarray(store._matrix[200:400], dtype=np.float32)
+    codes = store._quantizer.encode(originals)
+    assert np.array_equal(store._codes[200:400], codes)
+    assert np.abs(store._quantizer.decode(codes) - originals).max() <= store._quantizer.step.max()
+
+    store.persist()
+    reopened = QuantizedVectorStore(str(tmp_path))
+    assert isinstance(reopened._quantizer, ScalarQuantizer) and reopened._trained_rows == 400
+    assert reopened.search_by_vector(shifted[5], k=1)[0][0].id == ids[5]
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+import agents.run_checkpoint as checkpoint
+from agents.run_checkpoint import RunCancelled, cancel_run, get_run, list_runs, start_run
+
+PARAMS = {"quick_mode": True, "clear_old": False}
+
+
+@pytest.fixture(autouse=True)
+def runs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "DB_PATH", str(tmp_path / "runs.db"))
+    monkeypatch.setattr(checkpoint, "_active", {})
+
+
+def _interrupt(run):
+    # The process died: nothing finished the run, it just stopped executing
+    run.release()
+
+
+def test_interrupted_run_resumes_from_its_checkpoint():
+    run = start_run(PARAMS)
+    run.mark_step("clear_store")
+    run.mark_sources("Tech", {"https://a.com/feed": 3, "https://b.com/feed": 0})
+    run.mark_urls([
+        {"url": "https://a.com/1", "status": "ingested"},
+        {"url": "https://a.com/2", "status": "rejected", "reason": "near_duplicate"},
+        {"url": "https://a.com/3", "status": "prepared"},      # not final, redone on resume
+    ])
+    _interrupt(run)
+
+    resumed = start_run(PARAMS)
+    assert resumed.run_id == run.run_id and resumed.resumed
+    assert resumed.step_done("clear_store")
+    assert resumed.source_done("Tech", "https://a.com/feed") and not resumed.source_done("Tech", "https://c.com/feed")
+    assert resumed.ingested_for("Tech") == 3 and resumed.ingested_for("World") == 0
+    assert resumed.url_done("https://a.com/1") and resumed.url_done("https://a.com/2")
+    assert not resumed.url_done("https://a.com/3")
+    assert get_run(run.run_id)["resumed"] == 1
+
+    # Executing runs are never picked up twice
+    with pytest.raises(ValueError):
+        start_run(PARAMS, run_id=run.run_id)
+    resumed.finish("completed", {"ingested": 3})
+    info = get_run(run.run_id)
+    assert info["status"] == "completed" and info["urls"] == {"ingested": 1, "rejected": 1}
+    assert start_run(PARAMS).run_id != run.run_id
+
+
+def test_stale_or_mismatched_runs_are_not_resumed(monkeypatch):
+    old = start_run(PARAMS)
+    _interrupt(old)
+    other = start_run({"quick_mode": False, "clear_old": False})
+    # A run with different params starts fresh and marks the old one interrupted
+    assert other.run_id != old.run_id and not other.resumed
+    assert get_run(old.run_id)["status"] == "interrupted"
+    _interrupt(other)
+
+    monkeypatch.setattr(checkpoint, "RESUME_MAX_AGE_HOURS", 0)
+    time.sleep(0.01)
+    fresh = start_run({"quick_mode": False, "clear_old": False})
+    assert fresh.run_id != other.run_id
+    assert {r["run_id"]: r["status"] for r in list_runs()}[other.run_id] == "interrupted"
+
+
+def test_cancel_executing_and_interrupted_runs():
+    run = start_run(PARAMS)
+    assert cancel_run(run.run_id) and run.cancelled
+    with pytest.raises(RunCancelled):
+        run.check_cancelled()
+    run.finish("cancelled")
+    assert get_run(run.run_id)["status"] == "cancelled"
+    assert not cancel_run(run.run_id)
+
+    interrupted = start_run(PARAMS)
+    _interrupt(interrupted)
+    assert cancel_run(interrupted.run_id)
+    assert get_run(interrupted.run_id)["status"] == "cancelled"
+    # A cancelled run is never resumed
+    assert start_run(PARAMS).run_id != interrupted.run_id
+    assert not cancel_run("missing")
+
+
+def test_startup_run_resumes_an_interrupted_periodic_run():
+    # The every-2h refresh clears first; the startup run after a restart does not
+    periodic = start_run({"quick_mode": False, "clear_old": True})
+    periodic.mark_step("clear_old")
+    periodic.mark_sources("Tech", {"https://a.com/feed": 4})
+    _interrupt(periodic)
+
+    startup = start_run({"quick_mode": False, "clear_old": False})
+    assert startup.run_id == periodic.run_id and startup.resumed
+    assert startup.params == {"quick_mode": False, "clear_old": True}
+    assert startup.source_done("Tech", "https://a.com/feed")
+    _interrupt(startup)
+
+    # A quick run covers fewer sources: a different scope, never resumed
+    quick = start_run({"quick_mode": True, "clear_old": False})
+    assert quick.run_id != periodic.run_id and not quick.resumed
+    assert get_run(periodic.run_id)["status"] == "interrupted"
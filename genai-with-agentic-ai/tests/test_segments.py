@@ -0,0 +1,161 @@
+import time
+
+import numpy as np
+
+from rag.segments import SegmentedVectorStore, time_bounds
+
+DAY = 86400
+NOW = time.time()
+
+
+def _store(path, days=6, per_day=20):
+    rng = np.random.default_rng(0)
+    store = SegmentedVectorStore(str(path), hot_days=2, retention_days=4)
+    ids, metas = [], []
+    for day in range(days):
+        for j in range(per_day):
+            ids.append(f"d{day}a{j}::0")
+            metas.append({"parent_id": f"d{day}a{j}", "publishTs": int(NOW - day * DAY),
+                          "category": "Tech" if j % 2 else "Sports"})
+    vectors = rng.normal(size=(len(ids), 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store._write(ids, ids, vectors, metas)
+    return store, ids, vectors
+
+
+def test_time_filter_touches_only_recent_segments(tmp_path):
+    store, ids, vectors = _store(tmp_path)
+    assert store.count() == len(ids)
+    recent = {"$and": [{"category": "Tech"}, {"publishTs": {"$gte": int(NOW - DAY)}}]}
+    assert len(store._touched(recent)) == 2
+    assert time_bounds({"$or": [{"publishTs": {"$gte": 0}}]})[0] == -np.inf
+
+    # An old row is the best match overall but falls outside the window
+    hits = store.search_by_vector(vectors[ids.index("d4a1::0")], k=5, filter=recent)
+    assert hits and all(doc.id.startswith(("d0", "d1")) for doc, _ in hits)
+    assert store.search_by_vector(vectors[ids.index("d4a1::0")], k=1)[0][0].id == "d4a1::0"
+
+
+def test_roll_archives_and_drops_whole_segments(tmp_path):
+    store, ids, vectors = _store(tmp_path)
+    dropped = store.roll(NOW)
+    assert sorted(dropped) == sorted(i for i in ids if i.startswith("d5"))
+    tiers = [s["tier"] for s in store.stats()]
+    assert tiers == ["archive", "archive", "archive", "hot", "hot"]
+
+    store.persist()
+    reopened = SegmentedVectorStore(str(tmp_path), hot_days=2, retention_days=4)
+    assert reopened.count() == len(ids) - len(dropped)
+    doc, sim = reopened.search_by_vector(vectors[ids.index("d3a7::0")], k=1)[0]
+    assert doc.id == "d3a7::0" and sim > 0.99
+
+
+def test_archive_is_built_without_the_store_lock_and_keeps_late_writes(tmp_path):
+    import threading
+
+    store, ids, vectors = _store(tmp_path, days=3)
+    day = store._day_of["d2a0::0"]
+    late = {"parent_id": "late", "publishTs": int(NOW - 2 * DAY)}
+    build, calls = store._build_archive, []
+
+    def build_with_a_concurrent_write(*args):
+        if not calls:
+            # Another thread writes to the day being copied and must not block
+            writer = threading.Thread(target=store._write, args=(["late::0"], ["late"], vectors[:1], [late]))
+            writer.start()
+            writer.join(timeout=5)
+            assert not writer.is_alive()
+        calls.append(args[0])
+        return build(*args)
+
+    store._build_archive = build_with_a_concurrent_write
+    store.roll(NOW)
+    assert calls == [day, day] and store._tiers[day] == "archive"
+    assert store.get_metadatas(["late::0"])["late::0"]["parent_id"] == "late"
+    assert store.count() == len(ids) + 1
+
+
+def test_id_to_day_map_follows_writes_moves_and_drops(tmp_path):
+    store, ids, vectors = _store(tmp_path)
+    assert len(store._day_of) == len(ids)
+    day0, day1 = store._day_of["d0a0::0"], store._day_of["d1a0::0"]
+
+    # Re-written with an older publish time: the row moves segment
+    store._write(["d0a0::0"], ["moved"], vectors[:1], [{"parent_id": "d0a0", "publishTs": int(NOW - DAY)}])
+    assert store._day_of["d0a0::0"] == day1
+    assert "d0a0::0" not in store._segments[day0]._row_of
+    assert store.get_by_ids(["d0a0::0"])[0].page_content == "moved"
+
+    store.delete(["d0a1::0"])
+    assert "d0a1::0" not in store._day_of and store.get_metadatas(["d0a1::0"]) == {}
+
+    # A where-delete bypasses the map; the stale entry is dropped on lookup
+    store._collection.delete(where={"parent_id": "d0a2"})
+    assert store._locate(["d0a2::0"]) == [] and "d0a2::0" not in store._day_of
+
+    dropped = store.roll(NOW)
+    assert not set(dropped) & set(store._day_of)
+    reopened = SegmentedVectorStore(str(tmp_path), hot_days=2, retention_days=4)
+    assert reopened._day_of == store._day_of
+
+
+def test_reads_in_flight_keep_their_segments_open_across_a_roll(tmp_path):
+    import threading
+
+    store, ids, vectors = _store(tmp_path)
+    query = vectors[ids.index("d5a3::0")]
+    paused = store._segments[store._day_of["d2a0::0"]]
+    reached, release = threading.Event(), threading.Event()
+    search = paused.search_by_vector
+
+    def search_after_the_roll(*args, **kwargs):
+        reached.set()
+        release.wait(timeout=5)
+        return search(*args, **kwargs)
+
+    paused.search_by_vector = search_after_the_roll
+    results = []
+    reader = threading.Thread(target=lambda: results.append(store.search_by_vector(query, k=3)))
+    reader.start()
+    assert reached.wait(timeout=5)
+
+    # The reader holds no lock: roll() swaps and drops its segments meanwhile
+    dropped = store.roll(NOW)
+    assert "d5a3::0" in dropped and store._tiers[store._day_of["d2a0::0"]] == "archive"
+    assert paused._db is not None and id(paused) in store._retired
+
+    release.set()
+    reader.join(timeout=5)
+    # The dropped row is still found by the read that started before the roll
+    assert results and results[0][0][0].id == "d5a3::0"
+    assert store._readers == {} and store._retired == {}
+    assert paused._matrix is None
+
+
+def test_concurrent_searches_during_roll(tmp_path):
+    import threading
+
+    store, ids, vectors = _store(tmp_path, days=8)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                store.search_by_vector(vectors[0], k=5)
+                store.top1_by_vectors(vectors[:4])
+                store.get_by_ids(ids[::7])
+                store._collection.get(where={"category": "Tech"}, limit=50)
+            except Exception as e:   # noqa: BLE001 - any failure is the bug
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    for offset in range(4):
+        store.roll(NOW + offset * DAY)
+    done.set()
+    for t in readers:
+        t.join(timeout=10)
+    assert errors == []
+    assert store._readers == {} and store._retired == {}
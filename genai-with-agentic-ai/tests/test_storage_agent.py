@@ -0,0 +1,102 @@
+import numpy as np
+
+import agents.storage_agent as storage_agent
+from agents.minhash_index import MinHashIndex
+from agents.storage_agent import (check_embedding_batch, get_validation_stats, precheck_article,
+                                  reset_validation_stats, semantic_dedupe_batch)
+from rag.vectordb import LEAD_ROWS
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+BASE = _unit([1.0, 0.2, 0.0, 0.0])
+NEAR = _unit([1.0, 0.25, 0.02, 0.0])      # cos ~0.999 with BASE
+OTHER = _unit([0.0, 0.0, 1.0, 0.3])
+
+
+def test_batch_keeps_first_of_each_duplicate_group():
+    out = semantic_dedupe_batch([BASE, OTHER, NEAR])
+    assert out["keep"].tolist() == [True, True, False]
+    assert out["duplicate_of"].tolist() == [-1, -1, 0]
+    assert out["scores"][2] > 0.99 and out["scores"][1] == 0.0
+
+
+def test_dropped_article_does_not_knock_out_later_ones():
+    # c is close to b but not to a; b is a duplicate of a, so c survives
+    a = _unit([1.0, 0.0, 0.0])
+    b = _unit([1.0, 0.55, 0.0])
+    c = _unit([1.0, 1.6, 0.0])
+    sims = np.array([[a @ b, a @ c, b @ c]])
+    assert sims[0, 0] >= 0.85 and sims[0, 1] < 0.85 and sims[0, 2] >= 0.85
+    out = semantic_dedupe_batch([a, b, c])
+    assert out["keep"].tolist() == [True, False, True]
+
+
+def test_index_similarity_rejects_and_threshold_is_respected():
+    out = semantic_dedupe_batch([BASE, OTHER], index_sims=[0.9, 0.5])
+    assert out["keep"].tolist() == [False, True]
+    assert np.allclose(out["scores"], [0.9, 0.5])
+    assert semantic_dedupe_batch([BASE, NEAR], threshold=0.9999)["keep"].all()
+
+
+def test_empty_batch():
+    out = semantic_dedupe_batch(np.zeros((0, 4)))
+    assert len(out["keep"]) == 0
+
+
+# ----------------------------------------------------------------------
+# Validation cascade
+# ----------------------------------------------------------------------
+ARTICLE = " ".join(
+    f"Sentence {i} of the report describes how the council approved the new transit budget today."
+    for i in range(8)
+)
+
+
+class _Index:
+    """top1_by_vectors stand-in: fixed similarity, records the filter it got."""
+
+    def __init__(self, sims):
+        self.sims = np.asarray(sims, dtype=np.float32)
+        self.where = None
+
+    def top1_by_vectors(self, embeddings, where=None):
+        self.where = where
+        return self.sims[:len(embeddings)], [{"parent_id": "stored", "title": "Stored"}] * len(embeddings)
+
+
+def test_cascade_stops_at_cheapest_failing_stage(monkeypatch):
+    reset_validation_stats()
+    minhash = MinHashIndex()
+    assert precheck_article("too short", minhash=minhash)["stage"] == "heuristics"
+
+    first = precheck_article(ARTICLE, minhash=minhash)
+    assert first["passed"] and "signature" in first
+    minhash.add("a1", first["signature"], timestamp=0)
+    assert precheck_article(ARTICLE, minhash=minhash)["stage"] == "hash_dedupe"
+
+    # Embedding stage compares leads with leads only
+    index = _Index([0.95, 0.8, 0.2])
+    monkeypatch.setattr(storage_agent, "LLM_CHECK_ENABLED", True)
+    monkeypatch.setattr(storage_agent, "llm_confirms_duplicate", lambda a, b: True)
+    vectors = [_unit([1, 0, 0]), _unit([0, 1, 0]), _unit([0, 0, 1])]
+    decisions = check_embedding_batch(["a", "b", "c"], vectors, vectordb=index)
+    assert index.where == LEAD_ROWS
+    assert [d["stage"] for d in decisions] == ["embedding_dedupe", "llm_check", None]
+    assert decisions[0]["duplicate_of"] == "stored"
+
+    stats = get_validation_stats()
+    assert stats["checked"] == 3 and stats["approved"] == 1 and stats["llm_calls"] == 0
+    assert stats["rejected"] == {"heuristics": 1, "hash_dedupe": 1, "embedding_dedupe": 1, "llm_check": 1}
+    reset_validation_stats()
+    assert get_validation_stats()["checked"] == 0
+
+
+def test_llm_band_is_skipped_when_disabled(monkeypatch):
+    monkeypatch.setattr(storage_agent, "LLM_CHECK_ENABLED", False)
+    monkeypatch.setattr(storage_agent, "llm_confirms_duplicate", lambda a, b: 1 / 0)
+    decisions = check_embedding_batch(["b"], [_unit([0, 1, 0])], vectordb=_Index([0.8]))
+    assert decisions[0]["passed"]
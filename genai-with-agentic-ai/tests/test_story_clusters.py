@@ -0,0 +1,88 @@
+import numpy as np
+
+from agents.story_clusters import WINDOW_HOURS, StoryClusterer, trending_score
+
+HOUR = 3600.0
+NOW = 1_700_000_000.0
+
+
+def _unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def _article(i, source):
+    return {"id": f"a{i}", "source": f"https://www.{source}/story-{i}", "title": f"Story {i}"}
+
+
+def test_trending_score_counts_distinct_source_growth():
+    assert trending_score([(NOW, "a.com"), (NOW - 60, "a.com")], NOW) == 0.0
+    assert trending_score([(NOW, "a.com"), (NOW, "b.com")], NOW) == 2 * (1 + 2)
+    # Same sources already seen in the previous window: no growth bonus
+    steady = [(NOW, "a.com"), (NOW, "b.com"), (NOW - 7 * HOUR, "a.com"), (NOW - 8 * HOUR, "b.com")]
+    assert trending_score(steady, NOW) == 2.0
+    # Older than both windows: ignored
+    assert trending_score([(NOW - 13 * HOUR, "a.com"), (NOW - 13 * HOUR, "b.com")], NOW) == 0.0
+
+
+def test_similar_articles_share_a_story():
+    clusterer = StoryClusterer()
+    quake = _unit([1, 0.1, 0, 0])
+    vectors = [quake, _unit([1, 0.15, 0.05, 0]), _unit([0, 0, 1, 0]), _unit([1, 0.05, 0, 0.1])]
+    sources = ["a.com", "b.com", "c.com", "c.com"]
+    ids = clusterer.assign_batch(vectors, [_article(i, s) for i, s in enumerate(sources)], NOW)
+    assert ids[0] == ids[1] == ids[3] != ids[2]
+    assert len(clusterer) == 2
+    # A later batch joins the existing story through the pre-batch centroids
+    later = clusterer.assign_batch([quake], [_article(4, "d.com")], NOW + 60)
+    assert later == [ids[0]]
+
+    top = clusterer.trending()
+    assert [a["storyId"] for a in top] == [ids[0]]
+    assert top[0]["id"] == "a4" and top[0]["storySources"] == 4
+
+
+def test_events_use_publish_time_and_trending_is_read_only():
+    clusterer = StoryClusterer()
+    vec = _unit([1, 0, 0])
+    old = NOW - 2 * WINDOW_HOURS * HOUR - 60
+    # Backfilled articles published long ago never trend, whenever ingested
+    clusterer.assign_batch([vec, vec], [_article(0, "a.com"), _article(1, "b.com")], NOW,
+                           timestamps=[old, old])
+    assert clusterer.trending() == []
+
+    fresh = _unit([0, 1, 0])
+    clusterer.assign_batch([fresh, fresh], [_article(2, "a.com"), _article(3, "b.com")], NOW,
+                           timestamps=[NOW - 60, NOW + 3600])   # future dates are capped at ingest
+    assert [a["id"] for a in clusterer.trending()] == ["a3"]
+    assert max(ts for s in clusterer._stories for ts, _ in s["events"]) == NOW
+
+    # Reads never rescore: the list (and the isTrending flags synced with
+    # it) only change at the next ingest, which scores at its own time
+    stories = [dict(s) for s in clusterer._stories]
+    assert clusterer.trending() == clusterer.trending()
+    assert [dict(s) for s in clusterer._stories] == stories
+    clusterer.assign_batch([_unit([0, 0, 1])], [_article(4, "c.com")], NOW + 2 * WINDOW_HOURS * HOUR)
+    assert clusterer.trending_ids() == []
+
+
+def test_forget_articles_keeps_timelines(tmp_path):
+    clusterer = StoryClusterer(path=str(tmp_path / "stories"))
+    vec = _unit([1, 0, 0])
+    clusterer.assign_batch([vec, vec], [_article(0, "a.com"), _article(1, "b.com")], NOW)
+    assert clusterer.trending_ids() == ["a1"]
+
+    clusterer.forget_articles(["a1"])
+    assert clusterer.trending_ids() == []
+    assert [a["id"] for a in clusterer._stories[0]["articles"]] == ["a0"]
+    # Velocity carries over: the remaining snapshot trends at the next ingest
+    clusterer.assign_batch([_unit([0, 1, 0])], [_article(2, "c.com")], NOW + 60)
+    assert clusterer.trending_ids() == ["a0"]
+
+    clusterer.forget_articles()
+    assert clusterer.trending() == []
+    assert len(clusterer._stories[0]["events"]) == 2
+
+    clusterer.save()
+    reloaded = StoryClusterer(path=str(tmp_path / "stories"))
+    assert len(reloaded) == 2 and reloaded._stories[0]["events"][0] == (NOW, "a.com")
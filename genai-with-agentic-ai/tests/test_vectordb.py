@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import rag.numpy_store as numpy_store
+import rag.vectordb as vectordb
+from rag.vectordb import get_vector_db, reset_vector_db
+
+DIM = 8
+
+
+class _Embedder:
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        v = np.random.default_rng(abs(hash(text)) % 2**32).normal(size=DIM)
+        return (v / np.linalg.norm(v)).tolist()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    """A fresh shared handle over a Chroma directory in tmp_path, on a fake clock."""
+    clock = _Clock()
+    monkeypatch.setattr(vectordb, "time", clock)
+    monkeypatch.setattr(vectordb, "CHROMA_DIR", str(tmp_path / "vector_store"))
+    monkeypatch.setattr(vectordb, "VECTOR_BACKEND", "chroma")
+    monkeypatch.setattr(vectordb, "get_embedding_model", _Embedder)
+    monkeypatch.setattr(numpy_store, "EXACT_SEARCH_MAX_ROWS", 0)
+    monkeypatch.setattr(vectordb, "_vector_db", None)
+    monkeypatch.setattr(vectordb, "_vector_db_checked", 0.0)
+    return clock
+
+
+def test_concurrent_first_calls_open_the_store_once(clock, monkeypatch):
+    opened = []
+
+    def slow_open():
+        time.sleep(0.05)
+        opened.append(SimpleNamespace(_collection=SimpleNamespace(count=lambda: 0)))
+        return opened[-1]
+
+    monkeypatch.setattr(vectordb, "_open_vector_db", slow_open)
+    handles = []
+    threads = [threading.Thread(target=lambda: handles.append(get_vector_db())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(opened) == 1
+    assert all(h is opened[0] for h in handles)
+
+
+def test_deleted_collection_is_reopened_at_the_next_health_check(clock):
+    db = get_vector_db()
+    db._collection.upsert(ids=["a::0"], embeddings=[_Embedder().embed_query("a")], documents=["a"])
+    db._client.delete_collection(vectordb.COLLECTION_NAME)
+
+    # Between checks the handle is a plain global read, even if stale
+    clock.now += vectordb.HEALTH_CHECK_SECONDS - 1
+    assert get_vector_db() is db
+
+    clock.now += 1
+    reopened = get_vector_db()
+    assert reopened is not db
+    assert reopened._collection.count() == 0
+
+
+def test_healthy_handle_survives_the_health_check(clock):
+    db = get_vector_db()
+    clock.now += 5 * vectordb.HEALTH_CHECK_SECONDS
+    assert get_vector_db() is db
+
+
+def test_reset_reopens_on_the_next_call(clock):
+    db = get_vector_db()
+    db._client.delete_collection(vectordb.COLLECTION_NAME)
+    reset_vector_db()
+    reopened = get_vector_db()     # no wait for the health check
+    assert reopened is not db
+    assert reopened._collection.count() == 0